@@ -1,7 +1,8 @@
 import logging
 import time
 from abc import ABCMeta, abstractmethod
-from typing import List, Set, Tuple, Dict, Optional, Iterable, Generic, TypeVar, ClassVar, Final, cast, Callable, Type
+from typing import List, Set, Tuple, Dict, Optional, Iterable, Generic, TypeVar, ClassVar, Final, cast, Callable, \
+    Type, Union
 
 import numpy as np
 import pandas as pd
@@ -270,29 +271,19 @@ class BaseConceptLearner(Generic[_N], metaclass=ABCMeta):
             hypotheses: A list of search tree nodes (that have a concept property)
 
         Returns:
-            matrix of \\|individuals\\| x \\|hypotheses\\|
+            boolean matrix of \\|individuals\\| x \\|hypotheses\\|
         """
-        labels = np.zeros((len(individuals), len(hypotheses)))
-        for jth_hypo in range(len(hypotheses)):
-            node = hypotheses[jth_hypo]
-
-            kb_individuals = self.kb.individuals_set(node.concept)
-            for ith_ind in range(len(individuals)):
-                ind = individuals[ith_ind]
-
-                kb_test = self.kb.individuals_set(ind)
-                if kb_test in kb_individuals:
-                    labels[ith_ind][jth_hypo] = 1
-        return labels
+        return self.kb.individuals_membership(individuals, (node.concept for node in hypotheses))
 
     def predict(self, individuals: List[OWLNamedIndividual], hypotheses: Optional[List[_N]] = None,
-                n: Optional[int] = None) -> pd.DataFrame:
+                n: Optional[int] = None, *, as_array: bool = False) -> Union[pd.DataFrame, np.ndarray]:
         """Create a binary data frame showing for each individual whether it is entailed in a class expression
 
         Args:
             individuals: A list of individuals/instances where each item is a string.
             hypotheses: A list of ALC concepts.
             n: integer denoting number of ALC concepts to extract from search tree if hypotheses=None.
+            as_array: return the boolean matrix of \\|individuals\\| x \\|hypotheses\\| instead of a data frame
 
         Returns:
             Data frame which has a 1 in each cell where the individual is entailed by the hypothesis
@@ -305,9 +296,13 @@ class BaseConceptLearner(Generic[_N], metaclass=ABCMeta):
                 raise ValueError('**n** must be positive integer.')
             hypotheses = list(self.best_hypotheses(n))
 
+        labels = self.assign_labels_to_individuals(individuals=individuals, hypotheses=hypotheses)
+        if as_array:
+            return labels
+
         dlr = DLSyntaxObjectRenderer()
 
-        return pd.DataFrame(data=self.assign_labels_to_individuals(individuals=individuals, hypotheses=hypotheses),
+        return pd.DataFrame(data=labels.astype(np.float64),
                             index=[dlr.render(_) for _ in individuals],
                             columns=[dlr.render(c.concept) for c in hypotheses])
 
@@ -5,22 +5,22 @@ from itertools import islice
 from typing import Iterable, Optional, Dict, Set
 
 import pandas as pd
-from ontolearn.core.owl.utils import OperandSetTransform
+from ontolearn.core.owl.utils import ConceptCanonicalizer, ExpressionStore, OperandSetTransform
 
 from ontolearn.search import HeuristicOrderedNode, OENode, TreeNode, LengthOrderedNode, LBLNode, LBLSearchTree, \
-    QualityOrderedNode
+    QualityOrderedNode, ExtensionIndex
 from owlapy.model import OWLClassExpression
 from owlapy.render import DLSyntaxObjectRenderer
 from sortedcontainers import SortedSet
 from . import KnowledgeBase
 from .abstracts import AbstractScorer, BaseRefinement, AbstractHeuristic, AbstractLearningProblem
 from .base_concept_learner import BaseConceptLearner
-from .core.owl.utils import EvaluatedDescriptionSet, ConceptOperandSorter
-from owlapy.util import OrderedOWLObject
+from .core.owl.utils import EvaluatedDescriptionSet
+from owlapy.util import owl_object_sort_key
 from .heuristics import CELOEHeuristic, OCELHeuristic
 from .learning_problem import PosNegLPStandard, EncodedPosNegLPStandard
 from .metrics import F1, Accuracy
-from .refinement_operators import LengthBasedRefinement
+from .refinement_operators import LengthBasedRefinement, ModifiedCELOERefinement
 from .utils import oplogging, create_experiment_folder
 from abc import ABCMeta
 from .concept_learner import BaseConceptLearner
@@ -55,12 +55,14 @@ pd.set_option('display.max_columns', 100)
 
 logger = logging.getLogger(__name__)
 
-_concept_operand_sorter = ConceptOperandSorter()
+_concept_canonicalizer = ConceptCanonicalizer()
+_operand_set_transform = OperandSetTransform()
 
 
 class CELOE(BaseConceptLearner[OENode]):
     __slots__ = 'best_descriptions', 'max_he', 'min_he', 'best_only', 'calculate_min_max', 'heuristic_queue', \
-                'search_tree', '_learning_problem', '_max_runtime', '_seen_norm_concepts'
+                'search_tree', '_learning_problem', '_max_runtime', '_seen_norm_concepts', '_refinement_operands', \
+                '_expression_store', 'extension_index'
 
     name = 'celoe_python'
 
@@ -72,10 +74,15 @@ class CELOE(BaseConceptLearner[OENode]):
     calculate_min_max: bool
 
     search_tree: Dict[OWLClassExpression, TreeNode[OENode]]
-    seen_norm_concepts: Set[OWLClassExpression]
+    # IDs of the normalised concepts in the expression store => first concept with that normal form
+    _seen_norm_concepts: Dict[int, OWLClassExpression]
+    _expression_store: ExpressionStore
+    # refinement => operands, such that refinement is equivalent to their intersection
+    _refinement_operands: Dict[OWLClassExpression, Tuple[OWLClassExpression, ...]]
     heuristic_queue: 'SortedSet[OENode]'
     best_descriptions: EvaluatedDescriptionSet[OENode, QualityOrderedNode]
     _learning_problem: Optional[EncodedPosNegLPStandard]
+    extension_index: Optional[ExtensionIndex[OENode]]
 
     def __init__(self,
                  knowledge_base: KnowledgeBase,
@@ -88,7 +95,21 @@ class CELOE(BaseConceptLearner[OENode]):
                  max_runtime: Optional[int] = None,
                  max_results: int = 10,
                  best_only: bool = False,
-                 calculate_min_max: bool = True):
+                 calculate_min_max: bool = True,
+                 deduplicate_extensions: bool = False):
+        """Create a new CELOE concept learner
+
+        The other arguments are described in BaseConceptLearner.
+
+        Args:
+            max_results: number of best hypotheses to keep
+            best_only: expand the node with the best heuristic, whether or not its concept is already a solution
+            calculate_min_max: keep statistics of the horizontal expansion of the nodes
+            deduplicate_extensions: drop refinements that have the same extension as a shorter known node before
+                they are evaluated, and replace longer known nodes by shorter refinements in the search. Nodes of the
+                same length are kept, as the refinement operator may refine them differently. The number of dropped
+                and merged nodes is kept in `extension_index`
+        """
         super().__init__(knowledge_base=knowledge_base,
                          refinement_operator=refinement_operator,
                          quality_func=quality_func,
@@ -100,11 +121,15 @@ class CELOE(BaseConceptLearner[OENode]):
 
         self.search_tree = dict()
         self.heuristic_queue = SortedSet(key=HeuristicOrderedNode)
-        self._seen_norm_concepts = set()
+        self._seen_norm_concepts = dict()
+        self._expression_store = ExpressionStore()
+        self._refinement_operands = dict()
         self.best_descriptions = EvaluatedDescriptionSet(max_size=max_results, ordering=QualityOrderedNode)
 
         self.best_only = best_only
         self.calculate_min_max = calculate_min_max
+        self.extension_index = ExtensionIndex(lambda node: knowledge_base.individuals_set(node.concept)) \
+            if deduplicate_extensions else None
 
         self.max_he = 0
         self.min_he = 1
@@ -149,15 +174,25 @@ class CELOE(BaseConceptLearner[OENode]):
 
         with self.updating_node(node):
             # TODO: NNF
-            refinements = SortedSet(
-                map(_concept_operand_sorter.sort,
-                    self.operator.refine(
-                        node.concept,
-                        max_length=node.h_exp,
-                        current_domain=self.start_class)
-                    )  # noqa: E203
-                ,
-                key=OrderedOWLObject)
+            if isinstance(self.operator, ModifiedCELOERefinement):
+                refinements = SortedSet(key=owl_object_sort_key)
+                for ref, operands in self.operator.refine_with_delta(node.concept,
+                                                                     max_length=node.h_exp,
+                                                                     current_domain=self.start_class):
+                    ref = _concept_canonicalizer.sort(ref)
+                    refinements.add(ref)
+                    if operands is not None:
+                        self._refinement_operands[ref] = operands
+            else:
+                refinements = SortedSet(
+                    map(_concept_canonicalizer.sort,
+                        self.operator.refine(
+                            node.concept,
+                            max_length=node.h_exp,
+                            current_domain=self.start_class)
+                        )  # noqa: E203
+                    ,
+                    key=owl_object_sort_key)
 
             node.increment_h_exp()
             node.refinement_count = len(refinements)
@@ -184,7 +219,7 @@ class CELOE(BaseConceptLearner[OENode]):
         else:
             self._max_runtime = self.max_runtime
 
-        root = self.make_node(_concept_operand_sorter.sort(self.start_class), is_root=True)
+        root = self.make_node(_concept_canonicalizer.sort(self.start_class), is_root=True)
         self._add_node(root, None)
         assert len(self.heuristic_queue) == 1
         # TODO:CD:suggest to add another assert,e.g. assert #. of instance in root > 1
@@ -196,16 +231,34 @@ class CELOE(BaseConceptLearner[OENode]):
             minimum_length = most_promising.h_exp
             if logger.isEnabledFor(oplogging.TRACE):
                 logger.debug("now refining %s", most_promising)
-            for ref in self.downward_refinement(most_promising):
+            refinements = list(self.downward_refinement(most_promising))
+            # evaluate the new refinements at once, sharing their common subexpressions. Refinements of an
+            # intersection are computed from the operands they share with the parent instead, and refinements
+            # with the same operand sets as a seen concept reuse its individuals
+            batch = []
+            batch_forms = set()
+            for ref in refinements:
+                if ref.len < minimum_length or ref.concept in self.search_tree \
+                        or ref.concept in self._refinement_operands:
+                    continue
+                norm_concept = self._expression_store.add(_concept_canonicalizer.canonical(ref.concept))
+                if self._seen_equivalent(ref.concept, norm_concept) is None:
+                    form = _operand_set_transform.simplify_operands(ref.concept)
+                    if form not in batch_forms:
+                        batch_forms.add(form)
+                        batch.append(ref.concept)
+            batch_individuals = dict(zip(batch, self.kb.individuals_set_batch(batch)))
+            for ref in refinements:
                 # we ignore all refinements with lower length
                 # (this also avoids duplicate node children)
                 # TODO: ignore too high depth
                 if ref.len < minimum_length:
                     # ignoring refinement, it does not satisfy minimum_length condition
+                    self._refinement_operands.pop(ref.concept, None)
                     continue
 
                 # note: tree_parent has to be equal to node_tree_parent(ref.parent_node)!
-                added = self._add_node(ref, tree_parent)
+                added = self._add_node(ref, tree_parent, batch_individuals.get(ref.concept))
 
                 goal_found = added and ref.quality == 1.0
 
@@ -231,24 +284,53 @@ class CELOE(BaseConceptLearner[OENode]):
         tree_parent = self.search_tree[node.concept]
         return tree_parent
 
-    def _add_node(self, ref: OENode, tree_parent: Optional[TreeNode[OENode]]):
+    def _seen_equivalent(self, concept: OWLClassExpression, norm_concept: int) -> Optional[OWLClassExpression]:
+        # the canonical form pushes negations inwards, which changes the instances found by a reasoner that does not
+        # use negation as failure (e.g. ¬¬A has none), so a seen concept is only reused if its operand sets are equal
+        seen_concept = self._seen_norm_concepts.get(norm_concept)
+        if seen_concept is not None and _operand_set_transform.simplify_operands(seen_concept) \
+                == _operand_set_transform.simplify_operands(concept):
+            return seen_concept
+        return None
+
+    def _add_node(self, ref: OENode, tree_parent: Optional[TreeNode[OENode]], ref_individuals=None):
         # TODO:CD: Why have this constraint ?
         #  We should not ignore a concept due to this constraint.
         #  It might be the case that new path to ref.concept is a better path. Hence, we should update its parent depending on the new heuristic value.
         #  Solution: If concept exists we should compare its first heuristic value  with the new one
+        operands = self._refinement_operands.pop(ref.concept, None)
         if ref.concept in self.search_tree:
             # ignoring refinement, it has been refined from another parent
             return False
 
-        norm_concept = OperandSetTransform().simplify(ref.concept)
+        norm_concept = self._expression_store.add(_concept_canonicalizer.canonical(ref.concept))
+        seen_concept = self._seen_equivalent(ref.concept, norm_concept)
         if norm_concept in self._seen_norm_concepts:
             norm_seen = True
         else:
             norm_seen = False
-            self._seen_norm_concepts.add(norm_concept)
+            self._seen_norm_concepts[norm_concept] = ref.concept
 
         self.search_tree[ref.concept] = TreeNode(ref, tree_parent, is_root=ref.is_root)
-        ref_individuals = self.kb.individuals_set(ref.concept)
+        if ref_individuals is None:
+            if seen_concept is not None:
+                # same operand sets as a concept that was evaluated before, whose individuals are cached
+                ref_individuals = self.kb.individuals_set(seen_concept)
+            elif operands is not None:
+                # child extension from the extensions of its operands
+                ref_individuals = self.kb.intersection_individuals_set(ref.concept, operands)
+            else:
+                ref_individuals = self.kb.individuals_set(ref.concept)
+        if self.extension_index is not None:
+            known = self.extension_index.get(ref_individuals)
+            if known and known[0].len < ref.len:
+                # semantically redundant, it is evaluated and refined as the known node
+                ref.individuals_count = known[0].individuals_count
+                ref.quality = known[0].quality
+                self.extension_index.dropped += 1
+                return False
+            for longer in self.extension_index.add(ref_individuals, ref):
+                self.heuristic_queue.discard(longer)
         ref.individuals_count = len(ref_individuals)
         self.quality_func.apply(ref, ref_individuals, self._learning_problem)  # AccuracyOrTooWeak(n)
         self._number_of_tested_concepts += 1
@@ -264,6 +346,12 @@ class CELOE(BaseConceptLearner[OENode]):
         # TODO: implement noise
         return True
 
+    def terminate(self):
+        if self.extension_index is not None and logger.isEnabledFor(logging.INFO):
+            logger.info('Semantically redundant refinements: {0} dropped, {1} merged'.format(
+                self.extension_index.dropped, self.extension_index.merged))
+        return super().terminate()
+
     def _log_current_best(self, heading_step, top_n: int = 10) -> None:
         logger.debug('######## %s step Best Hypotheses ###########', heading_step)
 
@@ -286,7 +374,7 @@ class CELOE(BaseConceptLearner[OENode]):
             return LengthOrderedNode(tn.node, tn.node.len)
 
         def print_partial_tree_recursive(tn: TreeNode[OENode], depth: int = 0):
-            if tn.node.heuristic is not None:
+            if tn.node in self.heuristic_queue:
                 heur_idx = len(self.heuristic_queue) - self.heuristic_queue.index(tn.node)
             else:
                 heur_idx = None
@@ -352,6 +440,10 @@ class CELOE(BaseConceptLearner[OENode]):
         self.best_descriptions.clean()
         self.search_tree.clear()
         self._seen_norm_concepts.clear()
+        self._expression_store.clear()
+        self._refinement_operands.clear()
+        if self.extension_index is not None:
+            self.extension_index.clear()
         self.max_he = 0
         self.min_he = 1
         self._learning_problem = None
@@ -651,7 +743,12 @@ class Drill(AbstractDrill, BaseConceptLearner):
         """
         assert isinstance(rl_state, RL_State)
         # 1.
-        for i in self.operator.refine(rl_state.concept):  # O(N)
+        refinements = list(self.operator.refine(rl_state.concept))  # O(N)
+        if self.kb.use_individuals_cache:
+            # evaluate all refinements at once, sharing their common subexpressions, before the states look their
+            # individuals up
+            self.kb.individuals_set_batch(refinements)
+        for i in refinements:
             # TODO: CURRENTLY IGNORED the checking not wanted concetpts if i.str not in self.concepts_to_ignore:  # O(1)
             yield self.create_rl_state(i, parent_node=rl_state)
 
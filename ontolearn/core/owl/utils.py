@@ -1,13 +1,17 @@
+from array import array
 from collections import Counter
 from functools import singledispatchmethod
-from typing import Iterable, Generic, TypeVar, Callable, List
+from typing import Iterable, Generic, TypeVar, Callable, List, Dict, Final, Optional, Union
+from weakref import WeakKeyDictionary
 
 from owlapy.model import OWLObject, OWLClass, OWLObjectProperty, OWLObjectSomeValuesFrom, \
     OWLObjectAllValuesFrom, OWLObjectUnionOf, OWLObjectIntersectionOf, OWLObjectComplementOf, OWLObjectInverseOf, \
     OWLObjectCardinalityRestriction, OWLObjectHasSelf, \
     OWLObjectHasValue, OWLObjectOneOf, OWLNamedIndividual, \
-    OWLObjectMinCardinality, OWLObjectExactCardinality, OWLObjectMaxCardinality, OWLClassExpression, OWLThing
-from owlapy.util import OrderedOWLObject
+    OWLObjectMinCardinality, OWLObjectExactCardinality, OWLObjectMaxCardinality, OWLClassExpression, OWLThing, \
+    OWLDataProperty, OWLDataSomeValuesFrom, OWLDataHasValue, OWLDatatypeRestriction, OWLDatatype, \
+    OWLAnonymousClassExpression, OWLNothing, OWLDataAllValuesFrom, OWLDataComplementOf
+from owlapy.util import owl_object_sort_key, iter_count, NNF
 from sortedcontainers import SortedSet
 
 
@@ -45,7 +49,7 @@ class OWLClassExpressionLengthMetric:
                 'data_some_values_length', 'data_all_values_length', 'data_has_value_length', \
                 'data_cardinality_length', 'object_propery_length', 'object_inverse_length', 'data_propery_length', \
                 'datatype_length', 'data_one_of_length', 'data_complement_length', 'data_intersection_length', \
-                'data_union_length'
+                'data_union_length', '_lengths'
 
     class_length: int
     object_intersection_length: int
@@ -69,6 +73,7 @@ class OWLClassExpressionLengthMetric:
     data_complement_length: int
     data_intersection_length: int
     data_union_length: int
+    _lengths: 'WeakKeyDictionary[OWLAnonymousClassExpression, int]'  # memoized lengths of the interned expressions
 
     def __init__(self, *,
                  class_length: int,
@@ -116,6 +121,7 @@ class OWLClassExpressionLengthMetric:
         self.data_complement_length = data_complement_length
         self.data_intersection_length = data_intersection_length
         self.data_union_length = data_union_length
+        self._lengths = WeakKeyDictionary()
 
     @staticmethod
     def get_default() -> 'OWLClassExpressionLengthMetric':
@@ -144,32 +150,47 @@ class OWLClassExpressionLengthMetric:
             data_union_length=1,
         )
 
+    def length(self, o: OWLObject) -> int:
+        """Length of an OWL object
+
+        The lengths of class expressions are memoized, so an expression that is built from known parts (like the
+        refinements of a node) only adds up the lengths of its direct parts. The weights of the metric should therefore
+        not be changed once lengths were computed.
+        """
+        if not isinstance(o, OWLAnonymousClassExpression):
+            return self._length(o)
+        length = self._lengths.get(o)
+        if length is None:
+            length = self._length(o)
+            self._lengths[o] = length
+        return length
+
     # single dispatch is still not implemented in mypy, see https://github.com/python/mypy/issues/2904
     @singledispatchmethod
-    def length(self, o: OWLObject) -> int:
+    def _length(self, o: OWLObject) -> int:
         raise NotImplementedError
 
-    @length.register
+    @_length.register
     def _(self, o: OWLClass) -> int:
         return self.class_length
 
-    @length.register
+    @_length.register
     def _(self, p: OWLObjectProperty) -> int:
         return self.object_propery_length
 
-    @length.register
+    @_length.register
     def _(self, e: OWLObjectSomeValuesFrom) -> int:
         return self.object_some_values_length \
                + self.length(e.get_property()) \
                + self.length(e.get_filler())
 
-    @length.register
+    @_length.register
     def _(self, e: OWLObjectAllValuesFrom) -> int:
         return self.object_all_values_length \
                + self.length(e.get_property()) \
                + self.length(e.get_filler())
 
-    @length.register
+    @_length.register
     def _(self, c: OWLObjectUnionOf) -> int:
         length = -self.object_union_length
         for op in c.operands():
@@ -177,7 +198,7 @@ class OWLClassExpressionLengthMetric:
 
         return length
 
-    @length.register
+    @_length.register
     def _(self, c: OWLObjectIntersectionOf) -> int:
         length = -self.object_intersection_length
         for op in c.operands():
@@ -185,41 +206,63 @@ class OWLClassExpressionLengthMetric:
 
         return length
 
-    @length.register
+    @_length.register
     def _(self, n: OWLObjectComplementOf) -> int:
         return self.length(n.get_operand()) + self.object_complement_length
 
-    @length.register
+    @_length.register
     def _(self, p: OWLObjectInverseOf) -> int:
         return self.object_inverse_length
 
-    @length.register
+    @_length.register
     def _(self, e: OWLObjectCardinalityRestriction) -> int:
         return self.object_cardinality_length \
                + self.length(e.get_property()) \
                + self.length(e.get_filler())
 
-    @length.register
+    @_length.register
     def _(self, s: OWLObjectHasSelf) -> int:
         return self.object_has_self_length + self.length(s.get_property())
 
-    @length.register
+    @_length.register
     def _(self, v: OWLObjectHasValue):
         return self.object_has_value_length + self.length(v.get_property())
 
-    @length.register
+    @_length.register
     def _(self, o: OWLObjectOneOf):
         return self.object_one_of_length
 
-    # TODO
-    # @length.register
-    # def _(self, n: OWLDatatypeRestriction):
-    #     return iter_count(n.facet_restrictions())
+    @_length.register
+    def _(self, p: OWLDataProperty) -> int:
+        return self.data_propery_length
 
-    # TODO
-    # @length.register
-    # def _(self, t: OWLDatatype):
-    #     return self.datatype_length
+    @_length.register
+    def _(self, e: OWLDataSomeValuesFrom) -> int:
+        return self.data_some_values_length \
+               + self.length(e.get_property()) \
+               + self.length(e.get_filler())
+
+    @_length.register
+    def _(self, e: OWLDataAllValuesFrom) -> int:
+        return self.data_all_values_length \
+               + self.length(e.get_property()) \
+               + self.length(e.get_filler())
+
+    @_length.register
+    def _(self, n: OWLDataComplementOf) -> int:
+        return self.length(n.get_data_range()) + self.data_complement_length
+
+    @_length.register
+    def _(self, v: OWLDataHasValue):
+        return self.data_has_value_length + self.length(v.get_property())
+
+    @_length.register
+    def _(self, n: OWLDatatypeRestriction):
+        return iter_count(n.facet_restrictions())
+
+    @_length.register
+    def _(self, t: OWLDatatype):
+        return self.datatype_length
 
 
 _N = TypeVar('_N')  #:
@@ -270,14 +313,14 @@ def _avoid_overly_redundand_operands(operands: List[_O], max_count: int = 2) ->
     _max_count = max_count
     r = []
     counts = Counter(operands)
-    for op in sorted(operands, key=OrderedOWLObject):
+    for op in sorted(operands, key=owl_object_sort_key):
         for _ in range(min(_max_count, counts[op])):
             r.append(op)
     return r
 
 
 def _sort_by_ordered_owl_object(i: Iterable[_O]) -> Iterable[_O]:
-    return sorted(i, key=OrderedOWLObject)
+    return sorted(i, key=owl_object_sort_key)
 
 
 class ConceptOperandSorter:
@@ -386,6 +429,13 @@ class OperandSetTransform:
     def simplify(self, o: OWLClassExpression) -> OWLClassExpression:
         return self._simplify(o).get_nnf()
 
+    def simplify_operands(self, o: OWLClassExpression) -> OWLClassExpression:
+        """Deduplicate and sort the operands of intersections and unions, leaving negations as they are
+
+        Unlike `simplify`, the result has the same instances as the expression under any treatment of negation.
+        """
+        return self._simplify(o)
+
     # single dispatch is still not implemented in mypy, see https://github.com/python/mypy/issues/2904
     @singledispatchmethod
     def _simplify(self, o: _O) -> _O:
@@ -464,3 +514,372 @@ class OperandSetTransform:
     @_simplify.register
     def _(self, r: OWLObjectOneOf):
         return OWLObjectOneOf(_sort_by_ordered_owl_object(set(r.individuals())))
+
+
+_concept_operand_sorter = ConceptOperandSorter()
+
+
+class ConceptCanonicalizer:
+    """Canonical forms of class expressions, memoized per interned expression
+
+    The canonical form of a class expression is its negation normal form, in which the operands of every
+    intersection and union are flattened, deduplicated, simplified with ⊤ and ⊥ and sorted by their sort keys. It is
+    built in a single traversal, and the forms of subexpressions that were seen before are reused. The operand order
+    given by `sort` is memoized in the same way.
+    """
+    __slots__ = '_sorted', '_positive', '_negative'
+
+    # an expression that is its own form (or whose negated form is its plain complement) is stored as None, so that
+    # the cache does not keep it alive
+    _sorted: 'WeakKeyDictionary[OWLAnonymousClassExpression, Optional[OWLClassExpression]]'
+    _positive: 'WeakKeyDictionary[OWLAnonymousClassExpression, Optional[OWLClassExpression]]'
+    _negative: 'WeakKeyDictionary[OWLAnonymousClassExpression, Optional[OWLClassExpression]]'
+
+    def __init__(self):
+        self._sorted = WeakKeyDictionary()
+        self._positive = WeakKeyDictionary()
+        self._negative = WeakKeyDictionary()
+
+    def sort(self, ce: _O) -> _O:
+        """Sort the operands of a class expression, like ConceptOperandSorter
+
+        Args:
+            ce: class expression
+
+        Returns:
+            class expression with sorted operands
+        """
+        if not isinstance(ce, OWLAnonymousClassExpression):
+            return _concept_operand_sorter.sort(ce)
+        try:
+            t = self._sorted[ce]
+        except KeyError:
+            t = _concept_operand_sorter.sort(ce)
+            self._sorted[ce] = None if t is ce else t
+            return t
+        return ce if t is None else t
+
+    def canonical(self, ce: OWLClassExpression) -> OWLClassExpression:
+        """Canonical form of a class expression
+
+        Args:
+            ce: class expression
+
+        Returns:
+            the simplified negation normal form of the class expression, with sorted operands
+        """
+        return self._canonical(ce, False)
+
+    def _canonical(self, ce: OWLClassExpression, negated: bool) -> OWLClassExpression:
+        if not isinstance(ce, OWLAnonymousClassExpression):
+            return self._transform(ce, negated)
+        if negated:
+            try:
+                t = self._negative[ce]
+            except KeyError:
+                t = self._transform(ce, True)
+                self._negative[ce] = None if isinstance(t, OWLObjectComplementOf) and t.get_operand() is ce else t
+                return t
+            return OWLObjectComplementOf(ce) if t is None else t
+        try:
+            t = self._positive[ce]
+        except KeyError:
+            t = self._transform(ce, False)
+            self._positive[ce] = None if t is ce else t
+            return t
+        return ce if t is None else t
+
+    def _operand_set(self, operands: Iterable[OWLClassExpression], negated: bool,
+                     intersection: bool) -> OWLClassExpression:
+        if negated:
+            intersection = not intersection
+        if intersection:
+            type_, neutral, absorbing = OWLObjectIntersectionOf, OWLThing, OWLNothing
+        else:
+            type_, neutral, absorbing = OWLObjectUnionOf, OWLNothing, OWLThing
+        s = set()
+        for op in operands:
+            t = self._canonical(op, negated)
+            if type(t) is type_:
+                s.update(t.operands())
+            else:
+                s.add(t)
+        if absorbing in s:
+            return absorbing
+        s.discard(neutral)
+        if not s:
+            return neutral
+        elif len(s) == 1:
+            return s.pop()
+        return type_(sorted(s, key=owl_object_sort_key))
+
+    # single dispatch is still not implemented in mypy, see https://github.com/python/mypy/issues/2904
+    @singledispatchmethod
+    def _transform(self, ce: OWLClassExpression, negated: bool) -> OWLClassExpression:
+        return NNF().get_class_nnf(ce, negated)
+
+    @_transform.register
+    def _(self, ce: OWLClass, negated: bool) -> OWLClassExpression:
+        if negated:
+            if ce.is_owl_thing():
+                return OWLNothing
+            if ce.is_owl_nothing():
+                return OWLThing
+            return OWLObjectComplementOf(ce)
+        return ce
+
+    @_transform.register
+    def _(self, ce: OWLObjectIntersectionOf, negated: bool) -> OWLClassExpression:
+        return self._operand_set(ce.operands(), negated, intersection=True)
+
+    @_transform.register
+    def _(self, ce: OWLObjectUnionOf, negated: bool) -> OWLClassExpression:
+        return self._operand_set(ce.operands(), negated, intersection=False)
+
+    @_transform.register
+    def _(self, ce: OWLObjectComplementOf, negated: bool) -> OWLClassExpression:
+        return self._canonical(ce.get_operand(), not negated)
+
+    @_transform.register
+    def _(self, ce: OWLObjectSomeValuesFrom, negated: bool) -> OWLClassExpression:
+        filler = self._canonical(ce.get_filler(), negated)
+        if negated:
+            return OWLObjectAllValuesFrom(ce.get_property(), filler)
+        if filler is ce.get_filler():
+            return ce
+        return OWLObjectSomeValuesFrom(ce.get_property(), filler)
+
+    @_transform.register
+    def _(self, ce: OWLObjectAllValuesFrom, negated: bool) -> OWLClassExpression:
+        filler = self._canonical(ce.get_filler(), negated)
+        if negated:
+            return OWLObjectSomeValuesFrom(ce.get_property(), filler)
+        if filler is ce.get_filler():
+            return ce
+        return OWLObjectAllValuesFrom(ce.get_property(), filler)
+
+    @_transform.register
+    def _(self, ce: OWLObjectHasValue, negated: bool) -> OWLClassExpression:
+        return self._canonical(ce.as_some_values_from(), negated)
+
+    @_transform.register
+    def _(self, ce: OWLObjectMinCardinality, negated: bool) -> OWLClassExpression:
+        filler = self._canonical(ce.get_filler(), False)
+        if negated:
+            if ce.get_cardinality() == 0:
+                return OWLNothing
+            return OWLObjectMaxCardinality(ce.get_cardinality() - 1, ce.get_property(), filler)
+        if filler is ce.get_filler():
+            return ce
+        return OWLObjectMinCardinality(ce.get_cardinality(), ce.get_property(), filler)
+
+    @_transform.register
+    def _(self, ce: OWLObjectMaxCardinality, negated: bool) -> OWLClassExpression:
+        filler = self._canonical(ce.get_filler(), False)
+        if negated:
+            return OWLObjectMinCardinality(ce.get_cardinality() + 1, ce.get_property(), filler)
+        if filler is ce.get_filler():
+            return ce
+        return OWLObjectMaxCardinality(ce.get_cardinality(), ce.get_property(), filler)
+
+    @_transform.register
+    def _(self, ce: OWLObjectExactCardinality, negated: bool) -> OWLClassExpression:
+        return self._canonical(ce.as_intersection_of_min_max(), negated)
+
+    @_transform.register
+    def _(self, ce: OWLObjectHasSelf, negated: bool) -> OWLClassExpression:
+        if negated:
+            return ce.get_object_complement_of()
+        return ce
+
+    @_transform.register
+    def _(self, ce: OWLObjectOneOf, negated: bool) -> OWLClassExpression:
+        individuals = sorted(set(ce.individuals()), key=owl_object_sort_key)
+        if len(individuals) > 1:
+            return self._operand_set(map(OWLObjectOneOf, individuals), negated, intersection=False)
+        if tuple(individuals) != tuple(ce.individuals()):
+            ce = OWLObjectOneOf(individuals)
+        if negated:
+            return ce.get_object_complement_of()
+        return ce
+
+
+_EXPR_LEAF: Final = 0
+_EXPR_INTERSECTION: Final = 1
+_EXPR_UNION: Final = 2
+_EXPR_COMPLEMENT: Final = 3
+_EXPR_SOME_VALUES: Final = 4
+_EXPR_ALL_VALUES: Final = 5
+_EXPR_MIN_CARDINALITY: Final = 6
+_EXPR_MAX_CARDINALITY: Final = 7
+_EXPR_EXACT_CARDINALITY: Final = 8
+_EXPR_HAS_VALUE: Final = 9
+
+_CARDINALITY_TYPES: Final = {_EXPR_MIN_CARDINALITY: OWLObjectMinCardinality,
+                             _EXPR_MAX_CARDINALITY: OWLObjectMaxCardinality,
+                             _EXPR_EXACT_CARDINALITY: OWLObjectExactCardinality}
+
+
+class ExpressionStore:
+    """Compact store of class expressions as a DAG of integer IDs
+
+    Each distinct expression gets a dense integer ID. Its constructor and the IDs of its parts (operands, property,
+    filler) are held in typed arrays, and shared subexpressions are stored once. Named entities, individuals and
+    expressions that are not decomposed (like data restrictions) are leaves, kept as objects. The owlapy objects of a
+    stored expression are only created again by `get`.
+
+    The store is a structural deduplication: equal expressions get the same ID, which is looked up in an index keyed
+    on the constructor and the part IDs. The keys are packed into one int, or into bytes for intersections and unions,
+    and the index takes most of the memory of the store; for the canonical forms of the CELOE refinements of the family
+    benchmark it is still about half the size of the expression objects.
+    """
+    __slots__ = '_kind', '_a', '_b', '_c', '_operands', '_ids', '_leaves', '_leaf_ids'
+
+    _kind: array  # ID => constructor
+    _a: array  # ID => leaf index, first operand offset, complemented operand or property
+    _b: array  # ID => operand count, filler or value
+    _c: array  # ID => cardinality
+    _operands: array  # operand IDs of the n-ary expressions
+    _ids: Dict[Union[int, bytes], int]  # packed constructor and part IDs => ID
+    _leaves: List[OWLObject]
+    _leaf_ids: Dict[OWLObject, int]  # leaf => ID
+
+    def __init__(self):
+        self._kind = array('B')
+        self._a = array('i')
+        self._b = array('i')
+        self._c = array('i')
+        self._operands = array('i')
+        self._ids = dict()
+        self._leaves = []
+        self._leaf_ids = dict()
+
+    def add(self, ce: OWLObject) -> int:
+        """Store an expression with all its subexpressions
+
+        Args:
+            ce: class expression (or leaf object)
+
+        Returns:
+            the ID of the expression, the same for structurally equal expressions
+        """
+        return self._add(ce)
+
+    def get(self, id_: int) -> OWLObject:
+        """Create the expression of an ID
+
+        Args:
+            id_: ID returned by `add`
+
+        Returns:
+            the expression that was stored under the ID
+        """
+        kind = self._kind[id_]
+        a, b = self._a[id_], self._b[id_]
+        if kind == _EXPR_LEAF:
+            return self._leaves[a]
+        elif kind == _EXPR_INTERSECTION:
+            return OWLObjectIntersectionOf(map(self.get, self._operands[a:a + b]))
+        elif kind == _EXPR_UNION:
+            return OWLObjectUnionOf(map(self.get, self._operands[a:a + b]))
+        elif kind == _EXPR_COMPLEMENT:
+            return OWLObjectComplementOf(self.get(a))
+        elif kind == _EXPR_SOME_VALUES:
+            return OWLObjectSomeValuesFrom(property=self.get(a), filler=self.get(b))
+        elif kind == _EXPR_ALL_VALUES:
+            return OWLObjectAllValuesFrom(property=self.get(a), filler=self.get(b))
+        elif kind == _EXPR_HAS_VALUE:
+            return OWLObjectHasValue(property=self.get(a), individual=self.get(b))
+        else:
+            return _CARDINALITY_TYPES[kind](cardinality=self._c[id_], property=self.get(a), filler=self.get(b))
+
+    def operands(self, id_: int) -> Iterable[int]:
+        """IDs of the direct parts of an expression (operands, property, filler), none for a leaf"""
+        kind = self._kind[id_]
+        a, b = self._a[id_], self._b[id_]
+        if kind == _EXPR_LEAF:
+            return ()
+        elif kind in (_EXPR_INTERSECTION, _EXPR_UNION):
+            return tuple(self._operands[a:a + b])
+        elif kind == _EXPR_COMPLEMENT:
+            return a,
+        return a, b
+
+    def nbytes(self) -> int:
+        """Memory used by the typed arrays"""
+        return sum(x.itemsize * len(x) for x in (self._kind, self._a, self._b, self._c, self._operands))
+
+    def clear(self) -> None:
+        """Remove all expressions, the IDs are assigned from 0 again"""
+        self.__init__()
+
+    def __len__(self) -> int:
+        return len(self._kind)
+
+    def _append(self, kind: int, a: int, b: int = 0, c: int = 0) -> int:
+        id_ = len(self._kind)
+        self._kind.append(kind)
+        self._a.append(a)
+        self._b.append(b)
+        self._c.append(c)
+        return id_
+
+    def _new(self, kind: int, a: int, b: int = 0, c: int = 0) -> int:
+        # the parts are 32 bit, see the arrays
+        key = kind | a << 8 | b << 40 | c << 72
+        id_ = self._ids.get(key)
+        if id_ is None:
+            id_ = self._ids[key] = self._append(kind, a, b, c)
+        return id_
+
+    def _nary(self, kind: int, operands: Iterable[OWLClassExpression]) -> int:
+        ids = array('i', map(self._add, operands))
+        key = bytes((kind,)) + ids.tobytes()
+        id_ = self._ids.get(key)
+        if id_ is None:
+            offset = len(self._operands)
+            self._operands.extend(ids)
+            id_ = self._ids[key] = self._append(kind, offset, len(ids))
+        return id_
+
+    @singledispatchmethod
+    def _add(self, o: OWLObject) -> int:
+        id_ = self._leaf_ids.get(o)
+        if id_ is None:
+            id_ = self._leaf_ids[o] = self._append(_EXPR_LEAF, len(self._leaves))
+            self._leaves.append(o)
+        return id_
+
+    @_add.register
+    def _(self, ce: OWLObjectIntersectionOf) -> int:
+        return self._nary(_EXPR_INTERSECTION, ce.operands())
+
+    @_add.register
+    def _(self, ce: OWLObjectUnionOf) -> int:
+        return self._nary(_EXPR_UNION, ce.operands())
+
+    @_add.register
+    def _(self, ce: OWLObjectComplementOf) -> int:
+        a = self._add(ce.get_operand())
+        return self._new(_EXPR_COMPLEMENT, a)
+
+    @_add.register
+    def _(self, ce: OWLObjectSomeValuesFrom) -> int:
+        a, b = self._add(ce.get_property()), self._add(ce.get_filler())
+        return self._new(_EXPR_SOME_VALUES, a, b)
+
+    @_add.register
+    def _(self, ce: OWLObjectAllValuesFrom) -> int:
+        a, b = self._add(ce.get_property()), self._add(ce.get_filler())
+        return self._new(_EXPR_ALL_VALUES, a, b)
+
+    @_add.register
+    def _(self, ce: OWLObjectHasValue) -> int:
+        a, b = self._add(ce.get_property()), self._add(ce.get_filler())
+        return self._new(_EXPR_HAS_VALUE, a, b)
+
+    @_add.register
+    def _(self, ce: OWLObjectCardinalityRestriction) -> int:
+        kind = next(k for k, t in _CARDINALITY_TYPES.items() if isinstance(ce, t))
+        a, b, c = self._add(ce.get_property()), self._add(ce.get_filler()), ce.get_cardinality()
+        return self._new(kind, a, b, c)
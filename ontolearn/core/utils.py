@@ -1,6 +1,9 @@
-from typing import Iterable
+import sys
+from typing import Iterable, Optional, Union, Dict, Callable, Any
 
-from owlapy.util import iter_bits, popcount
+import numpy as np
+
+from owlapy.util import iter_bits, popcount, bits_to_indices
 
 
 class BitSet:
@@ -62,7 +65,7 @@ class BitSet:
 
     def __contains__(self, y) -> bool:
         """ x.__contains__(y) <==> y in x. """
-        if isinstance(y, BitSet):
+        if isinstance(y, (BitSet, NumpyBitSet, RoaringBitSet)):
             return self.issuperset(y)
         elif self.v & y:
             return True
@@ -92,6 +95,10 @@ class BitSet:
         """ Implement iter(self). """
         yield from iter_bits(self.v)
 
+    def indices(self) -> np.ndarray:
+        """Positions of the set bits as index array"""
+        return bits_to_indices(self.v)
+
     def __len__(self):
         """ Return len(self). """
         return popcount(self.v)
@@ -142,3 +149,577 @@ class BitSet:
 
     def __hash__(self):
         return self.v
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.v)
+
+
+_WORD_BITS = 64
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount_words(w: np.ndarray) -> int:
+        return int(np.bitwise_count(w).sum())
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount_words(w: np.ndarray) -> int:
+        return int(_POPCOUNT_TABLE[w.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _int_to_words(v: int, n_words: int = 0) -> np.ndarray:
+    """Little-endian uint64 word array of the bits of a number, at least n_words long"""
+    n_words = max(n_words, _words_for(v.bit_length()))
+    return np.frombuffer(v.to_bytes(n_words * 8, 'little'), dtype=np.uint64)
+
+
+def _words_for(size: int) -> int:
+    return (size + _WORD_BITS - 1) // _WORD_BITS
+
+
+class NumpyBitSet:
+    """BitSet backed by an array of uint64 words
+
+    Same interface as BitSet, but all set operations and the population count are vectorized over the word array,
+    so their cost grows with the number of individuals instead of requiring arbitrary precision integer arithmetic
+    and string allocation. All sets that are combined should be created for the same number of individuals.
+    """
+    __slots__ = 'w', 'size'
+
+    w: np.ndarray
+    size: int
+
+    def __init__(self, v: Union[int, np.ndarray] = 0, size: Optional[int] = None):
+        """
+        NumpyBitSet() -> new empty NumpyBitSet object
+        NumpyBitSet(value, size) -> new NumpyBitSet object with bits in value (an integer or a uint64 word array)
+
+        Args:
+            v: bits as integer or as little-endian uint64 word array
+            size: number of representable elements (individuals). defaults to the highest bit in value
+        """
+        if isinstance(v, np.ndarray):
+            if size is None:
+                size = len(v) * _WORD_BITS
+            w = np.zeros(_words_for(size), dtype=np.uint64)
+            n = min(len(w), len(v))
+            w[:n] = v[:n]
+        else:
+            if size is None:
+                size = v.bit_length()
+            n_words = max(_words_for(size), _words_for(v.bit_length()))
+            w = np.frombuffer(v.to_bytes(n_words * 8, 'little'), dtype=np.uint64).copy()
+        self.w = w
+        self.size = size
+
+    @classmethod
+    def _from_words(cls, w: np.ndarray, size: int) -> 'NumpyBitSet':
+        r = object.__new__(cls)
+        r.w = w
+        r.size = size
+        return r
+
+    def _words_of(self, b: Union['NumpyBitSet', BitSet]) -> np.ndarray:
+        """Word array of b, zero padded or cut to the length of this set"""
+        if isinstance(b, NumpyBitSet):
+            w = b.w
+        elif isinstance(b, RoaringBitSet):
+            w = b.words(len(self.w))
+        else:
+            w = _int_to_words(b.v, len(self.w))
+        if len(w) == len(self.w):
+            return w
+        r = np.zeros(len(self.w), dtype=np.uint64)
+        n = min(len(w), len(r))
+        r[:n] = w[:n]
+        return r
+
+    @property
+    def v(self) -> int:
+        """The bits of this set as integer, compatible with BitSet.v"""
+        return int.from_bytes(self.w.tobytes(), 'little')
+
+    def difference(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """
+        Return the difference of two sets as a new set.
+
+        (i.e. all elements that are in this set but not the others.)
+        """
+        return NumpyBitSet._from_words(self.w & ~self._words_of(b), self.size)
+
+    def intersection(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """
+        Return the intersection of two sets as a new set.
+
+        (i.e. all elements that are in both sets.)
+        """
+        return NumpyBitSet._from_words(self.w & self._words_of(b), self.size)
+
+    def isdisjoint(self, b: 'NumpyBitSet') -> bool:
+        """ Return True if two sets have a null intersection. """
+        return not np.any(self.w & self._words_of(b))
+
+    def issubset(self, b: 'NumpyBitSet') -> bool:
+        """ Report whether another set contains this set. """
+        return not np.any(self.w & ~self._words_of(b))
+
+    def issuperset(self, b: 'NumpyBitSet') -> bool:
+        """ Report whether this set contains another set. """
+        return not np.any(self._words_of(b) & ~self.w)
+
+    def symmetric_difference(self, b: 'NumpyBitSet'):
+        """
+        Return the symmetric difference of two sets as a new set.
+
+        (i.e. all elements that are in exactly one of the sets.)
+        """
+        return NumpyBitSet._from_words(self.w ^ self._words_of(b), self.size)
+
+    def union(self, b: 'NumpyBitSet'):
+        """
+        Return the union of two sets as a new set.
+
+        (i.e. all elements that are in either set.)
+        """
+        return NumpyBitSet._from_words(self.w | self._words_of(b), self.size)
+
+    def __and__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return self&value. """
+        return self.intersection(b)
+
+    def __contains__(self, y) -> bool:
+        """ x.__contains__(y) <==> y in x. """
+        if isinstance(y, (NumpyBitSet, BitSet)):
+            return self.issuperset(y)
+        elif y and not y & (y - 1):
+            idx = y.bit_length() - 1
+            word = idx // _WORD_BITS
+            return word < len(self.w) and bool(int(self.w[word]) >> (idx % _WORD_BITS) & 1)
+        else:
+            return bool(np.any(self.w & NumpyBitSet(y, self.size).w[:len(self.w)]))
+
+    def __eq__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self==value. """
+        return bool(np.array_equal(self.w, self._words_of(b)))
+
+    def __ge__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self>=value. """
+        return self.issuperset(b)
+
+    def __gt__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self>value. """
+        return self != b and self.issuperset(b)
+
+    def __iter__(self) -> Iterable[int]:
+        """ Implement iter(self). """
+        for i in self.indices():
+            yield 1 << int(i)
+
+    def indices(self) -> np.ndarray:
+        """Positions of the set bits as index array"""
+        return np.flatnonzero(np.unpackbits(self.w.view(np.uint8), bitorder='little'))
+
+    def __len__(self):
+        """ Return len(self). """
+        return _popcount_words(self.w)
+
+    def __le__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self<=value. """
+        return self.issubset(b)
+
+    def __lt__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self<value. """
+        return self != b and self.issubset(b)
+
+    def __ne__(self, b: 'NumpyBitSet') -> bool:
+        """ Return self!=value. """
+        return not self == b
+
+    def __or__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return self|value. """
+        return self.union(b)
+
+    def __rand__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return value&self. """
+        return self.intersection(b)
+
+    def __repr__(self) -> str:
+        """ Return repr(self). """
+        return f'NumpyBitSet({bin(self.v)}, size={self.size})'
+
+    def __ror__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return value|self. """
+        return self.union(b)
+
+    def __rsub__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return value-self. """
+        return NumpyBitSet._from_words(self._words_of(b) & ~self.w, self.size)
+
+    def __rxor__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return value^self. """
+        return self.symmetric_difference(b)
+
+    def __sub__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return self-value. """
+        return self.difference(b)
+
+    def __xor__(self, b: 'NumpyBitSet') -> 'NumpyBitSet':
+        """ Return self^value. """
+        return self.symmetric_difference(b)
+
+    def __hash__(self):
+        # equal to the hash of a BitSet with the same members, as the sets compare equal
+        return hash(self.v)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.w.nbytes
+
+
+_CHUNK_BITS = 16
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+_CHUNK_WORDS = (1 << _CHUNK_BITS) // _WORD_BITS
+_ARRAY_MAX = 4096  # chunks with more members are stored as bitmap, which is smaller from then on
+
+
+def _array_to_bitmap(a: np.ndarray) -> np.ndarray:
+    mask = np.zeros(1 << _CHUNK_BITS, dtype=np.bool_)
+    mask[a] = True
+    return np.packbits(mask, bitorder='little').view(np.uint64)
+
+
+def _bitmap_to_array(w: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(np.unpackbits(w.view(np.uint8), bitorder='little')).astype(np.uint16)
+
+
+def _container(low: np.ndarray) -> np.ndarray:
+    """Container of the sorted low bits of the members of one chunk"""
+    if len(low) > _ARRAY_MAX:
+        return _array_to_bitmap(low)
+    return low.astype(np.uint16)
+
+
+def _normalized(w: np.ndarray) -> Optional[np.ndarray]:
+    """Smallest container for a bitmap, None if it is empty"""
+    n = _popcount_words(w)
+    if n == 0:
+        return None
+    if n <= _ARRAY_MAX:
+        return _bitmap_to_array(w)
+    return w
+
+
+def _words_to_containers(w: np.ndarray, keys: Optional[Iterable[int]] = None) -> Dict[int, np.ndarray]:
+    """Containers of the non-empty chunks of a word array, only of the chunks in keys if given"""
+    if keys is None:
+        keys = range(-(-len(w) // _CHUNK_WORDS))
+    c = dict()
+    for k in keys:
+        chunk = w[k * _CHUNK_WORDS:(k + 1) * _CHUNK_WORDS]
+        if not len(chunk):
+            continue
+        # copied, so that the container does not keep the words of the whole set alive
+        bitmap = np.zeros(_CHUNK_WORDS, dtype=np.uint64)
+        bitmap[:len(chunk)] = chunk
+        r = _normalized(bitmap)
+        if r is not None:
+            c[k] = r
+    return c
+
+
+def _is_array(c: np.ndarray) -> bool:
+    return c.dtype == np.uint16
+
+
+class RoaringBitSet:
+    """Compressed BitSet, in the manner of Roaring bitmaps
+
+    Same interface as BitSet. The positions are split into chunks of 2^16 by their high bits and only the non-empty
+    chunks are stored: as sorted array of the low bits while a chunk has at most 4096 members, as bitmap of 1024
+    uint64 words otherwise. The memory of a set therefore grows with its number of members instead of its highest
+    member, which suits sparse sets over many individuals.
+    """
+    __slots__ = 'c', 'size'
+
+    c: Dict[int, np.ndarray]  # chunk => uint16 array or uint64 bitmap of the low bits
+    size: int
+
+    def __init__(self, v: Union[int, np.ndarray] = 0, size: Optional[int] = None):
+        """
+        RoaringBitSet() -> new empty RoaringBitSet object
+        RoaringBitSet(value, size) -> new RoaringBitSet object with bits in value (an integer or an array of positions)
+
+        Args:
+            v: bits as integer or sorted array of the positions of the set bits
+            size: number of representable elements (individuals). defaults to the highest bit in value
+        """
+        if isinstance(v, np.ndarray):
+            indices = np.asarray(v, dtype=np.int64)
+            if size is None:
+                size = int(indices[-1]) + 1 if len(indices) else 0
+            self.c = RoaringBitSet._containers(indices)
+        else:
+            if size is None:
+                size = v.bit_length()
+            self.c = _words_to_containers(_int_to_words(v))
+        self.size = size
+
+    @staticmethod
+    def _containers(indices: np.ndarray) -> Dict[int, np.ndarray]:
+        keys, starts = np.unique(indices >> _CHUNK_BITS, return_index=True)
+        ends = np.append(starts[1:], len(indices))
+        low = indices & _CHUNK_MASK
+        return {int(k): _container(low[s:e]) for k, s, e in zip(keys, starts, ends)}
+
+    @classmethod
+    def _from_containers(cls, c: Dict[int, np.ndarray], size: int) -> 'RoaringBitSet':
+        r = object.__new__(cls)
+        r.c = c
+        r.size = size
+        return r
+
+    @staticmethod
+    def _containers_of(b, keys: Optional[Iterable[int]] = None) -> Dict[int, np.ndarray]:
+        """Containers of a set in any representation
+
+        A dense set is split along its words, only into the chunks in keys if given."""
+        if isinstance(b, RoaringBitSet):
+            return b.c
+        elif isinstance(b, NumpyBitSet):
+            return _words_to_containers(b.w, keys)
+        elif isinstance(b, int):
+            return _words_to_containers(_int_to_words(b), keys)
+        else:
+            return _words_to_containers(_int_to_words(b.v), keys)
+
+    @staticmethod
+    def _combine(x: np.ndarray, y: np.ndarray, op: str) -> Optional[np.ndarray]:
+        """Combine two containers of the same chunk, None if the result is empty"""
+        if _is_array(x) and _is_array(y):
+            if op == 'and':
+                r = np.intersect1d(x, y, assume_unique=True)
+            elif op == 'or':
+                r = np.union1d(x, y)
+            elif op == 'xor':
+                r = np.setxor1d(x, y, assume_unique=True)
+            else:
+                r = np.setdiff1d(x, y, assume_unique=True)
+            return _container(r) if len(r) else None
+        wx = _array_to_bitmap(x) if _is_array(x) else x
+        wy = _array_to_bitmap(y) if _is_array(y) else y
+        if op == 'and':
+            w = wx & wy
+        elif op == 'or':
+            w = wx | wy
+        elif op == 'xor':
+            w = wx ^ wy
+        else:
+            w = wx & ~wy
+        return _normalized(w)
+
+    def _op(self, b, op: str) -> 'RoaringBitSet':
+        # the result of an intersection or difference only has chunks of this set
+        bc = RoaringBitSet._containers_of(b, self.c.keys() if op in ('and', 'sub') else None)
+        c = dict()
+        if op == 'and':
+            keys = self.c.keys() & bc.keys()
+        elif op == 'sub':
+            keys = self.c.keys()
+        else:
+            keys = self.c.keys() | bc.keys()
+        for k in sorted(keys):
+            x, y = self.c.get(k), bc.get(k)
+            r = x if y is None else y if x is None else RoaringBitSet._combine(x, y, op)
+            if r is not None:
+                c[k] = r
+        return RoaringBitSet._from_containers(c, max(self.size, getattr(b, 'size', 0)))
+
+    @property
+    def v(self) -> int:
+        """The bits of this set as integer, compatible with BitSet.v"""
+        return int.from_bytes(self.words().tobytes(), 'little')
+
+    def words(self, n_words: int = 0) -> np.ndarray:
+        """The bits of this set as little-endian uint64 word array, at least n_words long"""
+        if self.c:
+            n_words = max(n_words, (max(self.c) + 1) * _CHUNK_WORDS)
+        w = np.zeros(n_words, dtype=np.uint64)
+        for k, c in self.c.items():
+            if _is_array(c):
+                pos = c.astype(np.int64) + (k << _CHUNK_BITS)
+                bits = np.left_shift(np.uint64(1), (pos % _WORD_BITS).astype(np.uint64))
+                np.bitwise_or.at(w, pos // _WORD_BITS, bits)
+            else:
+                w[k * _CHUNK_WORDS:(k + 1) * _CHUNK_WORDS] = c
+        return w
+
+    def indices(self) -> np.ndarray:
+        """Positions of the set bits as index array"""
+        parts = [(k << _CHUNK_BITS) + (c.astype(np.int64) if _is_array(c) else _bitmap_to_array(c).astype(np.int64))
+                 for k, c in sorted(self.c.items())]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def difference(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """
+        Return the difference of two sets as a new set.
+
+        (i.e. all elements that are in this set but not the others.)
+        """
+        return self._op(b, 'sub')
+
+    def intersection(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """
+        Return the intersection of two sets as a new set.
+
+        (i.e. all elements that are in both sets.)
+        """
+        return self._op(b, 'and')
+
+    def isdisjoint(self, b: 'RoaringBitSet') -> bool:
+        """ Return True if two sets have a null intersection. """
+        return not self._op(b, 'and').c
+
+    def issubset(self, b: 'RoaringBitSet') -> bool:
+        """ Report whether another set contains this set. """
+        return not self._op(b, 'sub').c
+
+    def issuperset(self, b: 'RoaringBitSet') -> bool:
+        """ Report whether this set contains another set. """
+        return not RoaringBitSet._from_containers(RoaringBitSet._containers_of(b), self.size)._op(self, 'sub').c
+
+    def symmetric_difference(self, b: 'RoaringBitSet'):
+        """
+        Return the symmetric difference of two sets as a new set.
+
+        (i.e. all elements that are in exactly one of the sets.)
+        """
+        return self._op(b, 'xor')
+
+    def union(self, b: 'RoaringBitSet'):
+        """
+        Return the union of two sets as a new set.
+
+        (i.e. all elements that are in either set.)
+        """
+        return self._op(b, 'or')
+
+    def __and__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return self&value. """
+        return self.intersection(b)
+
+    def __contains__(self, y) -> bool:
+        """ x.__contains__(y) <==> y in x. """
+        if isinstance(y, (RoaringBitSet, NumpyBitSet, BitSet)):
+            return self.issuperset(y)
+        elif y and not y & (y - 1):
+            idx = y.bit_length() - 1
+            c = self.c.get(idx >> _CHUNK_BITS)
+            if c is None:
+                return False
+            low = idx & _CHUNK_MASK
+            if _is_array(c):
+                pos = np.searchsorted(c, low)
+                return pos < len(c) and int(c[pos]) == low
+            return bool(int(c[low // _WORD_BITS]) >> (low % _WORD_BITS) & 1)
+        else:
+            return not self.isdisjoint(y)
+
+    def __eq__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self==value. """
+        bc = RoaringBitSet._containers_of(b)
+        # the containers are normalized, so equal sets have equal containers
+        return self.c.keys() == bc.keys() and all(np.array_equal(c, bc[k]) for k, c in self.c.items())
+
+    def __ge__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self>=value. """
+        return self.issuperset(b)
+
+    def __gt__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self>value. """
+        return self != b and self.issuperset(b)
+
+    def __iter__(self) -> Iterable[int]:
+        """ Implement iter(self). """
+        for i in self.indices():
+            yield 1 << int(i)
+
+    def __len__(self):
+        """ Return len(self). """
+        return sum(len(c) if _is_array(c) else _popcount_words(c) for c in self.c.values())
+
+    def __le__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self<=value. """
+        return self.issubset(b)
+
+    def __lt__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self<value. """
+        return self != b and self.issubset(b)
+
+    def __ne__(self, b: 'RoaringBitSet') -> bool:
+        """ Return self!=value. """
+        return not self == b
+
+    def __or__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return self|value. """
+        return self.union(b)
+
+    def __rand__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return value&self. """
+        return self.intersection(b)
+
+    def __repr__(self) -> str:
+        """ Return repr(self). """
+        return f'RoaringBitSet({len(self)} of {self.size}, chunks={len(self.c)})'
+
+    def __ror__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return value|self. """
+        return self.union(b)
+
+    def __rsub__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return value-self. """
+        return RoaringBitSet._from_containers(RoaringBitSet._containers_of(b), self.size)._op(self, 'sub')
+
+    def __rxor__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return value^self. """
+        return self.symmetric_difference(b)
+
+    def __sub__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return self-value. """
+        return self.difference(b)
+
+    def __xor__(self, b: 'RoaringBitSet') -> 'RoaringBitSet':
+        """ Return self^value. """
+        return self.symmetric_difference(b)
+
+    def __hash__(self):
+        # equal to the hash of a BitSet with the same members, as the sets compare equal
+        return hash(self.v)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self.c) + sum(c.nbytes for c in self.c.values())
+
+
+class DensityBitSetFactory:
+    """Bitset factory for KnowledgeBase that picks the representation of each set by its density
+
+    Sets with fewer members than the given fraction of all individuals are compressed as RoaringBitSet, the others
+    use the dense factory. The different representations can be combined with each other.
+    """
+    __slots__ = 'dense', 'threshold'
+
+    dense: Callable[[int, int], Any]
+    threshold: float
+
+    def __init__(self, dense: Optional[Callable[[int, int], Any]] = None, threshold: float = 1 / 32):
+        """
+        Args:
+            dense: factory for the dense sets, taking the encoded set and the number of individuals. defaults to
+                BitSet
+            threshold: fraction of the individuals below which a set is compressed. a compressed member takes about
+                two bytes, against one bit per individual in a dense set
+        """
+        self.dense = dense if dense is not None else (lambda v, size: BitSet(v))
+        self.threshold = threshold
+
+    def __call__(self, v: int, size: int):
+        if popcount(v) < self.threshold * size:
+            return RoaringBitSet(v, size)
+        return self.dense(v, size)
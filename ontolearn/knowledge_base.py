@@ -1,14 +1,18 @@
 import logging
-from typing import Dict, Iterable, Optional, Callable, overload, Union
+import operator
+from functools import reduce
+from typing import Iterable, Optional, Callable, overload, Union, Any, Dict, List
+
+import numpy as np
 
 from .abstracts import AbstractKnowledgeBase
 from .concept_generator import ConceptGenerator
 from .core.owl.utils import OWLClassExpressionLengthMetric
 from .core.utils import BitSet
 from owlapy.model import OWLOntologyManager, OWLOntology, OWLReasoner, OWLClassExpression, OWLNamedIndividual, \
-    OWLObjectProperty, OWLClass, OWLDataProperty, IRI
+    OWLObjectProperty, OWLClass, OWLDataProperty, IRI, OWLObjectIntersectionOf, OWLObjectUnionOf
 from owlapy.render import DLSyntaxObjectRenderer
-from owlapy.util import NamedFixedSet, popcount, iter_count
+from owlapy.util import NamedFixedSet, BoundedCache, iter_count
 
 Factory = Callable
 
@@ -37,6 +41,10 @@ def _Default_ClassExpressionLengthMetricFactory() -> OWLClassExpressionLengthMet
     return OWLClassExpressionLengthMetric.get_default()
 
 
+def _Default_BitSetFactory(v: int, size: int) -> BitSet:
+    return BitSet(v)
+
+
 class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
     """Knowledge Base Class representing Tbox and Abox along with concept hierarchies
 
@@ -48,9 +56,15 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
         reasoner: reasoner over the ontology
         length_metric_factory: see `length_metric`
         length_metric: length metric that is used in calculation of class expresion lengths
+        bitset_factory: factory that wraps an encoded set of individuals (and the total number of individuals) into a
+            set object, e.g. `BitSet` (default), `NumpyBitSet` or `DensityBitSetFactory()`, which compresses sparse
+            sets. The individuals cache keeps these set objects, charged by their `__sizeof__`
+        use_individuals_cache: whether to cache the individuals of class expressions
+        individuals_cache_max_bytes: memory budget of the individuals cache, None for no limit. Least recently used
+            complex class expressions are evicted first, named classes last
     """
     __slots__ = '_manager', '_ontology', '_reasoner', '_length_metric', \
-                '_ind_enc', '_ind_cache', 'path', 'use_individuals_cache'
+                '_ind_enc', '_ind_cache', '_bitset_factory', 'path', 'use_individuals_cache'
 
     _manager: OWLOntologyManager
     _ontology: OWLOntology
@@ -59,7 +73,8 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
     _length_metric: OWLClassExpressionLengthMetric
 
     _ind_enc: NamedFixedSet[OWLNamedIndividual]
-    _ind_cache: Dict[OWLClassExpression, int]  # class expression => individuals
+    _ind_cache: BoundedCache[OWLClassExpression, Any]  # class expression => individuals set of _bitset_factory
+    _bitset_factory: Factory[[int, int], Any]
 
     path: str
     use_individuals_cache: bool
@@ -71,7 +86,9 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
                  reasoner_factory: Factory[[OWLOntology], OWLReasoner] = _Default_ReasonerFactory,
                  length_metric: Optional[OWLClassExpressionLengthMetric] = None,
                  length_metric_factory: Optional[Factory[[], OWLClassExpressionLengthMetric]] = None,
-                 use_individuals_cache: bool = True):
+                 bitset_factory: Optional[Factory[[int, int], Any]] = None,
+                 use_individuals_cache: bool = True,
+                 individuals_cache_max_bytes: Optional[int] = None):
         ...
 
     @overload
@@ -80,7 +97,9 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
                  reasoner: OWLReasoner,
                  length_metric: Optional[OWLClassExpressionLengthMetric] = None,
                  length_metric_factory: Optional[Factory[[], OWLClassExpressionLengthMetric]] = None,
-                 use_individuals_cache: bool = True):
+                 bitset_factory: Optional[Factory[[int, int], Any]] = None,
+                 use_individuals_cache: bool = True,
+                 individuals_cache_max_bytes: Optional[int] = None):
         ...
 
     def __init__(self, *,
@@ -94,7 +113,9 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
                  reasoner: Optional[OWLReasoner] = None,
                  length_metric: Optional[OWLClassExpressionLengthMetric] = None,
 
-                 use_individuals_cache: bool = True):
+                 bitset_factory: Optional[Factory[[int, int], Any]] = None,
+                 use_individuals_cache: bool = True,
+                 individuals_cache_max_bytes: Optional[int] = None):
         AbstractKnowledgeBase.__init__(self)
         self.path = path
         if ontology is not None:
@@ -126,18 +147,24 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
         else:
             self._length_metric = _Default_ClassExpressionLengthMetricFactory()
 
+        if bitset_factory is not None:
+            self._bitset_factory = bitset_factory
+        else:
+            self._bitset_factory = _Default_BitSetFactory
+
         ConceptGenerator.__init__(self, reasoner=self._reasoner)
 
         individuals = self._ontology.individuals_in_signature()
         from owlapy.fast_instance_checker import OWLReasoner_FastInstanceChecker
         if isinstance(self._reasoner, OWLReasoner_FastInstanceChecker):
-            self._ind_enc = self._reasoner._ind_enc  # performance hack
+            self._ind_enc = self._reasoner.individuals_encoding()
         else:
             self._ind_enc = NamedFixedSet(OWLNamedIndividual, individuals)
 
         self.use_individuals_cache = use_individuals_cache
         if use_individuals_cache:
-            self._ind_cache = dict()
+            self._ind_cache = BoundedCache(max_bytes=individuals_cache_max_bytes,
+                                           keep=lambda ce: isinstance(ce, OWLClass))
 
         self.describe()
 
@@ -178,6 +205,7 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
         new._reasoner = self._reasoner
         new._length_metric = self._length_metric
         new._ind_enc = self._ind_enc
+        new._bitset_factory = self._bitset_factory
         new.path = self.path
         new.use_individuals_cache = self.use_individuals_cache
 
@@ -234,32 +262,39 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
         """Clean all stored values if there is any.
         """
         ConceptGenerator.clean(self)
+        from owlapy.fast_instance_checker import OWLReasoner_FastInstanceChecker
+        if isinstance(self._reasoner, OWLReasoner_FastInstanceChecker):
+            # the reasoner uses a new encoding after a reset
+            self._ind_enc = self._reasoner.individuals_encoding()
         if self.use_individuals_cache:
             self._ind_cache.clear()
 
-    def _cache_individuals(self, ce: OWLClassExpression) -> None:
+    def _cache_individuals(self, ce: OWLClassExpression):
         if not self.use_individuals_cache:
             raise TypeError
-        if ce in self._ind_cache:
-            return
+        cached = self._ind_cache.get(ce)
+        if cached is not None:
+            return cached
         from owlapy.fast_instance_checker import OWLReasoner_FastInstanceChecker
         if isinstance(self._reasoner, OWLReasoner_FastInstanceChecker):
-            self._ind_cache[ce] = self._reasoner._find_instances(ce)  # performance hack
+            ind_enc = self._reasoner.encoded_instances(ce)
         else:
             temp = self._reasoner.instances(ce)
-            self._ind_cache[ce] = self._ind_enc(temp)
+            ind_enc = self._ind_enc(temp)
+        cached = self._bitset_factory(ind_enc, len(self._ind_enc))
+        self._ind_cache[ce] = cached
+        return cached
 
     def _maybe_cache_individuals(self, ce: OWLClassExpression) -> Iterable[OWLNamedIndividual]:
         if self.use_individuals_cache:
-            self._cache_individuals(ce)
-            yield from self._ind_enc(self._ind_cache[ce])
+            for idx in self._cache_individuals(ce).indices().tolist():
+                yield self._ind_enc.by_index(idx)
         else:
             yield from self._reasoner.instances(ce)
 
     def _maybe_cache_individuals_count(self, ce: OWLClassExpression) -> int:
         if self.use_individuals_cache:
-            self._cache_individuals(ce)
-            return popcount(self._ind_cache[ce])
+            return len(self._cache_individuals(ce))
         else:
             return iter_count(self._reasoner.instances(ce))
 
@@ -273,8 +308,7 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
             individuals belonging to the given class
         """
         if concept is None or concept.is_owl_thing():
-            for _, i in self._ind_enc.items():
-                yield i
+            yield from self._ind_enc.table()
         else:
             yield from self._maybe_cache_individuals(concept)
 
@@ -300,18 +334,123 @@ class KnowledgeBase(AbstractKnowledgeBase, ConceptGenerator):
     def individuals_set(self, arg: Union[Iterable[OWLNamedIndividual], OWLNamedIndividual, OWLClassExpression]):
         if isinstance(arg, OWLClassExpression):
             if self.use_individuals_cache:
-                self._cache_individuals(arg)
-                return BitSet(self._ind_cache[arg])
+                return self._cache_individuals(arg)
             else:
                 return self.individuals_set(self.individuals(arg))
         else:
             if self._ind_enc:
-                return BitSet(self._ind_enc(arg))
+                return self._bitset_factory(self._ind_enc(arg), len(self._ind_enc))
             else:
                 return frozenset(arg)
 
+    def intersection_individuals_set(self, concept: OWLClassExpression, operands: Iterable[OWLClassExpression]):
+        """Individuals of a concept that is equivalent to the intersection of the operands
+
+        The (cached) individuals of the operands are intersected, instead of evaluating the concept from its
+        expression tree. This is used to compute a refinement of an intersection from the operands it shares with its
+        parent.
+
+        Args:
+            concept: class expression of which to get the individuals
+            operands: class expressions whose intersection is equivalent to concept. The result is cached for the
+                concept, so it must really be equivalent: subsumption of a replaced operand is not enough
+
+        Returns:
+            individuals belonging to the given class
+        """
+        if not self.use_individuals_cache:
+            return self.individuals_set(concept)
+        cached = self._ind_cache.get(concept)
+        if cached is None:
+            cached = self._intersection(map(self._cache_individuals, operands))
+            self._ind_cache[concept] = cached
+        return cached
+
+    def individuals_set_batch(self, expressions: Iterable[OWLClassExpression]) -> List:
+        """Individuals of several class expressions at once
+
+        The expressions are evaluated as one DAG, in which every distinct subexpression is evaluated once:
+        intersections and unions from the individuals of their operands, all other expressions by the reasoner. The
+        results of the subexpressions are cached like those of individuals_set.
+
+        Args:
+            expressions: class expressions of which to get the individuals
+
+        Returns:
+            individuals belonging to each class expression, in input order
+        """
+        if not self.use_individuals_cache:
+            return [self.individuals_set(ce) for ce in expressions]
+        plan: Dict[OWLClassExpression, Any] = dict()
+        return [self._individuals_in_plan(ce, plan) for ce in expressions]
+
+    def _individuals_in_plan(self, ce: OWLClassExpression, plan: Dict[OWLClassExpression, Any]):
+        individuals = plan.get(ce)
+        if individuals is not None:
+            return individuals
+        individuals = self._ind_cache.get(ce)
+        if individuals is None:
+            if isinstance(ce, OWLObjectIntersectionOf):
+                individuals = self._intersection(self._individuals_in_plan(op, plan) for op in ce.operands())
+            elif isinstance(ce, OWLObjectUnionOf):
+                individuals = reduce(operator.or_, (self._individuals_in_plan(op, plan) for op in ce.operands()))
+            else:
+                individuals = self._cache_individuals(ce)
+            self._ind_cache[ce] = individuals
+        plan[ce] = individuals
+        return individuals
+
+    @staticmethod
+    def _intersection(sets: Iterable):
+        # starting from the smallest set keeps the representation of a sparse result compressed
+        return reduce(operator.and_, sorted(sets, key=len))
+
+    def individuals_membership(self, individuals: List[OWLNamedIndividual],
+                               concepts: Iterable[OWLClassExpression]) -> np.ndarray:
+        """Which individuals belong to which class expressions
+
+        The individuals are encoded into positions once, then the bits of each class expression are gathered at those
+        positions at once.
+
+        Args:
+            individuals: individuals to check, individuals that are not in the ontology belong to no concept
+            concepts: class expressions to check
+
+        Returns:
+            boolean matrix of \\|individuals\\| x \\|concepts\\|, True where the individual belongs to the concept
+        """
+        concepts = list(concepts)
+        size = len(self._ind_enc)
+        positions = np.fromiter((self._ind_enc.index(i) if i in self._ind_enc else -1 for i in individuals),
+                                dtype=np.intp, count=len(individuals))
+        known = positions >= 0
+        positions = positions[known]
+        if self.use_individuals_cache:
+            plan: Dict[OWLClassExpression, Any] = dict()
+            extensions = (self._individuals_in_plan(ce, plan).indices() for ce in concepts)
+        else:
+            extensions = (self._ind_enc.indices(self._reasoner.instances(ce)) for ce in concepts)
+        labels = np.zeros((len(individuals), len(concepts)), dtype=np.bool_)
+        mask = np.zeros(size, dtype=np.bool_)
+        for j, indices in enumerate(extensions):
+            mask[:] = False
+            mask[indices] = True
+            labels[known, j] = mask[positions]
+        return labels
+
+    def individuals_table(self) -> List[OWLNamedIndividual]:
+        """Individuals in the order of their positions in the individuals sets
+
+        The positions follow the order of the individuals in the ontology, so they are the same in every process
+        that loads it. Storing the table next to persisted individuals sets allows to decode them later.
+
+        Returns:
+            the individual of each bit position
+        """
+        return self._ind_enc.table()
+
     def all_individuals_set(self):
         if self._ind_enc:
-            return BitSet((1 << len(self._ind_enc)) - 1)
+            return self._bitset_factory((1 << len(self._ind_enc)) - 1, len(self._ind_enc))
         else:
             return frozenset(self._ontology.individuals_in_signature())
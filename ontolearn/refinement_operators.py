@@ -1,7 +1,7 @@
 import copy
 from itertools import chain, tee
 import random
-from typing import Set, Optional, Iterable, Dict, List, Type, Final, Generator
+from typing import Set, Optional, Iterable, Dict, List, Type, Final, Generator, Tuple
 
 from .abstracts import BaseRefinement
 from .knowledge_base import KnowledgeBase
@@ -420,6 +420,12 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
                                       current_domain: Optional[OWLClassExpression]):
         """
         """
+        for intersection, _ in self._refine_object_intersection_of_with_delta(ce, max_length, current_domain):
+            yield intersection
+
+    def _refine_object_intersection_of_with_delta(self, ce: OWLObjectIntersectionOf, max_length: int,
+                                                  current_domain: Optional[OWLClassExpression]) \
+            -> Iterable[Tuple[OWLClassExpression, Tuple[OWLClassExpression, ...]]]:
         assert isinstance(ce, OWLObjectIntersectionOf)
 
         child: OWLClassExpression
@@ -435,7 +441,7 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
                 if max_length >= self.len(ref_concept):
                     # if other_concept.instances.isdisjoint(ref_concept.instances):
                     #    continue
-                    yield intersection
+                    yield intersection, (*concept_left, ref_concept, *concept_right)
 
     def refine(self, ce: OWLClassExpression, max_length: int, current_domain: OWLClassExpression) \
             -> Iterable[OWLClassExpression]:
@@ -465,6 +471,29 @@ class ModifiedCELOERefinement(BaseRefinement[OENode]):
         else:
             raise ValueError
 
+    def refine_with_delta(self, ce: OWLClassExpression, max_length: int, current_domain: OWLClassExpression) \
+            -> Iterable[Tuple[OWLClassExpression, Optional[Tuple[OWLClassExpression, ...]]]]:
+        """Refine a given concept and describe how each refinement changed it
+
+        Refining an intersection replaces one operand C by a refinement D of C. The refinement is the intersection of
+        D with the other operands of ce, whose individuals are usually known already. Note that D is not necessarily
+        subsumed by C (e.g. ∃ r.D is refined to ∀ r.D), so the refinement is in general not equivalent to ce ⊓ D.
+
+        Args:
+            ce: concept to refine
+            max_length: refine up to this concept length
+            current_domain:
+
+        Returns:
+            pairs of refined concept and the operands whose intersection is equivalent to it, or None if the
+            refinement is not obtained this way
+        """
+        if isinstance(ce, OWLObjectIntersectionOf):
+            yield from self._refine_object_intersection_of_with_delta(ce, max_length, current_domain)
+        else:
+            for ref in self.refine(ce, max_length, current_domain):
+                yield ref, None
+
 
 class CustomRefinementOperator(BaseRefinement[Node]):
     def __init__(self, knowledge_base: KnowledgeBase = None, max_size_of_concept=1000, min_size_of_concept=1):
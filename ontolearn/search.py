@@ -3,12 +3,12 @@ from _weakref import ReferenceType
 from abc import abstractmethod, ABCMeta
 from functools import total_ordering
 from queue import PriorityQueue
-from typing import List, Optional, ClassVar, Final, Iterable, TypeVar, Generic, Set, Tuple, Dict
+from typing import List, Optional, ClassVar, Final, Iterable, TypeVar, Generic, Set, Tuple, Dict, Hashable, Callable
 
 from owlapy.io import OWLObjectRenderer
 from owlapy.model import OWLClassExpression
 from owlapy.render import DLSyntaxObjectRenderer
-from owlapy.util import as_index, OrderedOWLObject
+from owlapy.util import owl_object_sort_key
 from superprop import super_prop
 from .abstracts import AbstractNode, AbstractHeuristic, AbstractScorer, AbstractOEHeuristicNode, LBLSearchTree, \
     AbstractConceptNode, AbstractLearningProblem, EncodedLearningProblem, DRILLAbstractTree
@@ -363,7 +363,7 @@ class LengthOrderedNode(Generic[_N]):
         elif other.len < self.len:
             return False
         else:
-            return OrderedOWLObject(as_index(self.node.concept)) < OrderedOWLObject(as_index(other.node.concept))
+            return owl_object_sort_key(self.node.concept) < owl_object_sort_key(other.node.concept)
 
     def __eq__(self, other):
         return self.len == other.len and self.node == other.node
@@ -371,7 +371,7 @@ class LengthOrderedNode(Generic[_N]):
 
 @total_ordering
 class HeuristicOrderedNode(Generic[_N]):
-    """A comparator that orders the Nodes based on Heuristic, then OrderedOWLObject of the concept"""
+    """A comparator that orders the Nodes based on Heuristic, then the sort key of the concept"""
     __slots__ = 'node'
 
     node: Final[_N]
@@ -390,7 +390,7 @@ class HeuristicOrderedNode(Generic[_N]):
         elif self.node.heuristic > other.node.heuristic:
             return False
         else:
-            return OrderedOWLObject(as_index(self.node.concept)) < OrderedOWLObject(as_index(other.node.concept))
+            return owl_object_sort_key(self.node.concept) < owl_object_sort_key(other.node.concept)
 
     def __eq__(self: _N, other: _N):
         return self.node == other.node
@@ -421,7 +421,7 @@ class QualityOrderedNode:
             elif self.node.len < other.node.len:
                 return False
             else:
-                return OrderedOWLObject(as_index(self.node.concept)) < OrderedOWLObject(as_index(other.node.concept))
+                return owl_object_sort_key(self.node.concept) < owl_object_sort_key(other.node.concept)
 
     def __eq__(self, other):
         return self.node == other.node
@@ -605,6 +605,85 @@ class TreeNode(Generic[_N]):
             parent_tree_node.children.add(self)
 
 
+class ExtensionIndex(Generic[_N]):
+    """Index of search tree nodes by the extension of their concept
+
+    Refinements with the same extension as a known node, like Female ⊓ Mother and Mother, are semantically redundant:
+    they get the same quality and are refined again. The index maps every extension to the shortest nodes known with
+    it, and counts the nodes that were dropped or merged because of it. Only the hash of an extension is kept, so that
+    the index does not hold the individuals of every node outside of the cache budget of the knowledge base; nodes
+    with the same hash are told apart by computing the extension of their concept again.
+    """
+    __slots__ = '_nodes', '_extension', 'dropped', 'merged'
+
+    _nodes: Dict[int, List[List[_N]]]  # hash of an extension => groups of nodes, one per extension with that hash
+    _extension: Callable[[_N], Hashable]
+    dropped: int  # redundant nodes that were not evaluated
+    merged: int  # known nodes that were replaced by a shorter one
+
+    def __init__(self, extension: Callable[[_N], Hashable]):
+        """Create an empty index
+
+        Args:
+            extension: function that computes the extension of a node concept, e.g. from the knowledge base
+        """
+        self._nodes = dict()
+        self._extension = extension
+        self.dropped = 0
+        self.merged = 0
+
+    def _group(self, individuals: Hashable) -> Tuple[List[List[_N]], Optional[int]]:
+        groups = self._nodes.get(hash(individuals), [])
+        for i, nodes in enumerate(groups):
+            if self._extension(nodes[0]) == individuals:
+                return groups, i
+        return groups, None
+
+    def get(self, individuals: Hashable) -> List[_N]:
+        """Get the nodes known with an extension
+
+        Args:
+            individuals: extension, e.g. a bitset
+
+        Returns:
+            the shortest nodes with this extension, all of the same length. empty if the extension is new
+        """
+        groups, i = self._group(individuals)
+        return [] if i is None else groups[i]
+
+    def add(self, individuals: Hashable, node: _N) -> List[_N]:
+        """Add a node that is not longer than the known nodes of its extension
+
+        Args:
+            individuals: extension of the node concept
+            node: node
+
+        Returns:
+            the known nodes that are longer than the node and were replaced by it
+        """
+        groups, i = self._group(individuals)
+        if i is None:
+            groups.append([node])
+            self._nodes[hash(individuals)] = groups
+            return []
+        nodes = groups[i]
+        assert node.len <= nodes[0].len
+        if node.len == nodes[0].len:
+            nodes.append(node)
+            return []
+        groups[i] = [node]
+        self.merged += len(nodes)
+        return nodes
+
+    def clear(self):
+        self._nodes.clear()
+        self.dropped = 0
+        self.merged = 0
+
+    def __len__(self):
+        return sum(map(len, self._nodes.values()))
+
+
 class DRILLSearchTreePriorityQueue(DRILLAbstractTree):
     """
 
@@ -1,57 +1,834 @@
+import hashlib
+import json
 import logging
+import mmap
 import operator
-from functools import singledispatchmethod, reduce
+import os
+import struct
+import sys
+import tempfile
+from functools import singledispatchmethod, reduce, wraps
 from logging import warning
-from types import MappingProxyType
-from typing import Iterable, Dict, Mapping
+from typing import Iterable, Dict, Callable, Union, Optional, List, Tuple, Set, FrozenSet, Final
+
+import numpy as np
 
 from owlapy.model import OWLReasoner, OWLOntology, OWLNamedIndividual, OWLClass, OWLClassExpression, \
     OWLObjectProperty, OWLDataProperty, OWLObjectUnionOf, OWLObjectIntersectionOf, OWLObjectSomeValuesFrom, \
-    OWLObjectPropertyExpression, OWLObjectComplementOf, OWLObjectAllValuesFrom, IRI, OWLObjectInverseOf
-from owlapy.util import NamedFixedSet
+    OWLObjectPropertyExpression, OWLObjectComplementOf, OWLObjectAllValuesFrom, IRI, OWLObjectInverseOf, \
+    OWLObjectCardinalityRestriction, OWLObjectMinCardinality, OWLObjectMaxCardinality, OWLObjectExactCardinality, \
+    OWLObjectHasValue, OWLObjectOneOf, OWLDataSomeValuesFrom, OWLDataHasValue, OWLDatatype, OWLDatatypeRestriction, \
+    OWLLiteral, OWLDataRange, OWLThing, OWLEntity, OWLNaryBooleanClassExpression, OWLRestriction, HasFiller, \
+    IntegerOWLDatatype, DoubleOWLDatatype, BooleanOWLDatatype, TopDatatype, OWLDataAllValuesFrom, OWLDataComplementOf
+from owlapy.vocab import OWLFacet
+from owlapy.util import NamedFixedSet, BoundedCache, bits_to_mask, mask_to_bits, popcount
 
 
 logger = logging.getLogger(__name__)
 
 
+class _Adjacency:
+    """Object property assertions in CSR form over individual positions
+
+    The objects of the subject at position i are indices[indptr[i]:indptr[i+1]], sorted and without duplicates.
+    rows holds the subject position of every entry in indices."""
+    __slots__ = 'indptr', 'indices', 'rows', 'size'
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    rows: np.ndarray
+    size: int
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, size: int):
+        """Create the adjacency from (subject position, object position) pairs
+
+        Args:
+            rows: subject positions
+            cols: object positions
+            size: number of individuals"""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        order = np.lexsort((cols, rows))
+        rows = rows[order]
+        cols = cols[order]
+        if len(rows) > 1:
+            keep = np.empty(len(rows), dtype=np.bool_)
+            keep[0] = True
+            np.not_equal(rows[1:], rows[:-1], out=keep[1:])
+            keep[1:] |= cols[1:] != cols[:-1]
+            rows = rows[keep]
+            cols = cols[keep]
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=self.indptr[1:])
+        self.indices = cols
+        self.rows = rows
+        self.size = size
+
+    @classmethod
+    def from_arrays(cls, indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray, size: int) -> '_Adjacency':
+        """Wrap existing CSR arrays without copying them"""
+        adjacency = cls.__new__(cls)
+        adjacency.indptr = indptr
+        adjacency.indices = indices
+        adjacency.rows = rows
+        adjacency.size = size
+        return adjacency
+
+    def resized(self, size: int) -> '_Adjacency':
+        """The same adjacency over more individuals, the new ones without edges"""
+        indptr = np.concatenate((self.indptr, np.full(size - self.size, self.indptr[-1], dtype=np.int64)))
+        return _Adjacency.from_arrays(indptr, self.indices, self.rows, size)
+
+    def transpose(self) -> '_Adjacency':
+        """Adjacency of the inverse property"""
+        return _Adjacency(self.indices, self.rows, self.size)
+
+    def row(self, i: int) -> np.ndarray:
+        """Object positions of the subject at position i"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def some_values(self, mask: np.ndarray) -> np.ndarray:
+        """Subjects with at least one object in mask
+
+        Args:
+            mask: boolean array over individual positions
+
+        Returns:
+            boolean array over individual positions
+        """
+        result = np.zeros(self.size, dtype=np.bool_)
+        result[self.rows[mask[self.indices]]] = True
+        return result
+
+    def some_values_transitive(self, mask: np.ndarray) -> np.ndarray:
+        """Subjects with a path of one or more edges to an individual in mask, by a breadth-first search that only
+        follows the newly reached individuals in every step
+
+        Args:
+            mask: boolean array over individual positions
+
+        Returns:
+            boolean array over individual positions
+        """
+        result = self.some_values(mask)
+        frontier = result
+        while frontier.any():
+            frontier = self.some_values(frontier)
+            frontier &= ~result
+            result |= frontier
+        return result
+
+    def count_values(self, mask: np.ndarray) -> np.ndarray:
+        """Number of objects in mask for every subject
+
+        Args:
+            mask: boolean array over individual positions
+
+        Returns:
+            integer array over individual positions
+        """
+        return np.bincount(self.rows[mask[self.indices]], minlength=self.size)
+
+
+class _DataColumn:
+    """Values of a data property sorted by value, with the individual position and the datatype code of every value
+
+    Booleans are stored as 0 and 1, the datatype codes tell them apart from numbers (see _INDEXED_DATATYPES)."""
+    __slots__ = 'values', 'positions', 'datatypes', 'size'
+
+    values: np.ndarray
+    positions: np.ndarray
+    datatypes: np.ndarray
+    size: int
+
+    def __init__(self, positions: np.ndarray, values: np.ndarray, datatypes: np.ndarray, size: int):
+        """Create the column from (individual position, value, datatype code) triples
+
+        Args:
+            positions: individual positions
+            values: numeric values
+            datatypes: datatype codes of the values
+            size: number of individuals"""
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        self.values = values[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+        self.datatypes = np.asarray(datatypes, dtype=np.int8)[order]
+        self.size = size
+
+    @classmethod
+    def from_arrays(cls, values: np.ndarray, positions: np.ndarray, datatypes: np.ndarray,
+                    size: int) -> '_DataColumn':
+        """Wrap existing sorted arrays without copying them"""
+        column = cls.__new__(cls)
+        column.values = values
+        column.positions = positions
+        column.datatypes = datatypes
+        column.size = size
+        return column
+
+    def range(self, low: float = -np.inf, low_inclusive: bool = True,
+              high: float = np.inf, high_inclusive: bool = True, datatype: Optional[int] = None,
+              complement: bool = False) -> np.ndarray:
+        """Individuals with at least one value inside the range, found by binary search
+
+        Args:
+            datatype: datatype code that the values must have, None for any datatype
+            complement: find the individuals with at least one value outside the range instead
+
+        Returns:
+            boolean array over individual positions
+        """
+        start = np.searchsorted(self.values, low, side='left' if low_inclusive else 'right')
+        end = np.searchsorted(self.values, high, side='right' if high_inclusive else 'left')
+        if complement:
+            outside = np.ones(len(self.values), dtype=np.bool_)
+            outside[start:end] = False if datatype is None else self.datatypes[start:end] != datatype
+            positions = self.positions[outside]
+        else:
+            positions = self.positions[start:end]
+            if datatype is not None:
+                positions = positions[self.datatypes[start:end] == datatype]
+        result = np.zeros(self.size, dtype=np.bool_)
+        result[positions] = True
+        return result
+
+
+# index entries of a property and its inverse take two int64 arrays each (indices, rows)
+_ADJACENCY_ENTRY_BYTES = 32
+
+
+def _component_reach(adjacency: _Adjacency, targets: Optional[int] = None, max_bytes: Optional[int] = None,
+                     entry_bytes: int = 0) -> Optional[Tuple[List[int], List[int]]]:
+    """Individuals reachable from every strongly connected component of an adjacency
+
+    The components are found with Tarjan's algorithm, which completes every component after all components reachable
+    from it. So the individuals reachable from a component are the union of the bitsets of its successor components
+    and their members, computed once per component.
+
+    Args:
+        adjacency: the asserted edges
+        targets: only keep these reachable individuals, None for all
+        max_bytes: memory budget of the reachable bitsets plus entry_bytes for every (individual, reachable
+            individual) pair, None for no limit
+        entry_bytes: bytes charged for every pair
+
+    Returns:
+        the component of every individual (-1 for individuals without edges that no search visited) and the
+        reachable individuals of every component, or None if they exceed max_bytes
+    """
+    n = adjacency.size
+    indptr = adjacency.indptr.tolist()
+    indices = adjacency.indices.tolist()
+    order = [-1] * n  # discovery index
+    low = [0] * n
+    on_stack = [False] * n
+    comp = [-1] * n
+    reach: List[int] = []  # component => reachable individuals
+    stack: List[int] = []
+    counter = 0
+    used = 0
+    for root in range(n):
+        if order[root] != -1 or indptr[root] == indptr[root + 1]:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, indptr[root])]
+        while work:
+            v, i = work[-1]
+            if i < indptr[v + 1]:
+                work[-1] = (v, i + 1)
+                w = indices[i]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, indptr[w]))
+                elif on_stack[w]:
+                    low[v] = min(low[v], order[w])
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] != order[v]:
+                continue
+            c = len(reach)
+            members = []
+            while True:
+                w = stack.pop()
+                on_stack[w] = False
+                comp[w] = c
+                members.append(w)
+                if w == v:
+                    break
+            r = 0
+            for m in members:
+                for j in range(indptr[m], indptr[m + 1]):
+                    w = indices[j]
+                    r |= 1 << w
+                    if comp[w] != c:
+                        r |= reach[comp[w]]
+            if targets is not None:
+                r &= targets
+            reach.append(r)
+            # a big int takes about one byte per eight individuals up to its highest member
+            used += sys.getsizeof(r) + popcount(r) * len(members) * entry_bytes
+            if max_bytes is not None and used > max_bytes:
+                return None
+    return comp, reach
+
+
+def _transitive_closure(adjacency: _Adjacency, max_bytes: Optional[int] = None) -> Optional[_Adjacency]:
+    """Transitive closure of an adjacency
+
+    Args:
+        adjacency: the asserted edges
+        max_bytes: memory budget of the computation and of the index of the closure, None for no limit
+
+    Returns:
+        adjacency of the closure, or None if it would exceed max_bytes
+    """
+    n = adjacency.size
+    result = _component_reach(adjacency, max_bytes=max_bytes, entry_bytes=_ADJACENCY_ENTRY_BYTES)
+    if result is None:
+        return None
+    comp, reach = result
+    cols_of = dict()  # component => reachable positions
+    rows = []
+    cols = []
+    for v in range(n):
+        c = comp[v]
+        if c == -1 or not reach[c]:
+            continue
+        if c not in cols_of:
+            cols_of[c] = np.flatnonzero(bits_to_mask(reach[c], n))
+        rows.append(np.full(len(cols_of[c]), v, dtype=np.int64))
+        cols.append(cols_of[c])
+    if not rows:
+        return _Adjacency(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), n)
+    return _Adjacency(np.concatenate(rows), np.concatenate(cols), n)
+
+
+def _transitive_count_values(adjacency: _Adjacency, mask: np.ndarray) -> np.ndarray:
+    """Number of individuals in mask that every individual reaches with a path of one or more edges
+
+    Args:
+        adjacency: the asserted edges
+        mask: boolean array over individual positions
+
+    Returns:
+        integer array over individual positions
+    """
+    comp, reach = _component_reach(adjacency, targets=mask_to_bits(mask))
+    counts = [popcount(r) for r in reach]
+    return np.array([counts[c] if c != -1 else 0 for c in comp], dtype=np.int64)
+
+
+def _mentioned_entities(ce: OWLClassExpression) -> Iterable[OWLEntity]:
+    """Classes and properties whose individuals the individuals of a class expression depend on
+
+    OWLThing stands for the set of all individuals, on which depends every expression that may hold an individual
+    without any assertion (e.g. complements)."""
+    if isinstance(ce, OWLClass):
+        yield ce
+    elif isinstance(ce, OWLNaryBooleanClassExpression):
+        for op in ce.operands():
+            yield from _mentioned_entities(op)
+    elif isinstance(ce, OWLObjectComplementOf):
+        yield OWLThing
+        yield from _mentioned_entities(ce.get_operand())
+    elif isinstance(ce, OWLRestriction):
+        p = ce.get_property()
+        yield p.get_named_property() if isinstance(p, OWLObjectInverseOf) else p
+        if isinstance(ce, (OWLObjectAllValuesFrom, OWLObjectMaxCardinality, OWLObjectExactCardinality)):
+            yield OWLThing
+        if isinstance(ce, HasFiller) and isinstance(ce.get_filler(), OWLClassExpression):
+            yield from _mentioned_entities(ce.get_filler())
+    else:
+        # e.g. nominals, which depend on the individuals that exist
+        yield OWLThing
+
+
+def _numeric_value(v: Union[OWLLiteral, int, float]) -> Union[int, float, None]:
+    """Number represented by a literal or Python value, or None if it is not numeric"""
+    if isinstance(v, OWLLiteral):
+        if v.is_integer():
+            return v.parse_integer()
+        if v.is_double():
+            return v.parse_double()
+        return None
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v
+    return None
+
+
+# datatypes of the values in the data property index, the position is the datatype code
+_INDEXED_DATATYPES: Final = (IntegerOWLDatatype, DoubleOWLDatatype, BooleanOWLDatatype)
+
+
+def _typed_value(v: Union[OWLLiteral, bool, int, float]) -> Optional[Tuple[float, int]]:
+    """Value and datatype code of a literal or Python value, or None if its datatype is not indexed"""
+    if isinstance(v, OWLLiteral):
+        if v.is_boolean():
+            return float(v.parse_boolean()), 2
+        if v.is_integer():
+            return v.parse_integer(), 0
+        if v.is_double():
+            return v.parse_double(), 1
+        return None
+    if isinstance(v, bool):
+        return float(v), 2
+    if isinstance(v, int):
+        return v, 0
+    if isinstance(v, float):
+        return v, 1
+    return None
+
+
+def _ontology_content_key(ontology: OWLOntology, base_reasoner: OWLReasoner) -> Optional[str]:
+    """Cheap key of the assertions that the index of the fast instance checker is computed from
+
+    Only available for Owlready2 ontologies. Instead of reading the quadstore, it covers the size of the source file
+    and the last update time of every ontology in the world (the modification time of the file when it was loaded,
+    which Owlready2 bumps on every change inside a "with ontology:" block), and the highest row ids of the assertion
+    tables and of the resources, which grow with every added assertion or IRI.
+
+    Returns:
+        hex digest, or None if the content of the ontology cannot be keyed
+    """
+    from owlapy.owlready2 import OWLOntology_Owlready2
+    if not isinstance(ontology, OWLOntology_Owlready2):
+        return None
+    graph = ontology._world.graph
+    parts = [f"{type(base_reasoner).__module__}.{type(base_reasoner).__qualname__}"]
+    aliases = dict(graph.execute("SELECT iri, alias FROM ontology_alias").fetchall())
+    for c, iri, last_update in graph.execute("SELECT c, iri, last_update FROM ontologies ORDER BY c").fetchall():
+        source = aliases.get(iri, iri)
+        size = None
+        if source.startswith('file://'):
+            try:
+                size = os.path.getsize(source[len('file://'):].rstrip('#/'))
+            except OSError:
+                pass
+        parts.append(repr((c, iri, source, size, last_update)))
+    for query in ("SELECT MAX(rowid) FROM objs", "SELECT MAX(rowid) FROM datas", "SELECT MAX(storid) FROM resources"):
+        parts.append(repr(graph.execute(query).fetchone()))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+class _IndexSnapshot:
+    """Encoded index of the fast instance checker in a versioned binary file, opened with mmap
+
+    The file starts with a magic number, the format version and the length of a JSON header. The header holds the
+    content key, the individual table, the names of the indexed entities and the location of every array. The arrays
+    follow, aligned to 64 bytes: packed class bitsets, the CSR arrays of every object property and its inverse and
+    the sorted columns of the data properties. Worker processes opening the same file share its pages."""
+    __slots__ = '_mm', '_offset', '_header', '_classes', '_object_properties', '_data_properties'
+
+    MAGIC: bytes = b'OWLFICIX'
+    VERSION: int = 4
+    _PREAMBLE = struct.Struct('<8sIQ')
+    _ALIGN: int = 64
+
+    _mm: mmap.mmap
+    _offset: int  # start of the arrays
+    _header: dict
+    _classes: Dict[str, int]
+    _object_properties: Dict[str, int]
+    _data_properties: Dict[str, int]
+
+    def __init__(self, mm: mmap.mmap, offset: int, header: dict):
+        self._mm = mm
+        self._offset = offset
+        self._header = header
+        self._classes = {iri: i for i, iri in enumerate(header['classes'])}
+        self._object_properties = {iri: i for i, iri in enumerate(header['object_properties'])}
+        self._data_properties = {iri: i for i, iri in enumerate(header['data_properties'])}
+
+    @classmethod
+    def open(cls, path: str, key: str) -> Optional['_IndexSnapshot']:
+        """Open a snapshot file
+
+        Args:
+            path: snapshot file
+            key: expected content key
+
+        Returns:
+            the snapshot, or None if the file is missing, has another format version or was made from other content
+        """
+        try:
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, header_len = cls._PREAMBLE.unpack_from(mm, 0)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                return None
+            start = cls._PREAMBLE.size
+            header = json.loads(mm[start:start + header_len].decode('utf-8'))
+        except (struct.error, ValueError):
+            return None
+        if header.get('key') != key:
+            return None
+        return cls(mm, cls._data_start(header_len), header)
+
+    @classmethod
+    def write(cls, path: str, key: str, individuals: List[str], classes: Dict[str, int],
+              object_properties: Dict[str, Tuple[_Adjacency, _Adjacency]], data_properties: Dict[str, _DataColumn],
+              on_demand: List[str]):
+        """Write a snapshot file atomically
+
+        Args:
+            path: snapshot file
+            key: content key
+            individuals: IRIs of the individuals, in encoding order
+            classes: class IRI => individuals
+            object_properties: object property IRI => adjacency of the property and of its inverse
+            data_properties: data property IRI => sorted column
+            on_demand: IRIs of the transitive object properties whose closure is searched on demand
+        """
+        size = len(individuals)
+        nbytes = (size + 7) // 8
+        arrays: List[Tuple[str, np.ndarray]] = []
+        cls_bits = np.zeros((len(classes), nbytes), dtype=np.uint8)
+        for i, v in enumerate(classes.values()):
+            cls_bits[i] = np.frombuffer(v.to_bytes(nbytes, 'little'), dtype=np.uint8)
+        arrays.append(('classes', cls_bits))
+        for i, (adjacency, inverse) in enumerate(object_properties.values()):
+            for prefix, a in (('op', adjacency), ('op_inv', inverse)):
+                arrays.append((f'{prefix}/{i}/indptr', a.indptr))
+                arrays.append((f'{prefix}/{i}/indices', a.indices))
+                arrays.append((f'{prefix}/{i}/rows', a.rows))
+        for i, column in enumerate(data_properties.values()):
+            arrays.append((f'dp/{i}/values', column.values))
+            arrays.append((f'dp/{i}/positions', column.positions))
+            arrays.append((f'dp/{i}/datatypes', column.datatypes))
+
+        layout = dict()
+        offset = 0
+        for name, a in arrays:
+            layout[name] = [offset, a.dtype.str, list(a.shape)]
+            offset += -(-a.nbytes // cls._ALIGN) * cls._ALIGN
+        header = json.dumps({'key': key,
+                             'individuals': individuals,
+                             'classes': list(classes),
+                             'object_properties': list(object_properties),
+                             'data_properties': list(data_properties),
+                             'on_demand': on_demand,
+                             'arrays': layout}).encode('utf-8')
+        data_start = cls._data_start(len(header))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(cls._PREAMBLE.pack(cls.MAGIC, cls.VERSION, len(header)))
+                f.write(header)
+                for name, a in arrays:
+                    f.seek(data_start + layout[name][0])
+                    f.write(np.ascontiguousarray(a).tobytes())
+                f.truncate(data_start + offset)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def _data_start(cls, header_len: int) -> int:
+        return -(-(cls._PREAMBLE.size + header_len) // cls._ALIGN) * cls._ALIGN
+
+    def _array(self, name: str) -> np.ndarray:
+        offset, dtype, shape = self._header['arrays'][name]
+        count = int(np.prod(shape))
+        a = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count, offset=self._offset + offset)
+        return a.reshape(shape)
+
+    @property
+    def size(self) -> int:
+        return len(self._header['individuals'])
+
+    def individuals(self) -> List[str]:
+        """IRIs of the individuals, in encoding order"""
+        return self._header['individuals']
+
+    def class_instances(self, iri: str) -> Optional[int]:
+        """Individuals of a class, or None if the class is not in the snapshot"""
+        i = self._classes.get(iri)
+        if i is None:
+            return None
+        return int.from_bytes(self._array('classes')[i].tobytes(), 'little')
+
+    def object_property(self, iri: str) -> Optional[Tuple[_Adjacency, _Adjacency]]:
+        """Adjacency of an object property and of its inverse, or None if the property is not in the snapshot"""
+        i = self._object_properties.get(iri)
+        if i is None:
+            return None
+        return tuple(_Adjacency.from_arrays(self._array(f'{prefix}/{i}/indptr'), self._array(f'{prefix}/{i}/indices'),
+                                            self._array(f'{prefix}/{i}/rows'), self.size)
+                     for prefix in ('op', 'op_inv'))
+
+    def is_on_demand(self, iri: str) -> bool:
+        """Whether the closure of a transitive object property is searched on demand"""
+        return iri in self._header['on_demand']
+
+    def data_property(self, iri: str) -> Optional[_DataColumn]:
+        """Sorted column of a data property, or None if the property is not in the snapshot"""
+        i = self._data_properties.get(iri)
+        if i is None:
+            return None
+        return _DataColumn.from_arrays(self._array(f'dp/{i}/values'), self._array(f'dp/{i}/positions'),
+                                       self._array(f'dp/{i}/datatypes'), self.size)
+
+
+def _memoized(f: Callable[['OWLReasoner_FastInstanceChecker', OWLClassExpression], int]):
+    """Look up the individuals of a class expression in the reasoner's expression cache before computing them"""
+    @wraps(f)
+    def wrapper(self: 'OWLReasoner_FastInstanceChecker', ce: OWLClassExpression) -> int:
+        cached = self._ce_cache.get(ce)
+        if cached is not None:
+            return cached
+        ind_enc = f(self, ce)
+        self._ce_cache[ce] = ind_enc
+        return ind_enc
+    return wrapper
+
+
 class OWLReasoner_FastInstanceChecker(OWLReasoner):
     """Tries to check instances fast (but maybe incomplete)"""
     __slots__ = '_ontology', '_base_reasoner', \
-                '_ind_enc', '_cls_to_ind', '_obj_prop', '_obj_prop_inv', '_objectsomevalues_cache', \
-                '_negation_default'
+                '_ind_enc', '_cls_to_ind', '_obj_prop', '_obj_prop_inv', '_obj_prop_asserted', '_data_prop', \
+                '_ce_cache', '_negation_default', '_cache_max_bytes', '_snapshot_path', '_snapshot', '_storid_to_idx', \
+                '_transitive_closure', '_transitive_max_bytes', '_obj_prop_on_demand', '_obj_prop_sub', \
+                '_obj_prop_log', '_obj_prop_pending', '_data_prop_log', '_data_prop_pending', '_changed', \
+                '_cls_enc', '_ind_types'
 
     _ontology: OWLOntology
     _base_reasoner: OWLReasoner
     _cls_to_ind: Dict[OWLClass, int]  # Class => individuals
-    _obj_prop: Dict[OWLObjectProperty, Mapping[int, int]]  # ObjectProperty => { individual => individuals }
-    _obj_prop_inv: Dict[OWLObjectProperty, Mapping[int, int]]  # ObjectProperty => { individual => individuals }
+    _obj_prop: Dict[OWLObjectProperty, _Adjacency]  # ObjectProperty => individual => individuals
+    _obj_prop_inv: Dict[OWLObjectProperty, _Adjacency]  # ObjectProperty => individual => individuals
+    # ObjectProperty => asserted (subject, object) positions, of sub-properties that are not indexed yet
+    _obj_prop_asserted: Dict[OWLObjectProperty, Tuple[np.ndarray, np.ndarray]]
+    _data_prop: Dict[OWLDataProperty, _DataColumn]  # DataProperty => sorted (value, individual)
     _ind_enc: NamedFixedSet[OWLNamedIndividual]
-    _objectsomevalues_cache: Dict[OWLClassExpression, int]  # ObjectSomeValuesFrom => individuals
+    _ce_cache: BoundedCache[OWLClassExpression, int]  # complex class expression => individuals
+    _snapshot_path: Optional[str]
+    _snapshot: Optional[_IndexSnapshot]
+    _storid_to_idx: Optional[np.ndarray]  # Owlready2 storid => individual position, -1 if not an individual
+    _obj_prop_on_demand: Set[OWLObjectProperty]  # transitive properties whose closure is searched on demand
+    _obj_prop_sub: Dict[OWLObjectProperty, FrozenSet[OWLObjectProperty]]  # ObjectProperty => sub-properties
+    # assertions added (True) or removed (False) with the update methods, on top of the ontology
+    _obj_prop_log: Dict[OWLObjectProperty, Dict[Tuple[int, int], bool]]  # => (subject, object) positions
+    # => (individual position, value, datatype code)
+    _data_prop_log: Dict[OWLDataProperty, Dict[Tuple[int, float, int], bool]]
+    # updates that are not merged into the index yet
+    _obj_prop_pending: Dict[OWLObjectProperty, List[Tuple[int, int]]]  # => added (subject, object) positions
+    _data_prop_pending: Dict[OWLDataProperty, Dict[Tuple[int, float, int], bool]]
+    _changed: Set[OWLEntity]  # entities whose individuals changed, to invalidate the expression cache
+    _cls_enc: Optional[NamedFixedSet[OWLClass]]  # classes of the types index
+    _ind_types: Optional[np.ndarray]  # individual => classes, bits packed along the rows
 
-    def __init__(self, ontology: OWLOntology, base_reasoner: OWLReasoner, *, negation_default=False):
+    def __init__(self, ontology: OWLOntology, base_reasoner: OWLReasoner, *, negation_default=False,
+                 cache_max_bytes: Optional[int] = None, index_snapshot: Optional[str] = None,
+                 transitive_closure: bool = False, transitive_closure_max_bytes: Optional[int] = None):
         """Fast instance checker
 
         Args:
             ontology: Ontology to use
-            base_reasoner: Reasoner to get instances/types from"""
+            base_reasoner: Reasoner to get instances/types from
+            cache_max_bytes: memory budget of the cache of complex class expressions, None for no limit
+            index_snapshot: file of a persistent index snapshot. It is used if it was made from the same ontology
+                files and quadstore state (see _ontology_content_key), otherwise the whole index is computed and the
+                file is (re)written
+            transitive_closure: whether to follow the transitive closure of properties declared transitive
+            transitive_closure_max_bytes: memory budget of the precomputed closure of one property, None for no
+                limit. It covers the reachable bitsets of the computation (about one byte per eight individuals
+                for every strongly connected component) and the index entries of the closure. The closure of a
+                property that exceeds it is searched on demand"""
         super().__init__(ontology)
         self._ontology = ontology
         self._base_reasoner = base_reasoner
         self._negation_default = negation_default
+        self._cache_max_bytes = cache_max_bytes
+        self._snapshot_path = index_snapshot
+        self._transitive_closure = transitive_closure
+        self._transitive_max_bytes = transitive_closure_max_bytes
         self._init()
 
     def _init(self):
         self._cls_to_ind = dict()
         self._obj_prop = dict()
         self._obj_prop_inv = dict()
-        individuals = self._ontology.individuals_in_signature()
+        self._obj_prop_asserted = dict()
+        self._obj_prop_on_demand = set()
+        self._obj_prop_sub = dict()
+        self._obj_prop_log = dict()
+        self._obj_prop_pending = dict()
+        self._data_prop_log = dict()
+        self._data_prop_pending = dict()
+        self._changed = set()
+        self._cls_enc = None
+        self._ind_types = None
+        self._data_prop = dict()
+        self._ce_cache = BoundedCache(max_bytes=self._cache_max_bytes)
+        self._snapshot = None
+        self._storid_to_idx = None
+
+        key = None
+        if self._snapshot_path is not None:
+            key = _ontology_content_key(self._ontology, self._base_reasoner)
+            if key is None:
+                logger.warning("Cannot compute the content key of %s, not using the index snapshot", self._ontology)
+            else:
+                if self._transitive_closure:
+                    key += f":transitive_closure={self._transitive_max_bytes}"
+                self._snapshot = _IndexSnapshot.open(self._snapshot_path, key)
+
+        if self._snapshot is not None:
+            individuals = map(OWLNamedIndividual, IRI.create_many(self._snapshot.individuals()))
+        else:
+            individuals = self._ontology.individuals_in_signature()
         self._ind_enc = NamedFixedSet(OWLNamedIndividual, individuals)
-        self._objectsomevalues_cache = dict()
+
+        if key is not None and self._snapshot is None:
+            self._write_snapshot(self._snapshot_path, key)
+
+    def _write_snapshot(self, path: str, key: str) -> None:
+        """Compute the index of all classes and properties of the ontology and write it to a snapshot file"""
+        logger.info("Writing index snapshot %s", path)
+        for c in self._ontology.classes_in_signature():
+            self._lazy_cache_class(c)
+        for p in self._ontology.object_properties_in_signature():
+            self._lazy_cache_obj_prop(p)
+        for p in self._ontology.data_properties_in_signature():
+            self._lazy_cache_data_prop(p)
+        _IndexSnapshot.write(path, key,
+                             individuals=[i.get_iri().as_str() for i in self._ind_enc.table()],
+                             classes={c.get_iri().as_str(): v for c, v in self._cls_to_ind.items()},
+                             object_properties={p.get_iri().as_str(): (a, self._obj_prop_inv[p])
+                                                for p, a in self._obj_prop.items()},
+                             data_properties={p.get_iri().as_str(): c for p, c in self._data_prop.items()},
+                             on_demand=[p.get_iri().as_str() for p in self._obj_prop_on_demand])
 
     def reset(self):
-        """The reset method shall reset any cached state"""
+        """The reset method shall reset any cached state
+
+        The index is computed from the ontology again, so the assertions added or removed with the update methods
+        are lost"""
         self._init()
 
+    def add_class_assertion(self, ind: OWLNamedIndividual, c: OWLClass) -> None:
+        """Add an individual to a class and its super-classes in the index, without changing the ontology
+
+        Args:
+            ind: individual, appended to the individuals if it is new
+            c: class of the ontology
+        """
+        idx = self._individual_position(ind)
+        for cls in (c, *self._base_reasoner.super_classes(c, direct=False)):
+            self._lazy_cache_class(cls)
+            self._cls_to_ind[cls] |= 1 << idx
+            self._changed.add(cls)
+        self._ind_types = None
+
+    def remove_class_assertion(self, ind: OWLNamedIndividual, c: OWLClass) -> None:
+        """Remove an individual from a class in the index, without changing the ontology
+
+        The individual stays in the super-classes, as it may belong to them for other reasons.
+
+        Args:
+            ind: individual
+            c: class of the ontology
+        """
+        if ind not in self._ind_enc:
+            return
+        self._lazy_cache_class(c)
+        self._cls_to_ind[c] &= ~(1 << self._ind_enc.index(ind))
+        self._changed.add(c)
+        self._ind_types = None
+
+    def add_property_assertion(self, subject: OWLNamedIndividual, pe: Union[OWLObjectProperty, OWLDataProperty],
+                               value: Union[OWLNamedIndividual, OWLLiteral]) -> None:
+        """Add an object or data property assertion to the index, without changing the ontology
+
+        Args:
+            subject: individual, appended to the individuals if it is new
+            pe: object or data property of the ontology
+            value: individual for an object property (appended if it is new), literal for a data property
+        """
+        self._update_property_assertion(subject, pe, value, added=True)
+
+    def remove_property_assertion(self, subject: OWLNamedIndividual, pe: Union[OWLObjectProperty, OWLDataProperty],
+                                  value: Union[OWLNamedIndividual, OWLLiteral]) -> None:
+        """Remove an object or data property assertion from the index, without changing the ontology
+
+        Args:
+            subject: individual
+            pe: object or data property of the ontology
+            value: individual for an object property, literal for a data property
+        """
+        if subject not in self._ind_enc or (isinstance(value, OWLNamedIndividual) and value not in self._ind_enc):
+            return
+        self._update_property_assertion(subject, pe, value, added=False)
+
+    def _update_property_assertion(self, subject: OWLNamedIndividual, pe: Union[OWLObjectProperty, OWLDataProperty],
+                                   value: Union[OWLNamedIndividual, OWLLiteral], added: bool) -> None:
+        if isinstance(pe, OWLObjectProperty):
+            assert isinstance(value, OWLNamedIndividual)
+            pair = self._individual_position(subject), self._individual_position(value)
+            self._obj_prop_log.setdefault(pe, dict())[pair] = added
+            self._obj_prop_asserted.pop(pe, None)
+            for q in list(self._obj_prop):
+                if q != pe and pe not in self._obj_prop_sub_properties(q):
+                    continue
+                self._changed.add(q)
+                if added and (q in self._obj_prop_on_demand or not self._closure_indexed(q)):
+                    self._obj_prop_pending.setdefault(q, []).append(pair)
+                else:
+                    # a removed assertion may still follow from another sub-property, and a closure is not patched
+                    del self._obj_prop[q]
+                    del self._obj_prop_inv[q]
+                    self._obj_prop_pending.pop(q, None)
+                    self._obj_prop_on_demand.discard(q)
+        elif isinstance(pe, OWLDataProperty):
+            tv = _typed_value(value)
+            if tv is None:
+                # only the values of the indexed datatypes are kept
+                return
+            entry = (self._individual_position(subject), *tv)
+            self._data_prop_log.setdefault(pe, dict())[entry] = added
+            if pe in self._data_prop:
+                self._data_prop_pending.setdefault(pe, dict())[entry] = added
+            self._changed.add(pe)
+        else:
+            raise NotImplementedError(pe)
+
+    def _individual_position(self, ind: OWLNamedIndividual) -> int:
+        """Position of an individual, appending it if it is new"""
+        if ind in self._ind_enc:
+            return self._ind_enc.index(ind)
+        self._lazy_cache_class(OWLThing)
+        idx = self._ind_enc.add(ind)
+        self._cls_to_ind[OWLThing] |= 1 << idx
+        self._changed.add(OWLThing)
+        self._ind_types = None
+        return idx
+
+    def _invalidate_changed(self) -> None:
+        """Remove the cached expressions that mention an entity whose individuals changed"""
+        if not self._changed:
+            return
+        changed = self._changed
+        for ce in list(self._ce_cache.keys()):
+            if not changed.isdisjoint(_mentioned_entities(ce)):
+                self._ce_cache.pop(ce)
+        self._changed = set()
+
     def data_property_domains(self, pe: OWLDataProperty, direct: bool = False) -> Iterable[OWLClass]:
         yield from self._base_reasoner.data_property_domains(pe, direct=direct)
 
@@ -70,13 +847,22 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
     def object_property_values(self, ind: OWLNamedIndividual, pe: OWLObjectPropertyExpression) \
             -> Iterable[OWLNamedIndividual]:
         self._lazy_cache_obj_prop(pe)
-        ind_enc = self._ind_enc(ind)
+        ind_idx = self._ind_enc.index(ind)
         if isinstance(pe, OWLObjectProperty):
-            yield from self._ind_enc(self._obj_prop[pe][ind_enc])
+            ops, inv_ops = self._obj_prop[pe], self._obj_prop_inv[pe]
         elif isinstance(pe, OWLObjectInverseOf):
-            yield from self._ind_enc(self._obj_prop_inv[pe.get_named_property()][ind_enc])
+            ops, inv_ops = self._obj_prop_inv[pe.get_named_property()], self._obj_prop[pe.get_named_property()]
         else:
             raise NotImplementedError
+        if self._is_on_demand(pe):
+            # objects are the subjects along the inverse
+            mask = np.zeros(ops.size, dtype=np.bool_)
+            mask[ind_idx] = True
+            o_indices = np.flatnonzero(inv_ops.some_values_transitive(mask))
+        else:
+            o_indices = ops.row(ind_idx)
+        for o_idx in o_indices:
+            yield self._ind_enc.by_index(int(o_idx))
 
     def flush(self) -> None:
         self._base_reasoner.flush()
@@ -84,6 +870,7 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
     def instances(self, ce: OWLClassExpression, direct: bool = False) -> Iterable[OWLNamedIndividual]:
         if direct:
             warning("direct not implemented")
+        self._invalidate_changed()
         temp = self._find_instances(ce)
         yield from self._ind_enc(temp)
 
@@ -94,7 +881,55 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
         yield from self._base_reasoner.super_classes(ce, direct=direct)
 
     def types(self, ind: OWLNamedIndividual, direct: bool = False) -> Iterable[OWLClass]:
-        yield from self._base_reasoner.types(ind, direct=direct)
+        if direct or ind not in self._ind_enc:
+            yield from self._base_reasoner.types(ind, direct=direct)
+            return
+        self._lazy_cache_types()
+        row = np.unpackbits(self._ind_types[self._ind_enc.index(ind)], count=len(self._cls_enc), bitorder='little')
+        for c_idx in np.flatnonzero(row):
+            yield self._cls_enc.by_index(int(c_idx))
+
+    def is_instance(self, ind: OWLNamedIndividual, ce: OWLClassExpression) -> bool:
+        """Check whether an individual is an instance of a class expression
+
+        Args:
+            ind: individual
+            ce: class expression
+
+        Returns:
+            whether ind is among the instances of ce
+        """
+        if ind not in self._ind_enc:
+            return False
+        idx = self._ind_enc.index(ind)
+        if isinstance(ce, OWLClass):
+            self._lazy_cache_types()
+            if ce in self._cls_enc:
+                c_idx = self._cls_enc.index(ce)
+                return bool(self._ind_types[idx, c_idx >> 3] >> (c_idx & 7) & 1)
+        self._invalidate_changed()
+        return bool(self._find_instances(ce) >> idx & 1)
+
+    def encoded_instances(self, ce: OWLClassExpression) -> int:
+        """Instances of a class expression, encoded by individuals_encoding
+
+        Like instances, the cached expressions affected by updates of the index are computed again.
+
+        Args:
+            ce: class expression
+
+        Returns:
+            number whose bit i is set if the individual at position i is an instance of ce
+        """
+        self._invalidate_changed()
+        return self._find_instances(ce)
+
+    def individuals_encoding(self) -> NamedFixedSet[OWLNamedIndividual]:
+        """The positions of the individuals in the numbers returned by encoded_instances
+
+        The individuals added with the update methods are appended to it. After reset, a new encoding is used.
+        """
+        return self._ind_enc
 
     def sub_data_properties(self, dp: OWLDataProperty, direct: bool = False) -> Iterable[OWLDataProperty]:
         yield from self._base_reasoner.sub_data_properties(dp=dp, direct=direct)
@@ -107,49 +942,231 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
         return self._ontology
 
     def _lazy_cache_obj_prop(self, pe: OWLObjectPropertyExpression) -> None:
-        """Get all individuals involved in this object property and put them in a Dict"""
+        """Get all individuals involved in this object property or one of its sub-properties and put them into
+        adjacency indexes of the property and its inverse"""
         if isinstance(pe, OWLObjectInverseOf):
-            inverse = True
-            if pe.get_named_property() in self._obj_prop_inv:
-                return
-        elif isinstance(pe, OWLObjectProperty):
-            inverse = False
-            if pe in self._obj_prop:
+            pe = pe.get_named_property()
+        elif not isinstance(pe, OWLObjectProperty):
+            raise NotImplementedError
+        if pe in self._obj_prop:
+            self._merge_pending_obj_prop(pe)
+            return
+        if self._snapshot is not None and not self._obj_prop_log:
+            adjacencies = self._snapshot.object_property(pe.get_iri().as_str())
+            if adjacencies is not None:
+                self._obj_prop[pe], self._obj_prop_inv[pe] = adjacencies
+                if self._snapshot.is_on_demand(pe.get_iri().as_str()):
+                    self._obj_prop_on_demand.add(pe)
+                # extend it to the individuals added since the snapshot was opened
+                self._merge_pending_obj_prop(pe)
                 return
+
+        pairs = [self._asserted_obj_prop_pairs(pe, share=False)]
+        for sp in self._obj_prop_sub_properties(pe):
+            if sp in self._obj_prop:
+                # the index of a sub-property is contained in the index of the property
+                self._merge_pending_obj_prop(sp)
+                pairs.append((self._obj_prop[sp].rows, self._obj_prop[sp].indices))
+            else:
+                # the assertions of a sub-property are kept, as they are also needed for the sub-property itself and
+                # for its other super-properties
+                pairs.append(self._asserted_obj_prop_pairs(sp, share=True))
+
+        adjacency = _Adjacency(np.concatenate([s for s, _ in pairs]), np.concatenate([o for _, o in pairs]),
+                               len(self._ind_enc))
+        if self._transitive_closure and self._is_transitive(pe):
+            closure = _transitive_closure(adjacency, self._transitive_max_bytes)
+            if closure is None:
+                logger.info("Transitive closure of %s exceeds the memory budget, searching it on demand", pe)
+                self._obj_prop_on_demand.add(pe)
+            else:
+                adjacency = closure
+        self._obj_prop[pe] = adjacency
+        self._obj_prop_inv[pe] = adjacency.transpose()
+        self._obj_prop_asserted.pop(pe, None)
+
+    def _merge_pending_obj_prop(self, pe: OWLObjectProperty) -> None:
+        """Merge the added assertions into the index of a property, and extend it to new individuals"""
+        adjacency = self._obj_prop[pe]
+        pending = self._obj_prop_pending.pop(pe, None)
+        if pending is not None:
+            rows, cols = zip(*pending)
+            adjacency = _Adjacency(np.concatenate((adjacency.rows, rows)), np.concatenate((adjacency.indices, cols)),
+                                   len(self._ind_enc))
+        elif adjacency.size != len(self._ind_enc):
+            adjacency = adjacency.resized(len(self._ind_enc))
         else:
-            raise NotImplementedError
+            return
+        self._obj_prop[pe] = adjacency
+        self._obj_prop_inv[pe] = adjacency.transpose()
+
+    def _obj_prop_sub_properties(self, pe: OWLObjectProperty) -> FrozenSet[OWLObjectProperty]:
+        """Named sub-properties of a property, excluding itself"""
+        sub_properties = self._obj_prop_sub.get(pe)
+        if sub_properties is None:
+            sub_properties = frozenset(sp for sp in self._base_reasoner.sub_object_properties(pe, direct=False)
+                                       if sp != pe and isinstance(sp, OWLObjectProperty))
+            self._obj_prop_sub[pe] = sub_properties
+        return sub_properties
+
+    def _closure_indexed(self, pe: OWLObjectProperty) -> bool:
+        """Whether the index of the property holds its precomputed transitive closure"""
+        return self._transitive_closure and pe not in self._obj_prop_on_demand and self._is_transitive(pe)
 
-        # Dict with Individual => Set[Individual]
-        opc: Dict[int, int] = dict()
+    def _is_transitive(self, pe: OWLObjectProperty) -> bool:
+        """Whether the property is declared transitive, only known for Owlready2 ontologies"""
+        from owlapy.owlready2 import OWLOntology_Owlready2
+        if isinstance(self._ontology, OWLOntology_Owlready2):
+            import owlready2
+            p_x = self._ontology._world[pe.get_iri().as_str()]
+            return p_x is not None and owlready2.TransitiveProperty in p_x.is_a
+        return False
+
+    def _asserted_obj_prop_pairs(self, pe: OWLObjectProperty, share: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """(Subject, object) positions of the assertions of exactly this object property
+
+        Args:
+            pe: the object property
+            share: whether to keep the result for later calls
+        """
+        pairs = self._obj_prop_asserted.get(pe)
+        if pairs is not None:
+            return pairs
+
+        # shortcut for owlready2
+        from owlapy.owlready2 import OWLOntology_Owlready2
+        if isinstance(self._ontology, OWLOntology_Owlready2):
+            pairs = self._owlready2_obj_prop_pairs(pe)
+        else:
+            s_list = []
+            o_list = []
+            for s_idx in range(len(self._ind_enc)):
+                for o in self._base_reasoner.object_property_values(self._ind_enc.by_index(s_idx), pe):
+                    s_list.append(s_idx)
+                    o_list.append(self._ind_enc.index(o))
+            pairs = np.array(s_list, dtype=np.int64), np.array(o_list, dtype=np.int64)
+
+        log = self._obj_prop_log.get(pe)
+        if log:
+            s, o = pairs
+            size = len(self._ind_enc)
+            removed = [s_idx * size + o_idx for (s_idx, o_idx), added in log.items() if not added]
+            if removed:
+                keep = ~np.isin(s * size + o, removed)
+                s, o = s[keep], o[keep]
+            added = [pair for pair, added in log.items() if added]
+            if added:
+                s = np.concatenate((s, [s_idx for s_idx, _ in added]))
+                o = np.concatenate((o, [o_idx for _, o_idx in added]))
+            pairs = s, o
+
+        if share and pe not in self._obj_prop:
+            self._obj_prop_asserted[pe] = pairs
+        return pairs
+
+    def _owlready2_storid_index(self) -> np.ndarray:
+        """Array mapping Owlready2 storids to individual positions, -1 for other resources"""
+        if self._storid_to_idx is None:
+            world = self._ontology._world
+            ind_idx = {self._ind_enc.by_index(i).get_iri().as_str(): i for i in range(len(self._ind_enc))}
+            storids = []
+            positions = []
+            for storid, iri in world.graph.execute("SELECT storid, iri FROM resources"):
+                idx = ind_idx.get(iri)
+                if idx is not None:
+                    storids.append(storid)
+                    positions.append(idx)
+            storid_to_idx = np.full(max(storids, default=-1) + 1, -1, dtype=np.int64)
+            storid_to_idx[storids] = positions
+            self._storid_to_idx = storid_to_idx
+        return self._storid_to_idx
+
+    def _owlready2_obj_prop_pairs(self, pe: OWLObjectProperty) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the (subject, object) positions of an object property from the Owlready2 quadstore in bulk
+
+        Includes the assertions of a declared inverse property, like owlready2's get_relations, and skips pairs that
+        are not between individuals of the ontology."""
+        world = self._ontology._world
+        storid_to_idx = self._owlready2_storid_index()
+        s_parts = []
+        o_parts = []
+        p_x = world[pe.get_iri().as_str()]
+        if p_x is not None:
+            inverse_storid = getattr(p_x, '_inverse_storid', 0)
+            for storid, swap in ((p_x.storid, False), (inverse_storid, True)):
+                if not storid:
+                    continue
+                rows = world.graph.execute("SELECT s, o FROM objs WHERE p=?", (storid,)).fetchall()
+                so = np.array(rows, dtype=np.int64).reshape(-1, 2)
+                # blank nodes have negative storids
+                so = so[((so >= 0) & (so < len(storid_to_idx))).all(axis=1)]
+                so = storid_to_idx[so]
+                so = so[(so >= 0).all(axis=1)]
+                s, o = (so[:, 1], so[:, 0]) if swap else (so[:, 0], so[:, 1])
+                s_parts.append(s)
+                o_parts.append(o)
+        if not s_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(s_parts), np.concatenate(o_parts)
+
+    def _lazy_cache_data_prop(self, pe: OWLDataProperty) -> None:
+        """Get all values of the indexed datatypes of this data property and put them into a sorted column"""
+        if pe in self._data_prop:
+            pending = self._data_prop_pending.pop(pe, None)
+            if pending:
+                column = self._data_prop[pe]
+                self._data_prop[pe] = self._updated_data_column(column.positions, column.values, column.datatypes,
+                                                                pending)
+            return
+        if self._snapshot is not None and not self._data_prop_log:
+            column = self._snapshot.data_property(pe.get_iri().as_str())
+            if column is not None:
+                self._data_prop[pe] = column
+                return
+
+        positions = []
+        values = []
+        datatypes = []
 
         # shortcut for owlready2
         from owlapy.owlready2 import OWLOntology_Owlready2
         if isinstance(self._ontology, OWLOntology_Owlready2):
             import owlready2
             # _x => owlready2 objects
-            p_x: owlready2.ObjectProperty = self._ontology._world[pe.get_named_property().get_iri().as_str()]
-            for l_x, r_x in p_x.get_relations():
-                if inverse:
-                    o_x = l_x
-                    s_x = r_x
-                else:
-                    s_x = l_x
-                    o_x = r_x
-                if isinstance(s_x, owlready2.Thing) and isinstance(o_x, owlready2.Thing):
-                    s_enc = self._ind_enc(OWLNamedIndividual(IRI.create(s_x.iri)))
-                    o_enc = self._ind_enc(OWLNamedIndividual(IRI.create(o_x.iri)))
-                    if s_enc in opc:
-                        opc[s_enc] |= o_enc
-                    else:
-                        opc[s_enc] = o_enc
+            p_x: owlready2.DataProperty = self._ontology._world[pe.get_iri().as_str()]
+            for s_x, v in p_x.get_relations():
+                tv = _typed_value(v)
+                if isinstance(s_x, owlready2.Thing) and tv is not None:
+                    positions.append(self._ind_enc.index(OWLNamedIndividual(IRI.create(s_x.iri))))
+                    values.append(tv[0])
+                    datatypes.append(tv[1])
         else:
-            for s_enc, s in self._ind_enc.items():
-                opc[s_enc] = self._ind_enc(self._base_reasoner.object_property_values(s, pe))
+            for s_idx in range(len(self._ind_enc)):
+                for v in self._base_reasoner.data_property_values(self._ind_enc.by_index(s_idx), pe):
+                    tv = _typed_value(v)
+                    if tv is not None:
+                        positions.append(s_idx)
+                        values.append(tv[0])
+                        datatypes.append(tv[1])
 
-        if inverse:
-            self._obj_prop_inv[pe.get_named_property()] = MappingProxyType(opc)
-        else:
-            self._obj_prop[pe] = MappingProxyType(opc)
+        self._data_prop[pe] = self._updated_data_column(positions, values, datatypes,
+                                                        self._data_prop_log.get(pe, dict()))
+
+    def _updated_data_column(self, positions: Iterable[int], values: Iterable[float], datatypes: Iterable[int],
+                             changes: Dict[Tuple[int, float, int], bool]) -> _DataColumn:
+        """Sorted column of the values after removing and adding the changed (individual position, value, datatype
+        code) triples"""
+        positions = np.asarray(positions, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        datatypes = np.asarray(datatypes, dtype=np.int8)
+        keep = np.ones(len(positions), dtype=np.bool_)
+        for (idx, v, dt), added in changes.items():
+            keep &= (positions != idx) | (values != v) | (datatypes != dt)
+        added = [entry for entry, is_added in changes.items() if is_added]
+        positions = np.concatenate((positions[keep], [idx for idx, _, _ in added])).astype(np.int64)
+        values = np.concatenate((values[keep], [v for _, v, _ in added])).astype(np.float64)
+        datatypes = np.concatenate((datatypes[keep], [dt for _, _, dt in added])).astype(np.int8)
+        return _DataColumn(positions, values, datatypes, len(self._ind_enc))
 
     # single dispatch is still not implemented in mypy, see https://github.com/python/mypy/issues/2904
     @singledispatchmethod
@@ -162,39 +1179,29 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
         return self._cls_to_ind[c]
 
     @_find_instances.register
+    @_memoized
     def _(self, ce: OWLObjectUnionOf):
         return reduce(operator.or_, map(self._find_instances, ce.operands()))
 
     @_find_instances.register
+    @_memoized
     def _(self, ce: OWLObjectIntersectionOf):
         return reduce(operator.and_, map(self._find_instances, ce.operands()))
 
     @_find_instances.register
+    @_memoized
     def _(self, ce: OWLObjectSomeValuesFrom):
-        if ce in self._objectsomevalues_cache:
-            return self._objectsomevalues_cache[ce]
-
         p = ce.get_property()
-        assert isinstance(p, OWLObjectPropertyExpression)
-        self._lazy_cache_obj_prop(p)
-
+        ops = self._get_obj_prop_adjacency(p)
         filler_ind_enc = self._find_instances(ce.get_filler())
-        ind_enc = 0
-        if isinstance(p, OWLObjectInverseOf):
-            ops = self._obj_prop_inv[p.get_named_property()]
-        elif isinstance(p, OWLObjectProperty):
-            ops = self._obj_prop[p]
+        if self._is_on_demand(p):
+            ind_enc = mask_to_bits(ops.some_values_transitive(bits_to_mask(filler_ind_enc, ops.size)))
         else:
-            raise ValueError
-
-        for s_enc, o_set_enc in ops.items():
-            if o_set_enc & filler_ind_enc:
-                ind_enc |= s_enc
-
-        self._objectsomevalues_cache[ce] = ind_enc
+            ind_enc = mask_to_bits(ops.some_values(bits_to_mask(filler_ind_enc, ops.size)))
         return ind_enc
 
     @_find_instances.register
+    @_memoized
     def _(self, ce: OWLObjectComplementOf):
         if self._negation_default:
             all = (1 << len(self._ind_enc)) - 1
@@ -210,6 +1217,7 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
             #     self._lazy_cache_negation
 
     @_find_instances.register
+    @_memoized
     def _(self, ce: OWLObjectAllValuesFrom):
         return self._find_instances(
             OWLObjectSomeValuesFrom(
@@ -217,8 +1225,187 @@ class OWLReasoner_FastInstanceChecker(OWLReasoner):
                 filler=ce.get_filler().get_object_complement_of().get_nnf()
             ).get_object_complement_of())
 
+    @_find_instances.register
+    @_memoized
+    def _(self, ce: OWLObjectMinCardinality):
+        return self._find_cardinality_instances(ce, operator.ge)
+
+    @_find_instances.register
+    @_memoized
+    def _(self, ce: OWLObjectMaxCardinality):
+        return self._find_cardinality_instances(ce, operator.le)
+
+    @_find_instances.register
+    @_memoized
+    def _(self, ce: OWLObjectExactCardinality):
+        return self._find_cardinality_instances(ce, operator.eq)
+
+    @_find_instances.register
+    def _(self, ce: OWLObjectHasValue):
+        p = ce.get_property()
+        assert isinstance(p, OWLObjectPropertyExpression)
+        self._lazy_cache_obj_prop(p)
+        # the subjects pointing to the value are its objects along the inverse property
+        if isinstance(p, OWLObjectInverseOf):
+            ops = self._obj_prop[p.get_named_property()]
+        elif isinstance(p, OWLObjectProperty):
+            ops = self._obj_prop_inv[p]
+        else:
+            raise ValueError
+
+        ind = ce.get_filler()
+        if not isinstance(ind, OWLNamedIndividual) or ind not in self._ind_enc:
+            return 0
+        if self._is_on_demand(p):
+            return self._find_instances(OWLObjectSomeValuesFrom(property=p, filler=OWLObjectOneOf(ind)))
+        return reduce(operator.or_, (1 << i for i in ops.row(self._ind_enc.index(ind)).tolist()), 0)
+
+    @_find_instances.register
+    def _(self, ce: OWLObjectOneOf):
+        return self._ind_enc(filter(lambda _: isinstance(_, OWLNamedIndividual), ce.individuals()),
+                             ignore_missing=True)
+
+    @_find_instances.register
+    @_memoized
+    def _(self, ce: OWLDataSomeValuesFrom):
+        p = ce.get_property()
+        assert isinstance(p, OWLDataProperty)
+        filler = ce.get_filler()
+        complement = False
+        while isinstance(filler, OWLDataComplementOf):
+            filler = filler.get_data_range()
+            complement = not complement
+        bounds = self._data_range_bounds(filler)
+        if bounds is None:
+            if not complement:
+                return 0
+            # every indexed value is outside of the range
+            bounds, complement = dict(), False
+        self._lazy_cache_data_prop(p)
+        ind_enc = mask_to_bits(self._data_prop[p].range(**bounds, complement=complement))
+        return ind_enc
+
+    @_find_instances.register
+    @_memoized
+    def _(self, ce: OWLDataAllValuesFrom):
+        return self._find_instances(
+            OWLDataSomeValuesFrom(
+                property=ce.get_property(),
+                filler=OWLDataComplementOf(ce.get_filler())
+            ).get_object_complement_of())
+
+    @_find_instances.register
+    def _(self, ce: OWLDataHasValue):
+        p = ce.get_property()
+        assert isinstance(p, OWLDataProperty)
+        tv = _typed_value(ce.get_filler())
+        if tv is None:
+            # values of other datatypes are not indexed
+            return 0
+        v, dt = tv
+        self._lazy_cache_data_prop(p)
+        return mask_to_bits(self._data_prop[p].range(low=v, high=v, datatype=dt))
+
+    @staticmethod
+    def _data_range_bounds(dr: OWLDataRange) -> Optional[Dict[str, Union[float, bool, int]]]:
+        """Keyword arguments of _DataColumn.range for a data range
+
+        Returns:
+            the bounds and datatype code, or None if the datatype of the range is not indexed (so no indexed value
+            is inside it)
+        """
+        if isinstance(dr, OWLDatatype):
+            datatype, facet_restrictions = dr, ()
+        elif isinstance(dr, OWLDatatypeRestriction):
+            datatype, facet_restrictions = dr.get_datatype(), dr.facet_restrictions()
+        else:
+            raise NotImplementedError(dr)
+        if datatype == TopDatatype:
+            bounds = dict()
+        elif datatype in _INDEXED_DATATYPES:
+            bounds = dict(datatype=_INDEXED_DATATYPES.index(datatype))
+        else:
+            return None
+        for fr in facet_restrictions:
+            v = _numeric_value(fr.get_facet_value())
+            if v is None:
+                raise NotImplementedError(fr)
+            facet = fr.get_facet()
+            # keep the tightest bound on each side
+            if facet in (OWLFacet.MIN_INCLUSIVE, OWLFacet.MIN_EXCLUSIVE):
+                inclusive = facet == OWLFacet.MIN_INCLUSIVE
+                low = bounds.get('low', -np.inf)
+                if v > low or (v == low and not inclusive):
+                    bounds['low'] = v
+                    bounds['low_inclusive'] = inclusive
+            elif facet in (OWLFacet.MAX_INCLUSIVE, OWLFacet.MAX_EXCLUSIVE):
+                inclusive = facet == OWLFacet.MAX_INCLUSIVE
+                high = bounds.get('high', np.inf)
+                if v < high or (v == high and not inclusive):
+                    bounds['high'] = v
+                    bounds['high_inclusive'] = inclusive
+            else:
+                raise NotImplementedError(fr)
+        return bounds
+
+    def _find_cardinality_instances(self, ce: OWLObjectCardinalityRestriction,
+                                    compare: Callable[[np.ndarray, int], np.ndarray]) -> int:
+        """Count the fillers of every individual along the property (closed world)
+
+        Args:
+            ce: the cardinality restriction
+            compare: comparison between the filler counts and the cardinality
+        """
+        p = ce.get_property()
+        ops = self._get_obj_prop_adjacency(p)
+        filler_ind_enc = self._find_instances(ce.get_filler())
+        if self._is_on_demand(p):
+            counts = _transitive_count_values(ops, bits_to_mask(filler_ind_enc, ops.size))
+        else:
+            counts = ops.count_values(bits_to_mask(filler_ind_enc, ops.size))
+        ind_enc = mask_to_bits(compare(counts, ce.get_cardinality()))
+        return ind_enc
+
+    def _is_on_demand(self, p: OWLObjectPropertyExpression) -> bool:
+        if isinstance(p, OWLObjectInverseOf):
+            p = p.get_named_property()
+        return p in self._obj_prop_on_demand
+
+    def _get_obj_prop_adjacency(self, p: OWLObjectPropertyExpression) -> _Adjacency:
+        assert isinstance(p, OWLObjectPropertyExpression)
+        self._lazy_cache_obj_prop(p)
+        if isinstance(p, OWLObjectInverseOf):
+            return self._obj_prop_inv[p.get_named_property()]
+        elif isinstance(p, OWLObjectProperty):
+            return self._obj_prop[p]
+        else:
+            raise ValueError
+
+    def _lazy_cache_types(self) -> None:
+        """Invert the individuals of all classes of the ontology into a matrix of the classes of each individual"""
+        if self._ind_types is not None:
+            return
+        if self._cls_enc is None:
+            self._cls_enc = NamedFixedSet(OWLClass, (OWLThing, *self._ontology.classes_in_signature()))
+        classes = [self._cls_enc.by_index(i) for i in range(len(self._cls_enc))]
+        for c in classes:
+            self._lazy_cache_class(c)
+        size = len(self._ind_enc)
+        ind_types = np.zeros((size, (len(classes) + 7) // 8), dtype=np.uint8)
+        # pack eight classes at a time to keep the unpacked masks small
+        for col in range(ind_types.shape[1]):
+            block = classes[col * 8:col * 8 + 8]
+            masks = np.stack([bits_to_mask(self._cls_to_ind[c], size) for c in block], axis=1)
+            ind_types[:, col] = np.packbits(masks, axis=1, bitorder='little')[:, 0]
+        self._ind_types = ind_types
+
     def _lazy_cache_class(self, c: OWLClass) -> None:
         if c in self._cls_to_ind:
             return
+        if self._snapshot is not None:
+            ind_enc = self._snapshot.class_instances(c.get_iri().as_str())
+            if ind_enc is not None:
+                self._cls_to_ind[c] = ind_enc
+                return
         temp = self._base_reasoner.instances(c)
         self._cls_to_ind[c] = self._ind_enc(temp)
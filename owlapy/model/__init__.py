@@ -6,10 +6,12 @@ many help texts copied from OWL API
 
 [1] https://github.com/owlcs/owlapi"""
 
+import weakref
 from abc import ABCMeta, abstractmethod
 from typing import Generic, Iterable, Sequence, TypeVar, Union, Final, Optional, Protocol, ClassVar, List
+from weakref import WeakKeyDictionary
 
-from owlapy.vocab import OWLRDFVocabulary, XSDVocabulary
+from owlapy.vocab import OWLRDFVocabulary, XSDVocabulary, OWLFacet
 from owlapy._utils import MOVE
 from owlapy.model._base import OWLObject, OWLAnnotationObject, OWLAnnotationSubject, OWLAnnotationValue
 from owlapy.model._iri import HasIRI, IRI
@@ -94,8 +96,46 @@ class OWLClassExpression(OWLPropertyRange):
         pass
 
 
-class OWLAnonymousClassExpression(OWLClassExpression, metaclass=ABCMeta):
+class _meta_ClassExpression(ABCMeta):
+    """Interns the anonymous class expressions, like _WeakCached does for IRIs
+
+    Structurally equal expressions are the same object, and their hash is computed once at construction."""
+    __slots__ = ()
+
+    def __init__(cls, what, bases, dct):
+        super().__init__(what, bases, dct)
+        cls._cache = WeakKeyDictionary()
+        if dct.get('__hash__') is not None:
+            cls._structural_hash = dct['__hash__']
+            cls.__hash__ = _cached_hash
+
+    def __call__(cls, *args, **kwargs):
+        _temp = super().__call__(*args, **kwargs)
+        _temp._hash = cls._structural_hash(_temp)
+        ret = cls._cache.get(_temp)
+        if ret is None:
+            cls._cache[_temp] = weakref.ref(_temp)
+            return _temp
+        else:
+            return ret()
+
+
+def _cached_hash(self) -> int:
+    return self._hash
+
+
+class OWLAnonymousClassExpression(OWLClassExpression, metaclass=_meta_ClassExpression):
     """A Class Expression which is not a named Class"""
+    __slots__ = '_hash',
+
+    _hash: int
+
+    def __setstate__(self, state):
+        # the hashes of strings differ between processes, so the hash of a copy is computed again
+        _, slots = state
+        for k, v in slots.items():
+            object.__setattr__(self, k, v)
+        self._hash = type(self)._structural_hash(self)
 
     def is_owl_nothing(self) -> bool:
         # documented in parent
@@ -692,7 +732,7 @@ class OWLObjectCardinalityRestriction(OWLCardinalityRestriction[OWLClassExpressi
         return NotImplemented
 
     def __hash__(self):
-        hash((self._property, self._cardinality, self._filler))
+        return hash((self._property, self._cardinality, self._filler))
 
 
 class OWLObjectMinCardinality(OWLObjectCardinalityRestriction):
@@ -754,7 +794,7 @@ class OWLObjectExactCardinality(OWLObjectCardinalityRestriction):
         Returns:
             The semantically equivalent but structurally simpler form (= 1 R C) = >= 1 R C and <= 1 R C
         """
-        args = self.get_property(), self.get_cardinality(), self.get_filler()
+        args = self.get_cardinality(), self.get_property(), self.get_filler()
         return OWLObjectIntersectionOf((OWLObjectMinCardinality(*args), OWLObjectMaxCardinality(*args)))
 
 
@@ -830,6 +870,14 @@ class OWLObjectHasValue(OWLHasValueRestriction[OWLIndividual], OWLObjectRestrict
         """
         return OWLObjectSomeValuesFrom(self.get_property(), OWLObjectOneOf(self.get_filler()))
 
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._v == other._v and self._property == other._property
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._v, self._property))
+
     def __repr__(self):
         return f'OWLObjectHasValue(property={self.get_property()}, individual={self._v})'
 
@@ -1363,7 +1411,7 @@ class OWLReasoner(metaclass=ABCMeta):
         pass
 
 
-class OWLDatatype(OWLEntity):
+class OWLDatatype(OWLEntity, OWLDataRange):
     """Represents a Datatype (named data range) in the OWL 2 Specification."""
     __slots__ = '_iri'
 
@@ -1388,14 +1436,6 @@ class OWLDatatype(OWLEntity):
         return self._iri
 
 
-# class OWLDatatypeRestriction(metaclass=ABCMeta):
-#     type_index: Final = 4006
-#
-#
-# class OWLFacetRestriction(metaclass=ABCMeta):
-#     type_index: Final = 4007
-
-
 class OWLLiteral(OWLAnnotationValue, metaclass=ABCMeta):
     """Represents a Literal in the OWL 2 Specification."""
     __slots__ = ()
@@ -1581,13 +1621,102 @@ class _OWLLiteralImplBoolean(OWLLiteral):
         # documented in parent
         return BooleanOWLDatatype
 
-# TODO: a big todo plus intermediate classes (missing)
+
+class OWLFacetRestriction(OWLObject):
+    """A facet restriction is used to restrict a particular datatype."""
+    __slots__ = '_facet', '_literal'
+
+    type_index: Final = 4007
+
+    _facet: OWLFacet
+    _literal: 'OWLLiteral'
+
+    def __init__(self, facet: OWLFacet, literal: Union['OWLLiteral', int, float]):
+        """
+        Args:
+            facet: The facet, e.g. minInclusive
+            literal: The facet value
+        """
+        self._facet = facet
+        if isinstance(literal, OWLLiteral):
+            self._literal = literal
+        else:
+            self._literal = OWLLiteral(literal)
+
+    def get_facet(self) -> OWLFacet:
+        """Gets the facet of this restriction"""
+        return self._facet
+
+    def get_facet_value(self) -> 'OWLLiteral':
+        """Gets the value (literal) that the facet restricts to"""
+        return self._literal
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._facet == other._facet and self._literal == other._literal
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._facet, self._literal))
+
+    def __repr__(self):
+        return f'OWLFacetRestriction({self._facet}, {repr(self._literal)})'
+
+
+class OWLDatatypeRestriction(OWLDataRange):
+    """Represents a DatatypeRestriction data range in the OWL 2 Specification."""
+    __slots__ = '_type', '_facet_restrictions'
+
+    type_index: Final = 4006
+
+    _type: OWLDatatype
+    _facet_restrictions: Sequence[OWLFacetRestriction]
+
+    def __init__(self, type_: OWLDatatype, facet_restrictions: Union[OWLFacetRestriction,
+                                                                     Iterable[OWLFacetRestriction]]):
+        """
+        Args:
+            type_: The datatype that is restricted
+            facet_restrictions: The facet restrictions on the datatype
+        """
+        self._type = type_
+        if isinstance(facet_restrictions, OWLFacetRestriction):
+            facet_restrictions = facet_restrictions,
+        self._facet_restrictions = tuple(facet_restrictions)
+
+    def get_datatype(self) -> OWLDatatype:
+        """Gets the datatype that is restricted"""
+        return self._type
+
+    def facet_restrictions(self) -> Iterable[OWLFacetRestriction]:
+        """Gets the facet restrictions on the datatype"""
+        yield from self._facet_restrictions
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._type == other._type and self._facet_restrictions == other._facet_restrictions
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._type, self._facet_restrictions))
+
+    def __repr__(self):
+        return f'OWLDatatypeRestriction({repr(self._type)}, {repr(self._facet_restrictions)})'
+
 
 class OWLQuantifiedDataRestriction(OWLQuantifiedRestriction[OWLDataRange],
                                    OWLDataRestriction, metaclass=ABCMeta):
     """A quantified data restriction."""
     __slots__ = ()
-    pass
+
+    _filler: OWLDataRange
+
+    def __init__(self, filler: OWLDataRange):
+        self._filler = filler
+
+    def get_filler(self) -> OWLDataRange:
+        # documented in parent (HasFiller)
+        return self._filler
 
 
 class OWLDataCardinalityRestriction(OWLCardinalityRestriction[OWLDataRange],
@@ -1623,16 +1752,78 @@ class OWLDataCardinalityRestriction(OWLCardinalityRestriction[OWLDataRange],
 #     type_index: Final = 2000 + get_axiom_type().get_index()
 
 
-class OWLDataAllValuesFrom(OWLQuantifiedDataRestriction, metaclass=ABCMeta):
+class OWLDataAllValuesFrom(OWLQuantifiedDataRestriction):
     """Represents DataAllValuesFrom class expressions in the OWL 2 Specification."""
-    __slots__ = ()
+    __slots__ = '_property', '_filler'
 
     type_index: Final = 3013
 
+    _property: OWLDataPropertyExpression
 
-# class OWLDataComplementOf(metaclass=ABCMeta):
-#     """Represents DataComplementOf in the OWL 2 Specification."""
-#     type_index: Final = 4002
+    def __init__(self, property: OWLDataPropertyExpression, filler: OWLDataRange):
+        """Gets an OWLDataAllValuesFrom restriction
+
+        Args:
+            property: The data property that the restriction acts along.
+            filler: The data range that is the filler.
+
+        Returns:
+            An OWLDataAllValuesFrom restriction along the specified property with the specified filler
+        """
+        super().__init__(filler)
+        self._property = property
+
+    def get_property(self) -> OWLDataPropertyExpression:
+        # documented in parent
+        return self._property
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._filler == other._filler and self._property == other._property
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._filler, self._property))
+
+    def __repr__(self):
+        return f"OWLDataAllValuesFrom(property={repr(self._property)},filler={repr(self._filler)})"
+
+
+class OWLDataComplementOf(OWLDataRange, HasOperands[OWLDataRange]):
+    """Represents DataComplementOf in the OWL 2 Specification."""
+    __slots__ = '_data_range'
+    type_index: Final = 4002
+
+    _data_range: OWLDataRange
+
+    def __init__(self, data_range: OWLDataRange):
+        """
+        Args:
+            data_range: data range to complement
+        """
+        self._data_range = data_range
+
+    def get_data_range(self) -> OWLDataRange:
+        """
+        Returns:
+            the wrapped data range
+        """
+        return self._data_range
+
+    def operands(self) -> Iterable[OWLDataRange]:
+        # documented in parent
+        yield self._data_range
+
+    def __repr__(self):
+        return f"OWLDataComplementOf({repr(self._data_range)})"
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._data_range == other._data_range
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._data_range)
 
 
 class OWLDataExactCardinality(OWLDataCardinalityRestriction, metaclass=ABCMeta):
@@ -1642,12 +1833,42 @@ class OWLDataExactCardinality(OWLDataCardinalityRestriction, metaclass=ABCMeta):
     type_index: Final = 3016
 
 
-class OWLDataHasValue(OWLHasValueRestriction[OWLLiteral], OWLDataRestriction, metaclass=ABCMeta):
+class OWLDataHasValue(OWLHasValueRestriction[OWLLiteral], OWLDataRestriction):
     """Represents DataHasValue restrictions in the OWL 2 Specification."""
-    __slots__ = ()
+    __slots__ = '_property', '_v'
 
     type_index: Final = 3014
 
+    _property: OWLDataPropertyExpression
+    _v: OWLLiteral
+
+    def __init__(self, property: OWLDataPropertyExpression, value: OWLLiteral):
+        """
+        Args:
+            property: The data property that the restriction acts along.
+            value: The literal value
+
+        Returns:
+            a DataHasValue restriction with specified property and value
+        """
+        super().__init__(value)
+        self._property = property
+
+    def get_property(self) -> OWLDataPropertyExpression:
+        # documented in parent
+        return self._property
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._v == other._v and self._property == other._property
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._v, self._property))
+
+    def __repr__(self):
+        return f'OWLDataHasValue(property={repr(self._property)},value={repr(self._v)})'
+
 
 # class OWLDataIntersectionOf(metaclass=ABCMeta):
 #     """Represents DataIntersectionOf  in the OWL 2 Specification."""
@@ -1673,12 +1894,42 @@ class OWLDataMinCardinality(OWLDataCardinalityRestriction, metaclass=ABCMeta):
 #     type_index: Final = 4003
 
 
-class OWLDataSomeValuesFrom(OWLQuantifiedDataRestriction, metaclass=ABCMeta):
+class OWLDataSomeValuesFrom(OWLQuantifiedDataRestriction):
     """Represents a DataSomeValuesFrom restriction in the OWL 2 Specification."""
-    __slots__ = ()
+    __slots__ = '_property', '_filler'
 
     type_index: Final = 3012
 
+    _property: OWLDataPropertyExpression
+
+    def __init__(self, property: OWLDataPropertyExpression, filler: OWLDataRange):
+        """Gets an OWLDataSomeValuesFrom restriction
+
+        Args:
+            property: The data property that the restriction acts along.
+            filler: The data range that is the filler.
+
+        Returns:
+            An OWLDataSomeValuesFrom restriction along the specified property with the specified filler
+        """
+        super().__init__(filler)
+        self._property = property
+
+    def get_property(self) -> OWLDataPropertyExpression:
+        # documented in parent
+        return self._property
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self._filler == other._filler and self._property == other._property
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._filler, self._property))
+
+    def __repr__(self):
+        return f"OWLDataSomeValuesFrom(property={repr(self._property)},filler={repr(self._filler)})"
+
 
 # class OWLDataUnionOf(metaclass=ABCMeta):
 #     """Represents a DataUnionOf data range in the OWL 2 Specification."""
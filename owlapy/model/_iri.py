@@ -1,7 +1,8 @@
+import sys
 import weakref
 from abc import ABCMeta, abstractmethod
-from typing import Final, Union, overload
-from weakref import WeakKeyDictionary
+from typing import Final, Union, overload, Iterable, List
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 from owlapy import namespaces
 from owlapy.model._base import OWLAnnotationSubject, OWLAnnotationValue
@@ -39,8 +40,23 @@ class _WeakCached(type):
 
 
 class _meta_IRI(ABCMeta, _WeakCached):
+    """Looks IRIs up by their parts, and by their string in IRI.create, before constructing a new one"""
     __slots__ = ()
-    pass
+
+    def __init__(cls, what, bases, dct):
+        super().__init__(what, bases, dct)
+        cls._parts_cache = WeakValueDictionary()
+        cls._str_cache = WeakValueDictionary()
+
+    def __call__(cls, namespace: Union[str, Namespaces], remainder: str):
+        if isinstance(namespace, Namespaces):
+            namespace = namespace.ns
+        key = namespace, remainder
+        ret = cls._parts_cache.get(key)
+        if ret is None:
+            ret = super().__call__(namespace, remainder)
+            cls._parts_cache[key] = ret
+        return ret
 
 
 class IRI(OWLAnnotationSubject, OWLAnnotationValue, metaclass=_meta_IRI):
@@ -56,7 +72,6 @@ class IRI(OWLAnnotationSubject, OWLAnnotationValue, metaclass=_meta_IRI):
             namespace = namespace.ns
         else:
             assert namespace[-1] in ("/", ":", "#")
-        import sys
         self._namespace = sys.intern(namespace)
         self._remainder = remainder
 
@@ -96,8 +111,30 @@ class IRI(OWLAnnotationSubject, OWLAnnotationValue, metaclass=_meta_IRI):
     def create(string, remainder=None) -> 'IRI':
         if remainder is not None:
             return IRI(string, remainder)
-        index = 1 + max(string.rfind("/"), string.rfind(":"), string.rfind("#"))
-        return IRI(string[0:index], string[index:])
+        iri = IRI._str_cache.get(string)
+        if iri is None:
+            index = 1 + max(string.rfind("/"), string.rfind(":"), string.rfind("#"))
+            iri = IRI(string[0:index], string[index:])
+            IRI._str_cache[string] = iri
+        return iri
+
+    @staticmethod
+    def create_many(strings: Iterable[str]) -> List['IRI']:
+        """Creates IRIs from many strings, like create
+
+        Args:
+            strings: The Strings that specify the IRIs
+
+        Returns:
+            The IRIs, in the order of the strings
+        """
+        get = IRI._str_cache.get
+        create = IRI.create
+        iris = []
+        for string in strings:
+            iri = get(string)
+            iris.append(iri if iri is not None else create(string))
+        return iris
 
     def __repr__(self):
         return f"IRI({repr(self._namespace)},{repr(self._remainder)})"
@@ -2,6 +2,7 @@
 
 import types
 from functools import singledispatchmethod
+from types import MappingProxyType
 from typing import List, Callable
 
 from owlapy import namespaces
@@ -10,7 +11,9 @@ from owlapy.model import OWLObject, OWLClass, OWLObjectProperty, OWLObjectSomeVa
     OWLObjectAllValuesFrom, OWLObjectUnionOf, OWLBooleanClassExpression, OWLNaryBooleanClassExpression, \
     OWLObjectIntersectionOf, OWLObjectComplementOf, OWLObjectInverseOf, OWLClassExpression, OWLRestriction, \
     OWLObjectMinCardinality, OWLObjectExactCardinality, OWLObjectMaxCardinality, OWLObjectHasSelf, OWLObjectHasValue, \
-    OWLObjectOneOf, OWLNamedIndividual, OWLEntity, IRI
+    OWLObjectOneOf, OWLNamedIndividual, OWLEntity, IRI, OWLDataProperty, OWLDataSomeValuesFrom, OWLDataHasValue, \
+    OWLFacetRestriction, OWLDatatypeRestriction, OWLDatatype, OWLLiteral, OWLDataAllValuesFrom, OWLDataComplementOf
+from owlapy.vocab import OWLFacet
 
 _DL_SYNTAX = types.SimpleNamespace(
     SUBCLASS="⊑",
@@ -37,13 +40,12 @@ _DL_SYNTAX = types.SimpleNamespace(
 )
 
 
-# TODO
-# _FACETS = MappingProxyType({
-#     OWLFacet.MIN_INCLUSIVE: "\u2265", # >=
-#     OWLFacet.MIN_EXCLUSIVE: "\u003e", # >
-#     OWLFacet.MAX_INCLUSIVE: "\u2264", # <=
-#     OWLFacet.MAX_EXCLUSIVE: "\u003c", # <
-# })
+_FACETS = MappingProxyType({
+    OWLFacet.MIN_INCLUSIVE: "\u2265",  # >=
+    OWLFacet.MIN_EXCLUSIVE: "\u003e",  # >
+    OWLFacet.MAX_INCLUSIVE: "\u2264",  # <=
+    OWLFacet.MAX_EXCLUSIVE: "\u003c",  # <
+})
 
 def _simple_short_form_provider(e: OWLEntity) -> str:
     iri: IRI = e.get_iri()
@@ -90,6 +92,10 @@ class DLSyntaxObjectRenderer(OWLObjectRenderer):
     def _(self, p: OWLObjectProperty) -> str:
         return self._sfp(p)
 
+    @render.register
+    def _(self, p: OWLDataProperty) -> str:
+        return self._sfp(p)
+
     @render.register
     def _(self, i: OWLNamedIndividual) -> str:
         return self._sfp(i)
@@ -102,6 +108,18 @@ class DLSyntaxObjectRenderer(OWLObjectRenderer):
     def _(self, e: OWLObjectAllValuesFrom) -> str:
         return "%s %s.%s" % (_DL_SYNTAX.FORALL, self.render(e.get_property()), self._render_nested(e.get_filler()))
 
+    @render.register
+    def _(self, e: OWLDataSomeValuesFrom) -> str:
+        return "%s %s.%s" % (_DL_SYNTAX.EXISTS, self.render(e.get_property()), self.render(e.get_filler()))
+
+    @render.register
+    def _(self, e: OWLDataAllValuesFrom) -> str:
+        return "%s %s.%s" % (_DL_SYNTAX.FORALL, self.render(e.get_property()), self.render(e.get_filler()))
+
+    @render.register
+    def _(self, r: OWLDataHasValue):
+        return "%s %s.{%s}" % (_DL_SYNTAX.EXISTS, self.render(r.get_property()), self.render(r.get_filler()))
+
     @render.register
     def _(self, c: OWLObjectUnionOf) -> str:
         return (" %s " % _DL_SYNTAX.OR).join(self._render_operands(c))
@@ -114,6 +132,10 @@ class DLSyntaxObjectRenderer(OWLObjectRenderer):
     def _(self, n: OWLObjectComplementOf) -> str:
         return "%s%s" % (_DL_SYNTAX.NOT, self._render_nested(n.get_operand()))
 
+    @render.register
+    def _(self, n: OWLDataComplementOf) -> str:
+        return "%s%s" % (_DL_SYNTAX.NOT, self.render(n.get_data_range()))
+
     @render.register
     def _(self, p: OWLObjectInverseOf) -> str:
         return "%s%s" % (self.render(p.get_named_property()), _DL_SYNTAX.INVERSE)
@@ -147,26 +169,28 @@ class DLSyntaxObjectRenderer(OWLObjectRenderer):
         return "{%s}" % (" %s " % _DL_SYNTAX.OR).join(
             "%s" % (self.render(_)) for _ in r.individuals())
 
-    # TODO
-    # @render.register
-    # def _(self, r: OWLFacetRestriction):
-    #     return "%s %s" % (_FACETS.get(r.get_facet(), r.get_facet().get_symbolic_form()), r.get_facet_value())
+    @render.register
+    def _(self, r: OWLFacetRestriction):
+        return "%s %s" % (_FACETS.get(r.get_facet(), r.get_facet().get_symbolic_form()),
+                           self.render(r.get_facet_value()))
 
-    # TODO
-    # @render.register
-    # def _(self, r: OWLDatatypeRestriction):
-    #     s = [self.render(_) for _ in r.facet_restrictions()]
-    #     return "%s[%s]" % (self.render(r.get_datatype()), (" %s " % _DL_SYNTAX.COMMA).join(s))
+    @render.register
+    def _(self, r: OWLDatatypeRestriction):
+        s = [self.render(_) for _ in r.facet_restrictions()]
+        return "%s[%s]" % (self.render(r.get_datatype()), (" %s " % _DL_SYNTAX.COMMA).join(s))
 
     # TODO
     # @render.register
     # def _(self, r: OWLObjectPropertyChain):
     #     return (" %s " % _DL_SYNTAX.COMP).join(self.render(_) for _ in r.property_chain())
 
-    # TODO
-    # @render.register
-    # def _(self, t: OWLDatatype):
-    #     return self._sfp(t.get_iri())
+    @render.register
+    def _(self, t: OWLDatatype):
+        return self._sfp(t)
+
+    @render.register
+    def _(self, l: OWLLiteral):
+        return l.get_literal()
 
     def _render_operands(self, c: OWLNaryBooleanClassExpression) -> List[str]:
         return [self._render_nested(_) for _ in c.operands()]
@@ -234,6 +258,10 @@ class ManchesterOWLSyntaxOWLObjectRenderer(OWLObjectRenderer):
     def _(self, p: OWLObjectProperty) -> str:
         return self._sfp(p)
 
+    @render.register
+    def _(self, p: OWLDataProperty) -> str:
+        return self._sfp(p)
+
     @render.register
     def _(self, i: OWLNamedIndividual) -> str:
         return self._sfp(i)
@@ -246,6 +274,18 @@ class ManchesterOWLSyntaxOWLObjectRenderer(OWLObjectRenderer):
     def _(self, e: OWLObjectAllValuesFrom) -> str:
         return "%s %s %s" % (self.render(e.get_property()), _MAN_SYNTAX.FORALL, self._render_nested(e.get_filler()))
 
+    @render.register
+    def _(self, e: OWLDataSomeValuesFrom) -> str:
+        return "%s %s %s" % (self.render(e.get_property()), _MAN_SYNTAX.EXISTS, self.render(e.get_filler()))
+
+    @render.register
+    def _(self, e: OWLDataAllValuesFrom) -> str:
+        return "%s %s %s" % (self.render(e.get_property()), _MAN_SYNTAX.FORALL, self.render(e.get_filler()))
+
+    @render.register
+    def _(self, r: OWLDataHasValue):
+        return "%s %s %s" % (self.render(r.get_property()), _MAN_SYNTAX.VALUE, self.render(r.get_filler()))
+
     @render.register
     def _(self, c: OWLObjectUnionOf) -> str:
         return (" %s " % _MAN_SYNTAX.OR).join(self._render_operands(c))
@@ -258,6 +298,10 @@ class ManchesterOWLSyntaxOWLObjectRenderer(OWLObjectRenderer):
     def _(self, n: OWLObjectComplementOf) -> str:
         return "%s %s" % (_MAN_SYNTAX.NOT, self._render_nested(n.get_operand()))
 
+    @render.register
+    def _(self, n: OWLDataComplementOf) -> str:
+        return "%s %s" % (_MAN_SYNTAX.NOT, self.render(n.get_data_range()))
+
     @render.register
     def _(self, p: OWLObjectInverseOf) -> str:
         return "%s(%s)" % (self.render(p.get_named_property()), _MAN_SYNTAX.INVERSE)
@@ -291,26 +335,27 @@ class ManchesterOWLSyntaxOWLObjectRenderer(OWLObjectRenderer):
         return "{%s}" % (" %s " % _MAN_SYNTAX.COMMA).join(
             "%s" % (self.render(_)) for _ in r.individuals())
 
-    # TODO
-    # @render.register
-    # def _(self, r: OWLFacetRestriction):
-    #     return "%s %s" % (_FACETS.get(r.get_facet(), r.get_facet().get_symbolic_form()), r.get_facet_value())
+    @render.register
+    def _(self, r: OWLFacetRestriction):
+        return "%s %s" % (r.get_facet().get_symbolic_form(), self.render(r.get_facet_value()))
 
-    # TODO
-    # @render.register
-    # def _(self, r: OWLDatatypeRestriction):
-    #     s = [self.render(_) for _ in r.facet_restrictions()]
-    #     return "%s[%s]" % (self.render(r.get_datatype()), (" %s " % _MAN_SYNTAX.COMMA).join(s))
+    @render.register
+    def _(self, r: OWLDatatypeRestriction):
+        s = [self.render(_) for _ in r.facet_restrictions()]
+        return "%s[%s]" % (self.render(r.get_datatype()), (" %s " % _MAN_SYNTAX.COMMA).join(s))
 
     # TODO
     # @render.register
     # def _(self, r: OWLObjectPropertyChain):
     #     return (" %s " % _MAN_SYNTAX.COMP).join(self.render(_) for _ in r.property_chain())
 
-    # TODO
-    # @render.register
-    # def _(self, t: OWLDatatype):
-    #     return self._sfp(t.get_iri())
+    @render.register
+    def _(self, t: OWLDatatype):
+        return self._sfp(t)
+
+    @render.register
+    def _(self, l: OWLLiteral):
+        return l.get_literal()
 
     def _render_operands(self, c: OWLNaryBooleanClassExpression) -> List[str]:
         return [self._render_nested(_) for _ in c.operands()]
@@ -1,16 +1,24 @@
+import sys
+from collections import OrderedDict
 from functools import singledispatchmethod, total_ordering
-from typing import Iterable, overload, TypeVar, Generic, Type, Tuple, Dict, List, cast, Optional
+from typing import Iterable, overload, TypeVar, Generic, Type, Tuple, Dict, List, cast, Optional, Callable, Union
+from weakref import WeakKeyDictionary
+
+import numpy as np
 
 from owlapy.model import OWLObject, HasIndex, HasIRI, OWLClassExpression, OWLClass, OWLObjectIntersectionOf, \
     OWLObjectUnionOf, OWLObjectComplementOf, OWLNothing, OWLThing, OWLObjectSomeValuesFrom, OWLObjectAllValuesFrom, \
     OWLObjectHasValue, OWLObjectMinCardinality, OWLObjectMaxCardinality, OWLObjectExactCardinality, OWLObjectHasSelf, \
     OWLObjectOneOf, OWLDataMaxCardinality, OWLDataMinCardinality, OWLDataExactCardinality, OWLDataHasValue, \
-    OWLDataAllValuesFrom, OWLDataSomeValuesFrom, OWLObjectRestriction, HasFiller, HasCardinality, HasOperands, IRI, \
-    OWLObjectInverseOf
+    OWLDataAllValuesFrom, OWLDataSomeValuesFrom, OWLRestriction, HasFiller, HasCardinality, HasOperands, IRI, \
+    OWLObjectInverseOf, OWLDatatypeRestriction, OWLFacetRestriction, OWLLiteral, OWLAnonymousClassExpression, \
+    OWLDataRange, OWLDataComplementOf
 
 _HasIRI = TypeVar('_HasIRI', bound=HasIRI)  #:
 _HasIndex = TypeVar('_HasIndex', bound=HasIndex)  #:
 _O = TypeVar('_O')  #:
+_K = TypeVar('_K')  #:
+_V = TypeVar('_V')  #:
 
 
 @total_ordering
@@ -37,24 +45,7 @@ class OrderedOWLObject:
 
     def _comparison_chain(self):
         if self._chain is None:
-            c = [self.o.type_index]
-
-            if isinstance(self.o, OWLObjectRestriction):
-                c.append(OrderedOWLObject(as_index(self.o.get_property())))
-            if isinstance(self.o, OWLObjectInverseOf):
-                c.append(self.o.get_named_property().get_iri().as_str())
-            if isinstance(self.o, HasFiller):
-                c.append(OrderedOWLObject(self.o.get_filler()))
-            if isinstance(self.o, HasCardinality):
-                c.append(self.o.get_cardinality())
-            if isinstance(self.o, HasOperands):
-                c.append(tuple(map(OrderedOWLObject, self.o.operands())))
-            if isinstance(self.o, HasIRI):
-                c.append(self.o.get_iri().as_str())
-            if len(c) == 1:
-                raise NotImplementedError(type(self.o))
-
-            self._chain = tuple(c)
+            self._chain = owl_object_sort_key(self.o)
 
         return self._chain
 
@@ -70,8 +61,63 @@ class OrderedOWLObject:
         return self.o == other.o
 
 
+_sort_keys: 'WeakKeyDictionary[OWLAnonymousClassExpression, Tuple]' = WeakKeyDictionary()
+
+
+def owl_object_sort_key(o: OWLObject) -> Tuple:
+    """Sort key of an OWL Object, giving the same order as OrderedOWLObject
+
+    The key is a nested tuple of the type_index followed by all components of the OWL Object, so comparisons run on
+    plain tuples instead of recursive comparison chains. The keys of anonymous class expressions are memoized per
+    interned expression.
+
+    Args:
+        o: OWL Object
+
+    Returns:
+        sort key
+    """
+    if not isinstance(o, OWLAnonymousClassExpression):
+        return _owl_object_sort_key(o)
+    try:
+        return _sort_keys[o]
+    except KeyError:
+        key = _sort_keys[o] = _owl_object_sort_key(o)
+        return key
+
+
+def _owl_object_sort_key(o: OWLObject) -> Tuple:
+    o = as_index(o)
+    c = [o.type_index]
+
+    if isinstance(o, OWLRestriction):
+        c.append(owl_object_sort_key(o.get_property()))
+    if isinstance(o, OWLObjectInverseOf):
+        c.append(o.get_named_property().get_iri().as_str())
+    if isinstance(o, HasFiller):
+        c.append(owl_object_sort_key(o.get_filler()))
+    if isinstance(o, HasCardinality):
+        c.append(o.get_cardinality())
+    if isinstance(o, HasOperands):
+        c.append(tuple(map(owl_object_sort_key, o.operands())))
+    if isinstance(o, HasIRI):
+        c.append(o.get_iri().as_str())
+    if isinstance(o, OWLDatatypeRestriction):
+        c.append(owl_object_sort_key(o.get_datatype()))
+        c.append(tuple(map(owl_object_sort_key, o.facet_restrictions())))
+    if isinstance(o, OWLFacetRestriction):
+        c.append(o.get_facet().get_iri().as_str())
+        c.append(owl_object_sort_key(o.get_facet_value()))
+    if isinstance(o, OWLLiteral):
+        c.append(o.get_literal())
+    if len(c) == 1:
+        raise NotImplementedError(type(o))
+
+    return tuple(c)
+
+
 def _sort_by_ordered_owl_object(i: Iterable[_O]) -> Iterable[_O]:
-    return sorted(i, key=OrderedOWLObject)
+    return sorted(i, key=owl_object_sort_key)
 
 
 class NNF:
@@ -176,20 +222,29 @@ class NNF:
             return ce
         return self.get_class_nnf(union, negated)
 
+    @staticmethod
+    def _data_range_complement(dr: OWLDataRange) -> OWLDataRange:
+        if isinstance(dr, OWLDataComplementOf):
+            return dr.get_data_range()
+        return OWLDataComplementOf(dr)
+
     @get_class_nnf.register
     def _(self, ce: OWLDataSomeValuesFrom, negated: bool = False):
-        # TODO XXX
-        raise NotImplementedError
+        if negated:
+            return OWLDataAllValuesFrom(ce.get_property(), self._data_range_complement(ce.get_filler()))
+        return ce
 
     @get_class_nnf.register
     def _(self, ce: OWLDataAllValuesFrom, negated: bool = False):
-        # TODO XXX
-        raise NotImplementedError
+        if negated:
+            return OWLDataSomeValuesFrom(ce.get_property(), self._data_range_complement(ce.get_filler()))
+        return ce
 
     @get_class_nnf.register
     def _(self, ce: OWLDataHasValue, negated: bool = False):
-        # TODO XXX
-        raise NotImplementedError
+        if negated:
+            return ce.get_object_complement_of()
+        return ce
 
     @get_class_nnf.register
     def _(self, ce: OWLDataExactCardinality, negated: bool = False):
@@ -213,7 +268,10 @@ class IRIFixedSet:
     """A set of IRIs
 
     Call it with a list of IRIs to encode them to a number
-    Call it with a number to get a list of IRIs back"""
+    Call it with a number to get a list of IRIs back
+
+    The positions (bit indexes) of the IRIs only depend on the given order, so the encoded numbers are the same in
+    every process. A set created from the `table` of another one encodes exactly like it."""
     __slots__ = '_iri_idx', '_idx_iri'
 
     _iri_idx: Dict[IRI, int]
@@ -225,8 +283,8 @@ class IRIFixedSet:
         Args:
             iri_set: IRIs in the set
         """
-        fs = frozenset(iri_set)
-        self._idx_iri = list(fs)
+        # first occurrence wins, so that the positions follow the given order
+        self._idx_iri = list(dict.fromkeys(iri_set))
         self._iri_idx = dict(map(reversed, enumerate(self._idx_iri)))
 
     @overload
@@ -258,15 +316,12 @@ class IRIFixedSet:
             return self._encode(arg, ignore_missing=ignore_missing)
         else:
             assert isinstance(arg, Iterable)
-            r: int = 0
-            for i in arg:
-                r |= self._encode(i, ignore_missing=ignore_missing)
-            return r
+            return indices_to_bits(self.indices(arg, ignore_missing=ignore_missing))
 
     def _decode(self, v: int) -> Iterable[IRI]:
-        i: int = 0
-        for i in iter_bits(v):
-            yield self._idx_iri[i.bit_length() - 1]
+        idx_iri = self._idx_iri
+        for idx in bits_to_indices(v).tolist():
+            yield idx_iri[idx]
 
     def _encode(self, i: IRI, ignore_missing: bool) -> int:
         if i in self._iri_idx:
@@ -276,6 +331,56 @@ class IRIFixedSet:
         else:
             raise KeyError(i)
 
+    def index(self, i: IRI) -> int:
+        """Position (bit index) of an IRI in the set
+
+        Raises:
+            KeyError: if the IRI is not in the set
+        """
+        return self._iri_idx[i]
+
+    def by_index(self, idx: int) -> IRI:
+        """IRI at a position (bit index) of the set"""
+        return self._idx_iri[idx]
+
+    def indices(self, arg: Union[int, Iterable[IRI]], *, ignore_missing=False) -> np.ndarray:
+        """Positions (bit indexes) of IRIs, or of the IRIs encoded in a number, as index array
+
+        Args:
+            arg: encoded number or iterable of IRIs
+            ignore_missing: if missing(unrepresentable) IRIs should be silently ignored
+
+        Returns:
+            positions, in ascending order for a number and in input order for IRIs
+
+        Raises:
+            KeyError: if an IRI is not in the set and ignore_missing is False
+        """
+        if isinstance(arg, int):
+            return bits_to_indices(arg)
+        iri_idx = self._iri_idx
+        if ignore_missing:
+            indices = np.fromiter((iri_idx.get(i, -1) for i in arg), dtype=np.intp)
+            return indices[indices >= 0]
+        return np.fromiter((iri_idx[i] for i in arg), dtype=np.intp)
+
+    def add(self, i: IRI) -> int:
+        """Append an IRI to the set, the positions of the other IRIs do not change
+
+        Returns:
+            position (bit index) of the IRI
+        """
+        idx = self._iri_idx.get(i)
+        if idx is None:
+            idx = len(self._idx_iri)
+            self._idx_iri.append(i)
+            self._iri_idx[i] = idx
+        return idx
+
+    def table(self) -> List[IRI]:
+        """Index table of the set: the IRIs in the order of their positions (bit indexes)"""
+        return list(self._idx_iri)
+
     def items(self) -> Iterable[Tuple[int, IRI]]:
         """Return key-value pairs of bit => IRI"""
         for idx, i in enumerate(self._idx_iri):
@@ -285,7 +390,7 @@ class IRIFixedSet:
         return len(self._idx_iri)
 
     def __contains__(self, item: IRI) -> bool:
-        return item in self._idx_iri
+        return item in self._iri_idx
 
 
 class NamedFixedSet(Generic[_HasIRI]):
@@ -340,6 +445,54 @@ class NamedFixedSet(Generic[_HasIRI]):
             except KeyError as ke:
                 raise NameError(f"{self._Type(*ke.args)} not found in {type(self).__name__}") from ke
 
+    def index(self, item: _HasIRI) -> int:
+        """Position (bit index) of an object in the set
+
+        Raises:
+            NameError: if the object is not in the set
+        """
+        try:
+            return self._iri_set.index(item.get_iri())
+        except KeyError as ke:
+            raise NameError(f"{self._Type(*ke.args)} not found in {type(self).__name__}") from ke
+
+    def by_index(self, idx: int) -> _HasIRI:
+        """Object at a position (bit index) of the set"""
+        return self._Type(self._iri_set.by_index(idx))
+
+    def indices(self, arg: Union[int, Iterable[_HasIRI]], *, ignore_missing=False) -> np.ndarray:
+        """Positions (bit indexes) of objects, or of the objects encoded in a number, as index array
+
+        Args:
+            arg: encoded number or iterable of objects
+            ignore_missing: if missing(unrepresentable) objects should be silently ignored
+
+        Returns:
+            positions, in ascending order for a number and in input order for objects
+
+        Raises:
+            NameError: if an object is not in the set and ignore_missing is False
+        """
+        if isinstance(arg, int):
+            return self._iri_set.indices(arg)
+        try:
+            return self._iri_set.indices(map(self._Type.get_iri, arg), ignore_missing=ignore_missing)
+        except KeyError as ke:
+            raise NameError(f"{self._Type(*ke.args)} not found in {type(self).__name__}") from ke
+
+    def add(self, item: _HasIRI) -> int:
+        """Append an object to the set, the positions of the other objects do not change
+
+        Returns:
+            position (bit index) of the object
+        """
+        assert isinstance(item, self._Type)
+        return self._iri_set.add(item.get_iri())
+
+    def table(self) -> List[_HasIRI]:
+        """Index table of the set: the objects in the order of their positions (bit indexes)"""
+        return list(map(self._Type, self._iri_set.table()))
+
     def items(self) -> Iterable[Tuple[int, _HasIRI]]:
         """Return key-value pairs of bit => _HasIRI"""
         t = self._Type
@@ -353,9 +506,137 @@ class NamedFixedSet(Generic[_HasIRI]):
         return isinstance(item, self._Type) and item.get_iri() in self._iri_set
 
 
-def popcount(v: int) -> int:
-    """Count the active bits in a number"""
-    return bin(v).count("1")
+class BoundedCache(Generic[_K, _V]):
+    """Cache with a memory budget in bytes and least-recently-used eviction
+
+    Entries for which `keep` is true are only evicted when no other entry is left, so that cheap but frequently
+    used values (e.g. named classes) survive a flood of one-off deep expressions.
+    """
+    __slots__ = '_entries', '_kept', '_nbytes', '_max_bytes', '_keep', '_sizeof', 'hits', 'misses', 'evictions'
+
+    _entries: 'OrderedDict[_K, _V]'
+    _kept: 'OrderedDict[_K, _V]'
+    _nbytes: int
+    _max_bytes: Optional[int]
+    _keep: Optional[Callable[[_K], bool]]
+    _sizeof: Callable[[_V], int]
+
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, max_bytes: Optional[int] = None, keep: Optional[Callable[[_K], bool]] = None,
+                 sizeof: Callable[[_V], int] = sys.getsizeof):
+        """Create an empty cache
+
+        Args:
+            max_bytes: memory budget for the cached values, None for no limit
+            keep: predicate on keys whose entries are evicted last
+            sizeof: function that estimates the memory used by a value
+        """
+        self._entries = OrderedDict()
+        self._kept = OrderedDict()
+        self._nbytes = 0
+        self._max_bytes = max_bytes
+        self._keep = keep
+        self._sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: _K, default: Optional[_V] = None) -> Optional[_V]:
+        """Look up a value and mark it as recently used, counting hits and misses"""
+        for d in (self._entries, self._kept):
+            if key in d:
+                self.hits += 1
+                d.move_to_end(key)
+                return d[key]
+        self.misses += 1
+        return default
+
+    def __getitem__(self, key: _K) -> _V:
+        for d in (self._entries, self._kept):
+            if key in d:
+                d.move_to_end(key)
+                return d[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: _K, value: _V) -> None:
+        self.pop(key, None)
+        if self._keep is not None and self._keep(key):
+            self._kept[key] = value
+        else:
+            self._entries[key] = value
+        self._nbytes += self._sizeof(value)
+        self._evict(key)
+
+    def __contains__(self, key: _K) -> bool:
+        return key in self._entries or key in self._kept
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._kept)
+
+    def keys(self) -> Iterable[_K]:
+        """Keys of all entries, without marking them as used"""
+        yield from self._entries.keys()
+        yield from self._kept.keys()
+
+    def pop(self, key: _K, *default):
+        """Remove an entry and return its value"""
+        for d in (self._entries, self._kept):
+            if key in d:
+                value = d.pop(key)
+                self._nbytes -= self._sizeof(value)
+                return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def _evict(self, protected: _K) -> None:
+        if self._max_bytes is None:
+            return
+        for d in (self._entries, self._kept):
+            while self._nbytes > self._max_bytes and d:
+                key = next(iter(d))
+                if key == protected:
+                    if len(d) == 1:
+                        break
+                    d.move_to_end(key)
+                    continue
+                self._nbytes -= self._sizeof(d.pop(key))
+                self.evictions += 1
+
+    def nbytes(self) -> int:
+        """Estimated memory used by the cached values"""
+        return self._nbytes
+
+    def clear(self) -> None:
+        """Remove all entries (statistics are kept)"""
+        self._entries.clear()
+        self._kept.clear()
+        self._nbytes = 0
+
+    def copy(self) -> 'BoundedCache[_K, _V]':
+        """Shallow copy with the same budget and fresh statistics"""
+        new = BoundedCache(self._max_bytes, self._keep, self._sizeof)
+        new._entries = self._entries.copy()
+        new._kept = self._kept.copy()
+        new._nbytes = self._nbytes
+        return new
+
+    def __repr__(self):
+        return f'{type(self).__name__}(entries={len(self)}, nbytes={self._nbytes}, max_bytes={self._max_bytes}, ' \
+               f'hits={self.hits}, misses={self.misses}, evictions={self.evictions})'
+
+
+if hasattr(int, 'bit_count'):
+    def popcount(v: int) -> int:
+        """Count the active bits in a number"""
+        return v.bit_count()
+else:
+    def popcount(v: int) -> int:
+        """Count the active bits in a number"""
+        return bin(v).count("1")
 
 
 def iter_bits(v: int) -> Iterable[int]:
@@ -373,6 +654,40 @@ def iter_bits(v: int) -> Iterable[int]:
         v ^= b
 
 
+def bits_to_mask(v: int, size: int) -> np.ndarray:
+    """Unpack the bits of a number into a boolean array
+
+    Args:
+        v: input number
+        size: length of the result, bits above are ignored
+
+    Returns:
+        boolean array with True at each position whose bit is set in v
+    """
+    n_bytes = max((size + 7) // 8, (v.bit_length() + 7) // 8)
+    b = np.frombuffer(v.to_bytes(n_bytes, 'little'), dtype=np.uint8)
+    return np.unpackbits(b, count=size, bitorder='little').view(np.bool_)
+
+
+def mask_to_bits(mask: np.ndarray) -> int:
+    """Pack a boolean array into a number, the inverse of `bits_to_mask`"""
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def bits_to_indices(v: int) -> np.ndarray:
+    """Positions of the active bits in a number, in ascending order"""
+    return np.flatnonzero(bits_to_mask(v, v.bit_length()))
+
+
+def indices_to_bits(indices: np.ndarray) -> int:
+    """Number with the bits at the given positions active, the inverse of `bits_to_indices`"""
+    if len(indices) == 0:
+        return 0
+    mask = np.zeros(int(indices.max()) + 1, dtype=np.bool_)
+    mask[indices] = True
+    return mask_to_bits(mask)
+
+
 def iter_count(i: Iterable) -> int:
     """Count the number of elements in an iterable"""
     return sum(1 for _ in i)
@@ -59,3 +59,32 @@ class XSDVocabulary(_Vocabulary, Enum, metaclass=_meta_Enum):
     FLOAT: Final = "float"  #:
     BOOLEAN: Final = "boolean"  #:
     DATE_TIME_STAMP: Final = "dateTimeStamp"  #:
+
+
+class OWLFacet(_Vocabulary, Enum, metaclass=_meta_Enum):
+    """Enumerations for OWL facets."""
+    def __new__(cls, remainder: str, *args):
+        obj = object.__new__(cls)
+        obj._value_ = f"{namespaces.XSD.prefix}:{remainder}"
+        return obj
+
+    def __init__(self, remainder: str, symbolic_form: str):
+        super().__init__(namespaces.XSD, remainder)
+        self._symbolic_form = symbolic_form
+
+    def get_symbolic_form(self) -> str:
+        """Symbol of the facet, e.g. >= for minInclusive"""
+        return self._symbolic_form
+
+    @staticmethod
+    def from_str(name: str) -> 'OWLFacet':
+        """Get the facet with the given symbolic form"""
+        for f in OWLFacet:
+            if f.get_symbolic_form() == name:
+                return f
+        raise ValueError(f"No such facet: {name}")
+
+    MIN_INCLUSIVE: Final = ("minInclusive", ">=")  #:
+    MIN_EXCLUSIVE: Final = ("minExclusive", ">")  #:
+    MAX_INCLUSIVE: Final = ("maxInclusive", "<=")  #:
+    MAX_EXCLUSIVE: Final = ("maxExclusive", "<")  #:
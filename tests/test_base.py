@@ -1,8 +1,11 @@
 """ Test the base module"""
 import os
+import subprocess
+import sys
 
 from ontolearn.knowledge_base import KnowledgeBase
 from ontolearn.utils import setup_logging
+from owlapy.model import OWLObjectSomeValuesFrom, OWLObjectProperty, OWLNamedIndividual, OWLClass, IRI
 
 setup_logging("logging_test.conf")
 
@@ -29,6 +32,84 @@ def test_multiple_knowledge_bases():
     # (that refers to the family ontology)
 
 
+def test_knowledge_base_bounded_cache():
+    kb = KnowledgeBase(path=PATH_FAMILY, individuals_cache_max_bytes=1)
+    unbounded = KnowledgeBase(path=PATH_FAMILY)
+    has_child = OWLObjectProperty(IRI.create('http://www.benchmark.org/family#', 'hasChild'))
+    for c in kb.get_all_sub_concepts(kb.thing):
+        ce = OWLObjectSomeValuesFrom(property=has_child, filler=c)
+        assert kb.individuals_set(ce) == unbounded.individuals_set(ce)
+        assert kb.individuals_count(c) == unbounded.individuals_count(c)
+    assert kb._ind_cache.evictions > 0
+
+
+def test_knowledge_base_batch():
+    kb = KnowledgeBase(path=PATH_FAMILY)
+    single = KnowledgeBase(path=PATH_FAMILY)
+    has_child = OWLObjectProperty(IRI.create('http://www.benchmark.org/family#', 'hasChild'))
+    concepts = list(kb.get_all_sub_concepts(kb.thing))
+    expressions = [kb.intersection((a, OWLObjectSomeValuesFrom(property=has_child, filler=b)))
+                   for a in concepts[:5] for b in concepts[:5]]
+    expressions += [kb.union(expressions[:3]), expressions[0]]
+    assert kb.individuals_set_batch(expressions) == [single.individuals_set(ce) for ce in expressions]
+    assert KnowledgeBase(path=PATH_FAMILY, use_individuals_cache=False).individuals_set_batch(expressions[:2]) == \
+        [single.individuals_set(ce) for ce in expressions[:2]]
+
+
+def test_knowledge_base_membership():
+    kb = KnowledgeBase(path=PATH_FAMILY)
+    has_child = OWLObjectProperty(IRI.create('http://www.benchmark.org/family#', 'hasChild'))
+    concepts = list(kb.get_all_sub_concepts(kb.thing))[:5]
+    concepts.append(OWLObjectSomeValuesFrom(property=has_child, filler=concepts[0]))
+    individuals = list(kb.individuals())[::7]
+    individuals.append(OWLNamedIndividual(IRI.create('http://www.benchmark.org/family#', 'nobody')))
+    labels = kb.individuals_membership(individuals, concepts)
+    assert labels.shape == (len(individuals), len(concepts))
+    assert labels.any()
+    for j, ce in enumerate(concepts):
+        instances = frozenset(kb.individuals(ce))
+        assert [i in instances for i in individuals] == labels[:, j].tolist()
+    assert (KnowledgeBase(path=PATH_FAMILY, use_individuals_cache=False).individuals_membership(individuals, concepts)
+            == labels).all()
+
+
+def test_knowledge_base_reasoner_updates():
+    NS = 'http://example.com/father#'
+    kb = KnowledgeBase(path=PATH_FATHER)
+    reasoner = kb.reasoner()
+    has_child = OWLObjectProperty(IRI.create(NS, 'hasChild'))
+    heinz = OWLNamedIndividual(IRI.create(NS, 'heinz'))
+    newbie = OWLNamedIndividual(IRI.create(NS, 'newbie'))
+    ce = OWLObjectSomeValuesFrom(property=has_child, filler=OWLClass(IRI.create(NS, 'male')))
+    assert kb.individuals_count(ce) == 3
+
+    reasoner.add_property_assertion(OWLNamedIndividual(IRI.create(NS, 'michelle')), has_child, heinz)
+    reasoner.add_property_assertion(newbie, has_child, heinz)
+    kb.clean()
+    assert kb.individuals_count(ce) == 5
+    assert set(kb.individuals(ce)) == set(reasoner.instances(ce))
+    assert newbie in set(kb.individuals())
+    assert kb.individuals_count() == 7
+
+    reasoner.reset()
+    kb.clean()
+    assert kb.individuals_count(ce) == 3
+    assert newbie not in set(kb.individuals())
+
+
+def test_knowledge_base_individuals_table():
+    kb = KnowledgeBase(path=PATH_FAMILY)
+    table = kb.individuals_table()
+    assert len(table) == kb.individuals_count()
+    assert all(kb.individuals_set(i).v == 1 << idx for idx, i in enumerate(table))
+    # the positions do not depend on the hash seed of the process
+    code = "from ontolearn.knowledge_base import KnowledgeBase; " \
+           f"print('\\n'.join(i.get_iri().as_str() for i in KnowledgeBase(path={PATH_FAMILY!r}).individuals_table()))"
+    out = subprocess.run([sys.executable, '-c', code], env={**os.environ, 'PYTHONHASHSEED': '1'},
+                         capture_output=True, text=True, check=True).stdout
+    assert out.split() == [i.get_iri().as_str() for i in table]
+
+
 # def test_knowledge_base_save():
 #     kb = KnowledgeBase(path=PATH_FAMILY)
 #     kb.save('test_kb_save', rdf_format='nt')
@@ -1,13 +1,16 @@
 """ Test the default pipeline for structured machine learning"""
 import json
 import unittest
+from unittest import mock
 
 from ontolearn import KnowledgeBase
 from ontolearn.concept_learner import CELOE
+from ontolearn.core.owl.utils import ConceptCanonicalizer, OperandSetTransform
 from ontolearn.learning_problem import PosNegLPStandard
 from ontolearn.model_adapter import ModelAdapter
+from ontolearn.search import ExtensionIndex
 from ontolearn.utils import setup_logging
-from owlapy.model import OWLNamedIndividual, OWLClass, IRI
+from owlapy.model import OWLNamedIndividual, OWLClass, OWLObjectComplementOf, IRI
 from owlapy.render import DLSyntaxObjectRenderer
 
 setup_logging("logging_test.conf")
@@ -119,6 +122,112 @@ class Celoe_Test(unittest.TestCase):
         self.assertEqual(q, q2)
         self.assertEqual(str_concept, str_concept2)
 
+    def test_deduplicate_extensions(self):
+        kb = KnowledgeBase(path=PATH_FAMILY)
+
+        pos_aunt = set(map(OWLNamedIndividual,
+                           map(IRI.create,
+                               settings['problems']['Aunt']['positive_examples'])))
+        neg_aunt = set(map(OWLNamedIndividual,
+                           map(IRI.create,
+                               settings['problems']['Aunt']['negative_examples'])))
+        lp = PosNegLPStandard(pos=pos_aunt, neg=neg_aunt)
+
+        model = CELOE(knowledge_base=kb, max_runtime=1000, max_num_of_concepts_tested=300,
+                      deduplicate_extensions=True)
+        model.fit(learning_problem=lp)
+        self.assertGreater(model.extension_index.dropped, 0)
+
+        # no node in the queue is longer than another one with the same extension
+        shortest = dict()
+        for node in model.heuristic_queue:
+            individuals = kb.individuals_set(node.concept)
+            shortest[individuals] = min(shortest.get(individuals, node.len), node.len)
+        for node in model.heuristic_queue:
+            self.assertEqual(node.len, shortest[kb.individuals_set(node.concept)])
+
+        model.clean()
+        self.assertEqual(len(model.extension_index), 0)
+        self.assertEqual(model.extension_index.dropped, 0)
+        self.assertIsNone(CELOE(knowledge_base=kb).extension_index)
+
+    def test_extension_index_collisions(self):
+        class Extension(frozenset):
+            def __hash__(self):
+                return 0
+
+        class Node:
+            def __init__(self, length, individuals):
+                self.len = length
+                self.individuals = individuals
+
+        index = ExtensionIndex(lambda node: node.individuals)
+        a, b = Extension({1}), Extension({2})
+        short_a, long_b, short_b = Node(2, a), Node(3, b), Node(1, b)
+        self.assertEqual(index.add(a, short_a), [])
+        self.assertEqual(index.get(b), [])
+        self.assertEqual(index.add(b, long_b), [])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.add(b, short_b), [long_b])
+        self.assertEqual(index.get(a), [short_a])
+        self.assertEqual(index.get(b), [short_b])
+        self.assertEqual(index.merged, 1)
+
+    def test_batch_skips_seen_concepts(self):
+        kb = KnowledgeBase(path=PATH_FAMILY)
+        fresh_kb = KnowledgeBase(path=PATH_FAMILY)
+
+        pos_aunt = set(map(OWLNamedIndividual,
+                           map(IRI.create,
+                               settings['problems']['Aunt']['positive_examples'])))
+        neg_aunt = set(map(OWLNamedIndividual,
+                           map(IRI.create,
+                               settings['problems']['Aunt']['negative_examples'])))
+        lp = PosNegLPStandard(pos=pos_aunt, neg=neg_aunt)
+
+        model = CELOE(knowledge_base=kb, max_runtime=1000, max_num_of_concepts_tested=600)
+        batches = []
+        individuals_set_batch = KnowledgeBase.individuals_set_batch
+
+        def record_batch(self, expressions):
+            # the normal forms that were seen before the batch is evaluated
+            seen = dict(model._seen_norm_concepts)
+            norm_concepts = [model._expression_store.add(canonicalizer.canonical(ce)) for ce in expressions]
+            batches.append((expressions, norm_concepts, seen))
+            return individuals_set_batch(self, expressions)
+
+        canonicalizer = ConceptCanonicalizer()
+        with mock.patch.object(KnowledgeBase, 'individuals_set_batch', autospec=True, side_effect=record_batch):
+            model.fit(learning_problem=lp)
+
+        self.assertTrue(any(batch for batch, _, _ in batches))
+        transform = OperandSetTransform()
+        for batch, norm_concepts, seen in batches:
+            forms = [transform.simplify_operands(ce) for ce in batch]
+            self.assertEqual(len(forms), len(set(forms)))
+            for ce, norm_concept in zip(batch, norm_concepts):
+                if norm_concept in seen:
+                    self.assertNotEqual(transform.simplify_operands(seen[norm_concept]),
+                                        transform.simplify_operands(ce))
+        for concept, tree_node in model.search_tree.items():
+            self.assertEqual(tree_node.node.individuals_count, fresh_kb.individuals_count(concept))
+        # the operands of every refinement are released once it was added or skipped
+        self.assertEqual(model._refinement_operands, {})
+
+    def test_negated_concept_not_reused(self):
+        kb = KnowledgeBase(path=PATH_FAMILY)
+        fresh_kb = KnowledgeBase(path=PATH_FAMILY)
+        model = CELOE(knowledge_base=kb)
+        individuals = kb.individuals()
+        model._learning_problem = PosNegLPStandard(pos={next(individuals)}, neg={next(individuals)}).encode_kb(kb)
+
+        # ¬¬Female has the canonical form of Female, but no instances without negation as failure
+        female = OWLClass(IRI.create('http://www.benchmark.org/family#Female'))
+        for concept in (female, OWLObjectComplementOf(OWLObjectComplementOf(female))):
+            node = model.make_node(concept, is_root=True)
+            model._add_node(node, None)
+            self.assertEqual(node.individuals_count, fresh_kb.individuals_count(concept))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+import gc
+import random
+import unittest
+import weakref
+
+from ontolearn.core.owl.utils import ConceptCanonicalizer, ConceptOperandSorter, OperandSetTransform
+from ontolearn.knowledge_base import KnowledgeBase
+from ontolearn.refinement_operators import ModifiedCELOERefinement
+from ontolearn.utils import setup_logging
+from owlapy.model import OWLClass, OWLObjectProperty, OWLObjectSomeValuesFrom, OWLObjectAllValuesFrom, \
+    OWLObjectIntersectionOf, OWLObjectUnionOf, OWLObjectComplementOf, OWLObjectMinCardinality, \
+    OWLObjectMaxCardinality, OWLObjectExactCardinality, OWLObjectHasValue, OWLObjectOneOf, OWLNamedIndividual, \
+    OWLObjectHasSelf, OWLThing, OWLNothing, IRI
+from owlapy.util import OrderedOWLObject, owl_object_sort_key
+
+setup_logging("logging_test.conf")
+
+PATH_FAMILY = 'KGs/Family/family-benchmark_rich_background.owl'
+
+
+class Core_ConceptCanonicalizer_Test(unittest.TestCase):
+    def test_canonical(self):
+        NS = "http://example.com/father#"
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        heinz = OWLNamedIndividual(IRI(NS, 'heinz'))
+        anna = OWLNamedIndividual(IRI(NS, 'anna'))
+
+        canonicalizer = ConceptCanonicalizer()
+        # ¬(female ⊓ ∃ hasChild.⊤) = ¬female ⊔ ∀ hasChild.⊥
+        ce = OWLObjectComplementOf(OWLObjectIntersectionOf((female, OWLObjectSomeValuesFrom(has_child, OWLThing))))
+        self.assertEqual(canonicalizer.canonical(ce),
+                         OWLObjectUnionOf((OWLObjectComplementOf(female),
+                                           OWLObjectAllValuesFrom(has_child, OWLNothing))))
+        # male ⊓ (male ⊓ (⊤ ⊓ female)) = female ⊓ male
+        ce = OWLObjectIntersectionOf((male, OWLObjectIntersectionOf((male, OWLObjectIntersectionOf((OWLThing,
+                                                                                                    female))))))
+        self.assertEqual(canonicalizer.canonical(ce), OWLObjectIntersectionOf((female, male)))
+        self.assertEqual(canonicalizer.canonical(OWLObjectUnionOf((male, OWLThing))), OWLThing)
+        self.assertEqual(canonicalizer.canonical(OWLObjectIntersectionOf((male, OWLNothing))), OWLNothing)
+        self.assertEqual(canonicalizer.canonical(OWLObjectComplementOf(OWLObjectComplementOf(male))), male)
+        # ¬(≥ 2 hasChild.¬¬male) = ≤ 1 hasChild.male
+        ce = OWLObjectComplementOf(OWLObjectMinCardinality(2, has_child,
+                                                           OWLObjectComplementOf(OWLObjectComplementOf(male))))
+        self.assertEqual(canonicalizer.canonical(ce), OWLObjectMaxCardinality(1, has_child, male))
+        # ¬(≥ 0 hasChild.male) = ⊥
+        self.assertEqual(canonicalizer.canonical(OWLObjectComplementOf(OWLObjectMinCardinality(0, has_child, male))),
+                         OWLNothing)
+        ce = OWLObjectExactCardinality(1, has_child, male)
+        self.assertEqual(canonicalizer.canonical(ce),
+                         OWLObjectIntersectionOf((OWLObjectMinCardinality(1, has_child, male),
+                                                  OWLObjectMaxCardinality(1, has_child, male))))
+        self.assertEqual(canonicalizer.canonical(OWLObjectHasValue(has_child, heinz)),
+                         OWLObjectSomeValuesFrom(has_child, OWLObjectOneOf(heinz)))
+        self.assertEqual(canonicalizer.canonical(OWLObjectOneOf((heinz, anna, heinz))),
+                         OWLObjectUnionOf((OWLObjectOneOf(anna), OWLObjectOneOf(heinz))))
+
+        # forms in canonical form are kept and memoized
+        ce = OWLObjectUnionOf((male, OWLObjectSomeValuesFrom(has_child, female)))
+        self.assertIs(canonicalizer.canonical(ce), ce)
+        self.assertIn(ce, canonicalizer._positive)
+        self.assertIsNone(canonicalizer._positive[ce])
+        self.assertIs(canonicalizer.canonical(ce), ce)
+
+        # negated forms that wrap their own expression do not keep it alive
+        ce = OWLObjectHasSelf(has_child)
+        self.assertEqual(canonicalizer.canonical(OWLObjectComplementOf(ce)), OWLObjectComplementOf(ce))
+        self.assertIsNone(canonicalizer._negative[ce])
+        self.assertEqual(canonicalizer.canonical(OWLObjectComplementOf(ce)), OWLObjectComplementOf(ce))
+        ref = weakref.ref(ce)
+        del ce
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(len(canonicalizer._negative), 0)
+
+    def test_refinements(self):
+        kb = KnowledgeBase(path=PATH_FAMILY)
+        rho = ModifiedCELOERefinement(kb)
+        refinements = []
+        for ce in rho.refine(kb.thing, max_length=5, current_domain=kb.thing):
+            refinements.append(ce)
+            refinements.extend(rho.refine(ce, max_length=6, current_domain=kb.thing))
+        refinements = list(set(refinements))
+        random.Random(1).shuffle(refinements)
+
+        self.assertEqual(sorted(refinements, key=owl_object_sort_key), sorted(refinements, key=OrderedOWLObject))
+
+        canonicalizer = ConceptCanonicalizer()
+        sorter = ConceptOperandSorter()
+        for ce in refinements:
+            self.assertEqual(canonicalizer.sort(ce), sorter.sort(ce))
+            canonical = canonicalizer.canonical(ce)
+            self.assertEqual(canonicalizer.canonical(canonical), canonical)
+            self.assertEqual(canonicalizer.canonical(OperandSetTransform().simplify(ce)), canonical)
+            self.assertEqual(kb.individuals_set(canonical), kb.individuals_set(ce))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from ontolearn.core.owl.utils import ExpressionStore
+from ontolearn.knowledge_base import KnowledgeBase
+from ontolearn.refinement_operators import ModifiedCELOERefinement
+from ontolearn.utils import setup_logging
+from owlapy.model import OWLClass, OWLObjectProperty, OWLObjectSomeValuesFrom, OWLObjectIntersectionOf, \
+    OWLObjectComplementOf, OWLObjectMinCardinality, OWLObjectHasValue, OWLNamedIndividual, OWLDataSomeValuesFrom, \
+    OWLDataProperty, OWLDatatypeRestriction, OWLFacetRestriction, IntegerOWLDatatype, IRI
+from owlapy.vocab import OWLFacet
+
+setup_logging("logging_test.conf")
+
+PATH_FAMILY = 'KGs/Family/family-benchmark_rich_background.owl'
+
+
+class Core_ExpressionStore_Test(unittest.TestCase):
+    def test_round_trip(self):
+        NS = "http://example.com/father#"
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        age = OWLDataProperty(IRI(NS, 'age'))
+        heinz = OWLNamedIndividual(IRI(NS, 'heinz'))
+
+        some_female = OWLObjectSomeValuesFrom(property=has_child, filler=female)
+        expressions = [
+            male,
+            OWLObjectIntersectionOf((male, some_female)),
+            OWLObjectComplementOf(OWLObjectIntersectionOf((male, some_female))),
+            OWLObjectMinCardinality(cardinality=2, property=has_child.get_inverse_property(), filler=some_female),
+            OWLObjectHasValue(property=has_child, individual=heinz),
+            OWLDataSomeValuesFrom(property=age, filler=OWLDatatypeRestriction(
+                IntegerOWLDatatype, OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 18))),
+        ]
+        store = ExpressionStore()
+        ids = [store.add(ce) for ce in expressions]
+        self.assertEqual(len(set(ids)), len(expressions))
+        for id_, ce in zip(ids, expressions):
+            self.assertEqual(store.get(id_), ce)
+            self.assertEqual(store.add(ce), id_)
+
+        # leaves are only indexed by their objects
+        self.assertEqual(len(store._ids), len(store) - len(store._leaves))
+        # male ⊓ ∃ hasChild.female is shared with its complement
+        self.assertEqual(store.operands(ids[2]), (ids[1],))
+        size = len(store)
+        store.add(OWLObjectSomeValuesFrom(property=has_child, filler=OWLObjectIntersectionOf((male, some_female))))
+        self.assertEqual(len(store), size + 1)
+
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.nbytes(), 0)
+
+    def test_refinements(self):
+        kb = KnowledgeBase(path=PATH_FAMILY)
+        rho = ModifiedCELOERefinement(kb)
+        store = ExpressionStore()
+        refinements = []
+        for ce in rho.refine(kb.thing, max_length=5, current_domain=kb.thing):
+            refinements.append(ce)
+            refinements.extend(rho.refine(ce, max_length=5, current_domain=kb.thing))
+        ids = [store.add(ce) for ce in refinements]
+        self.assertEqual(len(set(ids)), len(set(refinements)))
+        self.assertEqual([store.get(id_) for id_ in ids], refinements)
+
+
+if __name__ == '__main__':
+    unittest.main()
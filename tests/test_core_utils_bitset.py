@@ -0,0 +1,156 @@
+import random
+import sys
+import unittest
+
+from ontolearn.core.utils import BitSet, NumpyBitSet, RoaringBitSet, DensityBitSetFactory
+from ontolearn.knowledge_base import KnowledgeBase
+from ontolearn.learning_problem import PosNegLPStandard
+from ontolearn.metrics import F1
+from ontolearn.utils import setup_logging
+from owlapy.model import OWLClass, OWLNamedIndividual, IRI, OWLObjectProperty, OWLObjectIntersectionOf, \
+    OWLObjectSomeValuesFrom
+
+setup_logging("logging_test.conf")
+
+PATH_FATHER = 'KGs/father.owl'
+
+
+class Core_NumpyBitSet_Test(unittest.TestCase):
+    def test_same_as_bitset(self):
+        rnd = random.Random(1)
+        size = 200
+        for _ in range(50):
+            a, b = rnd.getrandbits(size), rnd.getrandbits(size) & rnd.getrandbits(size)
+            ba, bb = BitSet(a), BitSet(b)
+            na, nb = NumpyBitSet(a, size), NumpyBitSet(b, size)
+            self.assertEqual(len(ba), len(na))
+            self.assertEqual((ba & bb).v, (na & nb).v)
+            self.assertEqual((ba | bb).v, (na | nb).v)
+            self.assertEqual((ba - bb).v, (na - nb).v)
+            self.assertEqual((ba ^ bb).v, (na ^ nb).v)
+            self.assertEqual(ba.isdisjoint(bb), na.isdisjoint(nb))
+            self.assertEqual(ba.issubset(ba | bb), na.issubset(na | nb))
+            self.assertEqual(list(ba), list(na))
+            self.assertEqual(na, NumpyBitSet(a, size))
+            self.assertEqual(hash(na), hash(NumpyBitSet(a, size)))
+            self.assertEqual(hash(na), hash(ba))
+            self.assertEqual({ba: 1}.get(na), 1)
+
+    def test_contains(self):
+        s = NumpyBitSet(0b1010_0000_0000, 130)
+        self.assertIn(1 << 9, s)
+        self.assertNotIn(1 << 8, s)
+        self.assertNotIn(1 << 129, s)
+        self.assertIn(NumpyBitSet(1 << 11, 130), s)
+        self.assertEqual(len(NumpyBitSet()), 0)
+
+    def test_knowledge_base(self):
+        NS = 'http://example.com/father#'
+        kb = KnowledgeBase(path=PATH_FATHER, bitset_factory=NumpyBitSet)
+        male = OWLClass(IRI.create(NS, 'male'))
+        male_set = kb.individuals_set(male)
+        self.assertIsInstance(male_set, NumpyBitSet)
+        self.assertEqual(len(male_set), kb.individuals_count(male))
+        self.assertEqual(len(kb.all_individuals_set()), kb.individuals_count())
+
+        pos = {OWLNamedIndividual(IRI.create(NS, 'stefan')), OWLNamedIndividual(IRI.create(NS, 'markus')),
+               OWLNamedIndividual(IRI.create(NS, 'martin'))}
+        neg = {OWLNamedIndividual(IRI.create(NS, 'heinz')), OWLNamedIndividual(IRI.create(NS, 'anna')),
+               OWLNamedIndividual(IRI.create(NS, 'michelle'))}
+        lp = PosNegLPStandard(pos=pos, neg=neg).encode_kb(kb)
+        self.assertEqual(F1().score(male_set, lp), (True, 0.85714))
+
+
+class Core_RoaringBitSet_Test(unittest.TestCase):
+    def test_same_as_bitset(self):
+        rnd = random.Random(1)
+        size = 300_000
+        for _ in range(20):
+            # mix of empty, sparse (array) and dense (bitmap) chunks
+            a = sum(1 << rnd.randrange(size) for _ in range(rnd.randrange(3000)))
+            a |= rnd.getrandbits(1 << 16) << (rnd.randrange(4) << 16)
+            b = a & rnd.getrandbits(size) | sum(1 << rnd.randrange(size) for _ in range(100))
+            ba, bb = BitSet(a), BitSet(b)
+            ra, rb = RoaringBitSet(a, size), RoaringBitSet(b, size)
+            self.assertEqual(len(ba), len(ra))
+            self.assertEqual((ba & bb).v, (ra & rb).v)
+            self.assertEqual((ba | bb).v, (ra | rb).v)
+            self.assertEqual((ba - bb).v, (ra - rb).v)
+            self.assertEqual((ba ^ bb).v, (ra ^ rb).v)
+            self.assertEqual(ba.isdisjoint(bb), ra.isdisjoint(rb))
+            self.assertEqual(bb.issubset(ba), rb.issubset(ra))
+            self.assertTrue(ra.issubset(ra | rb))
+            self.assertEqual((ra & bb).v, (ba & bb).v)
+            self.assertEqual((ba & rb).v, (ba & bb).v)
+            self.assertEqual(ra, RoaringBitSet(a, size))
+            self.assertEqual(ra, ba)
+            self.assertEqual(hash(ra), hash(RoaringBitSet(a, size)))
+        self.assertEqual(list(RoaringBitSet(0b1011)), [1, 2, 8])
+
+    def test_contains(self):
+        s = RoaringBitSet(0b1010_0000_0000 | 1 << 70_000, 100_000)
+        self.assertIn(1 << 9, s)
+        self.assertNotIn(1 << 8, s)
+        self.assertIn(1 << 70_000, s)
+        self.assertNotIn(1 << 99_999, s)
+        self.assertIn(RoaringBitSet(1 << 11), s)
+        self.assertEqual(len(RoaringBitSet()), 0)
+
+    def test_density_factory(self):
+        factory = DensityBitSetFactory()
+        self.assertIsInstance(factory(0b1, 100), RoaringBitSet)
+        self.assertIsInstance(factory(0b1111, 100), BitSet)
+
+        NS = 'http://example.com/father#'
+        kb = KnowledgeBase(path=PATH_FATHER, bitset_factory=DensityBitSetFactory(threshold=0.5))
+        male = OWLClass(IRI.create(NS, 'male'))
+        self.assertIsInstance(kb.individuals_set(male), BitSet)
+        stefan = OWLNamedIndividual(IRI.create(NS, 'stefan'))
+        self.assertIsInstance(kb.individuals_set(stefan), RoaringBitSet)
+        self.assertIn(kb.individuals_set(stefan), kb.individuals_set(male))
+
+        # the cache keeps the compressed sets and charges their memory
+        kb = KnowledgeBase(path=PATH_FATHER, bitset_factory=DensityBitSetFactory(threshold=0.2))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI.create(NS, 'hasChild'))
+        sparse = OWLObjectIntersectionOf((female, OWLObjectSomeValuesFrom(has_child, male)))
+        self.assertEqual(kb.individuals_count(sparse), 1)
+        self.assertIsInstance(kb._ind_cache[sparse], RoaringBitSet)
+        self.assertIs(kb.individuals_set(sparse), kb._ind_cache[sparse])
+        self.assertEqual(kb._ind_cache.nbytes(),
+                         sum(sys.getsizeof(kb._ind_cache[ce]) for ce in list(kb._ind_cache.keys())))
+        self.assertEqual(kb.individuals_set_batch([sparse]), [kb.individuals_set(sparse)])
+
+    def test_mixed_operations(self):
+        rnd = random.Random(2)
+        size = 200_000
+        for _ in range(5):
+            a = sum(1 << rnd.randrange(size) for _ in range(50))
+            b = rnd.getrandbits(size)
+            for x in (RoaringBitSet(a, size), RoaringBitSet(b, size)):
+                for y in (BitSet(b), NumpyBitSet(b, size), b, BitSet(a), NumpyBitSet(a, size)):
+                    v = y if isinstance(y, int) else y.v
+                    self.assertEqual((x & y).v, x.v & v)
+                    self.assertEqual((x - y).v, x.v & ~v)
+                    self.assertEqual((x | y).v, x.v | v)
+                    if not isinstance(y, int):
+                        self.assertEqual((y & x).v, x.v & v)
+                        self.assertEqual((y | x).v, x.v | v)
+            w = NumpyBitSet(a, size).w
+            self.assertEqual(RoaringBitSet(a, size).words(len(w))[:len(w)].tolist(), w.tolist())
+
+    def test_hash_across_types(self):
+        rnd = random.Random(1)
+        for v in (0, 5, rnd.getrandbits(200), rnd.getrandbits(100_000)):
+            sets = [BitSet(v), NumpyBitSet(v, 100_000), RoaringBitSet(v, 100_000)]
+            for a in sets:
+                for b in sets:
+                    self.assertEqual(a, b)
+                    self.assertEqual(hash(a), hash(b))
+            self.assertEqual({BitSet(v): 1}.get(RoaringBitSet(v, 100_000)), 1)
+            self.assertEqual({RoaringBitSet(v, 100_000): 1}.get(NumpyBitSet(v, 100_000)), 1)
+        self.assertNotEqual(hash(RoaringBitSet(5)), hash(RoaringBitSet(6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -54,6 +54,29 @@ class Core_OWLClassExpressionLengthMetric_Test(unittest.TestCase):
         # ≥ 2 hasChild.⊤
         self.assertEqual(le, 4)
 
+    def test_memoized_length(self):
+        NS = "http://example.com/father#"
+
+        cl = OWLClassExpressionLengthMetric.get_default()
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+
+        part = OWLObjectSomeValuesFrom(property=has_child, filler=OWLObjectComplementOf(female))
+        self.assertEqual(cl.length(part), 4)
+        self.assertIn(part, cl._lengths)
+        # built from the memoized part
+        ce = OWLObjectIntersectionOf((male, part))
+        self.assertEqual(cl.length(ce), 6)
+        self.assertEqual(cl.length(OWLObjectIntersectionOf((male, part))), 6)
+        self.assertEqual(cl.length(OWLObjectUnionOf((ce, part))), 11)
+        # other weights are memoized separately
+        cl2 = OWLClassExpressionLengthMetric.get_default()
+        cl2.object_complement_length = 3
+        self.assertEqual(cl2.length(ce), 8)
+        self.assertEqual(cl.length(ce), 6)
+
 
 if __name__ == '__main__':
     unittest.main()
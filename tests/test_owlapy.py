@@ -2,8 +2,9 @@ import unittest
 
 from owlapy import namespaces
 from owlapy.namespaces import Namespaces
-from owlapy.model import OWLClass, OWLObjectUnionOf, IRI
-from owlapy.util import IRIFixedSet
+from owlapy.model import OWLClass, OWLObjectUnionOf, OWLObjectIntersectionOf, OWLObjectSomeValuesFrom, \
+    OWLObjectProperty, IRI
+from owlapy.util import IRIFixedSet, BoundedCache
 
 base = Namespaces("ex", "http://example.org/")
 
@@ -17,6 +18,18 @@ class Owlapy_Test(unittest.TestCase):
         self.assertIs(i1, i1x)
         self.assertNotEqual(i1, i2)
 
+    def test_iri_create(self):
+        i1 = IRI.create("http://example.org/I1")
+        self.assertIs(i1, IRI(base, "I1"))
+        self.assertIs(i1, IRI.create("http://example.org/I1"))
+        self.assertIs(i1, IRI.create(base, "I1"))
+        self.assertEqual((i1.get_namespace(), i1.get_remainder()), ("http://example.org/", "I1"))
+        # a different split is a different IRI
+        self.assertNotEqual(IRI("http://example.org/", "a#b"), IRI.create("http://example.org/a#b"))
+        iris = IRI.create_many(["http://example.org/I1", "http://example.org/x#I2", "http://example.org/I1"])
+        self.assertEqual(iris, [i1, IRI("http://example.org/x#", "I2"), i1])
+        self.assertIs(iris[2], i1)
+
     def test_class(self):
         c1 = OWLClass(IRI(base, "C1"))
         c2 = OWLClass(IRI(base, "C2"))
@@ -32,6 +45,17 @@ class Owlapy_Test(unittest.TestCase):
         c3 = OWLObjectUnionOf((c1, c2))
         self.assertSequenceEqual(list(c3.operands()), [c1, c2])
 
+    def test_interned_class_expressions(self):
+        c1 = OWLClass(IRI(base, "C1"))
+        c2 = OWLClass(IRI(base, "C2"))
+        p = OWLObjectProperty(IRI(base, "p"))
+        e1 = OWLObjectIntersectionOf((c1, OWLObjectSomeValuesFrom(property=p, filler=c2)))
+        e2 = OWLObjectIntersectionOf((c1, OWLObjectSomeValuesFrom(property=p, filler=c2)))
+        self.assertIs(e1, e2)
+        self.assertEqual(hash(e1), hash((c1, OWLObjectSomeValuesFrom(property=p, filler=c2))))
+        self.assertIsNot(OWLObjectUnionOf((c1, c2)), OWLObjectIntersectionOf((c1, c2)))
+        self.assertNotEqual(OWLObjectUnionOf((c1, c2)), OWLObjectIntersectionOf((c1, c2)))
+
     def test_iri_fixed_set(self):
         fs = IRIFixedSet({IRI.create(base, "C1"), IRI.create(base, "C2")})
         self.assertIn(IRI.create(base, "C1"), fs)
@@ -42,6 +66,50 @@ class Owlapy_Test(unittest.TestCase):
         self.assertEqual(fs(set()), 0)
         self.assertSequenceEqual(list(fs(fs(IRI.create(base, "C1")))), [IRI.create(base, "C1")])
 
+    def test_iri_fixed_set_order(self):
+        iris = [IRI.create(base, "C2"), IRI.create(base, "C3"), IRI.create(base, "C1"), IRI.create(base, "C2")]
+        fs = IRIFixedSet(iris)
+        self.assertSequenceEqual(fs.table(), iris[:3])
+        self.assertEqual(fs(IRI.create(base, "C3")), 0b10)
+        copy = IRIFixedSet(fs.table())
+        self.assertEqual(copy(iris), fs(iris))
+
+    def test_iri_fixed_set_bulk(self):
+        iris = [IRI.create(base, f"I{i}") for i in range(1000)]
+        fs = IRIFixedSet(iris)
+        picked = iris[::3] + [IRI.create(base, "I1")]
+        v = fs(picked)
+        self.assertEqual(v, sum(1 << i for i in {*range(0, 1000, 3), 1}))
+        self.assertSequenceEqual(fs.indices(v).tolist(), sorted({*range(0, 1000, 3), 1}))
+        self.assertSequenceEqual(fs.indices(picked[:3]).tolist(), [0, 3, 6])
+        self.assertSequenceEqual(list(fs(v)), [iris[i] for i in sorted({*range(0, 1000, 3), 1})])
+        self.assertEqual(fs([IRI.create(base, "C1"), iris[2]], ignore_missing=True), 0b100)
+        with self.assertRaises(KeyError):
+            fs([IRI.create(base, "C1")])
+
+    def test_bounded_cache(self):
+        cache = BoundedCache(max_bytes=3, keep=lambda k: k.startswith("keep"), sizeof=lambda v: 1)
+        cache["keep"] = 0
+        cache["a"] = 1
+        cache["b"] = 2
+        self.assertEqual(cache.get("a"), 1)
+        cache["c"] = 3
+        self.assertNotIn("b", cache)
+        self.assertIn("keep", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 1, 1))
+        self.assertEqual(cache.nbytes(), 3)
+
+        cache["d"] = 4
+        cache["e"] = 5
+        self.assertEqual(set(k for k in ("keep", "a", "c", "d", "e") if k in cache), {"keep", "d", "e"})
+
+        cache = BoundedCache(max_bytes=10)
+        cache["big"] = 1 << 1000
+        self.assertEqual(cache["big"], 1 << 1000)
+        cache["big2"] = 1 << 1000
+        self.assertEqual(len(cache), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,19 @@
+import os
+import tempfile
 import unittest
 
+import owlready2
 from pytest import mark
 
-from owlapy.fast_instance_checker import OWLReasoner_FastInstanceChecker
-from owlapy.model import OWLClass, OWLObjectProperty, OWLNamedIndividual, OWLObjectIntersectionOf, \
-    OWLObjectSomeValuesFrom, OWLThing, OWLObjectComplementOf, IRI, OWLObjectAllValuesFrom, OWLNothing
+from owlapy.fast_instance_checker import OWLReasoner_FastInstanceChecker, _IndexSnapshot
+from owlapy.model import OWLClass, OWLObjectUnionOf, OWLObjectProperty, OWLNamedIndividual, OWLObjectIntersectionOf, \
+    OWLObjectSomeValuesFrom, OWLThing, OWLObjectComplementOf, IRI, OWLObjectAllValuesFrom, OWLNothing, \
+    OWLObjectInverseOf, OWLObjectMinCardinality, OWLObjectMaxCardinality, OWLObjectExactCardinality, \
+    OWLObjectHasValue, OWLObjectOneOf, OWLDataProperty, OWLDataSomeValuesFrom, OWLDataHasValue, \
+    OWLDatatypeRestriction, OWLFacetRestriction, OWLLiteral, OWLDatatype, DoubleOWLDatatype, IntegerOWLDatatype, \
+    BooleanOWLDatatype, TopDatatype, OWLDataAllValuesFrom, OWLDataComplementOf
 from owlapy.owlready2 import OWLOntologyManager_Owlready2, OWLReasoner_Owlready2
+from owlapy.vocab import OWLFacet
 
 
 class Owlapy_FastInstanceChecker_Test(unittest.TestCase):
@@ -96,6 +104,409 @@ class Owlapy_FastInstanceChecker_Test(unittest.TestCase):
         self.assertEqual(no_child, target_inst)
         print(no_child)
 
+    def test_memoization(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, negation_default=True)
+
+        parent = OWLObjectUnionOf((male, OWLObjectAllValuesFrom(property=has_child, filler=female)))
+        child = OWLObjectIntersectionOf((parent, OWLObjectSomeValuesFrom(property=has_child, filler=female)))
+        first = set(reasoner.instances(parent))
+        hits = reasoner._ce_cache.hits
+        self.assertEqual(first, set(reasoner.instances(parent)))
+        self.assertEqual(reasoner._ce_cache.hits, hits + 1)
+        self.assertTrue(set(reasoner.instances(child)) <= first)
+        self.assertEqual(reasoner._ce_cache.hits, hits + 2)
+
+    def test_inverse(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        markus = OWLNamedIndividual(IRI(NS, 'markus'))
+        stefan = OWLNamedIndividual(IRI(NS, 'stefan'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+
+        self.assertEqual(set(base_reasoner.object_property_values(markus, has_child)),
+                         set(reasoner.object_property_values(markus, has_child)))
+        self.assertEqual({OWLNamedIndividual(IRI(NS, 'stefan'))},
+                         set(reasoner.object_property_values(markus, OWLObjectInverseOf(has_child))))
+        self.assertEqual(set(), set(reasoner.object_property_values(stefan, OWLObjectInverseOf(has_child))))
+
+        inst = frozenset(reasoner.instances(OWLObjectSomeValuesFrom(property=OWLObjectInverseOf(has_child),
+                                                                    filler=male)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'markus')),
+                                 OWLNamedIndividual(IRI(NS, 'anna')),
+                                 OWLNamedIndividual(IRI(NS, 'heinz'))})
+        self.assertEqual(inst, target_inst)
+
+    def test_cardinality(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+
+        inst = frozenset(reasoner.instances(OWLObjectMinCardinality(1, has_child, OWLThing)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'anna')),
+                                 OWLNamedIndividual(IRI(NS, 'markus')),
+                                 OWLNamedIndividual(IRI(NS, 'martin')),
+                                 OWLNamedIndividual(IRI(NS, 'stefan'))})
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(OWLObjectMaxCardinality(0, has_child, OWLThing)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'heinz')),
+                                 OWLNamedIndividual(IRI(NS, 'michelle'))})
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(OWLObjectExactCardinality(1, has_child, male)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'anna')),
+                                 OWLNamedIndividual(IRI(NS, 'martin')),
+                                 OWLNamedIndividual(IRI(NS, 'stefan'))})
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(OWLObjectMinCardinality(2, OWLObjectInverseOf(has_child), OWLThing)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'heinz'))})
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(OWLObjectMaxCardinality(1, has_child, male)))
+        self.assertEqual(inst, frozenset(onto.individuals_in_signature()))
+
+    def test_nominals(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        heinz = OWLNamedIndividual(IRI(NS, 'heinz'))
+        markus = OWLNamedIndividual(IRI(NS, 'markus'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+
+        inst = frozenset(reasoner.instances(OWLObjectHasValue(property=has_child, individual=heinz)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'anna')),
+                                 OWLNamedIndividual(IRI(NS, 'martin'))})
+        self.assertEqual(inst, target_inst)
+        self.assertEqual(inst, frozenset(reasoner.instances(
+            OWLObjectSomeValuesFrom(property=has_child, filler=OWLObjectOneOf(heinz)))))
+
+        inst = frozenset(reasoner.instances(OWLObjectHasValue(property=OWLObjectInverseOf(has_child),
+                                                              individual=markus)))
+        target_inst = frozenset({OWLNamedIndividual(IRI(NS, 'anna'))})
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(
+            OWLObjectOneOf((heinz, markus, OWLNamedIndividual(IRI(NS, 'nobody'))))))
+        self.assertEqual(inst, frozenset({heinz, markus}))
+
+    def test_data_properties(self):
+        NS = "http://www.biopax.org/examples/glycolysis#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/Biopax/biopax.owl"))
+
+        weight = OWLDataProperty(IRI(NS, 'MOLECULAR-WEIGHT'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+
+        def with_values(pred):
+            return frozenset(i for i in onto.individuals_in_signature()
+                             if any(pred(v) for v in base_reasoner.data_property_values(i, weight)))
+
+        inst = frozenset(reasoner.instances(OWLDataSomeValuesFrom(
+            property=weight,
+            filler=OWLDatatypeRestriction(DoubleOWLDatatype, OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 100.0)))))
+        self.assertEqual(inst, with_values(lambda v: v >= 100.0))
+        self.assertTrue(inst)
+
+        inst = frozenset(reasoner.instances(OWLDataSomeValuesFrom(
+            property=weight,
+            filler=OWLDatatypeRestriction(DoubleOWLDatatype, (OWLFacetRestriction(OWLFacet.MIN_EXCLUSIVE, 40.08),
+                                                              OWLFacetRestriction(OWLFacet.MAX_EXCLUSIVE, 100.0))))))
+        self.assertEqual(inst, with_values(lambda v: 40.08 < v < 100.0))
+
+        inst = frozenset(reasoner.instances(OWLDataSomeValuesFrom(property=weight, filler=DoubleOWLDatatype)))
+        self.assertEqual(inst, with_values(lambda v: True))
+
+        inst = frozenset(reasoner.instances(OWLDataHasValue(property=weight, value=OWLLiteral(40.08))))
+        self.assertEqual(inst, with_values(lambda v: v == 40.08))
+        self.assertEqual(len(inst), 1)
+
+        # negations pushed into the data restrictions
+        at_least_100 = OWLDatatypeRestriction(DoubleOWLDatatype, OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 100.0))
+        inst = frozenset(reasoner.instances(OWLDataSomeValuesFrom(property=weight,
+                                                                  filler=OWLDataComplementOf(at_least_100))))
+        self.assertEqual(inst, with_values(lambda v: v < 100.0))
+        reasoner_nd = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, negation_default=True)
+        all_inds = frozenset(onto.individuals_in_signature())
+        for ce in (OWLDataSomeValuesFrom(property=weight, filler=at_least_100),
+                   OWLDataAllValuesFrom(property=weight, filler=at_least_100)):
+            negated = OWLObjectComplementOf(ce)
+            self.assertIsNot(type(negated.get_nnf()), OWLObjectComplementOf)
+            self.assertEqual(frozenset(reasoner_nd.instances(negated.get_nnf())),
+                             all_inds - frozenset(reasoner_nd.instances(ce)))
+        inst = frozenset(reasoner_nd.instances(OWLDataAllValuesFrom(property=weight, filler=at_least_100)))
+        self.assertEqual(inst, all_inds - with_values(lambda v: v < 100.0))
+
+    def test_data_property_datatypes(self):
+        NS = "http://www.biopax.org/examples/glycolysis#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/Biopax/biopax.owl"))
+
+        weight = OWLDataProperty(IRI(NS, 'MOLECULAR-WEIGHT'))
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=OWLReasoner_Owlready2(onto))
+        doubles = frozenset(reasoner.instances(OWLDataSomeValuesFrom(property=weight, filler=DoubleOWLDatatype)))
+        ind = next(iter(reasoner.instances(OWLDataHasValue(property=weight, value=OWLLiteral(40.08)))))
+
+        # the weights are all doubles
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataSomeValuesFrom(property=weight, filler=IntegerOWLDatatype))))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataSomeValuesFrom(property=weight, filler=BooleanOWLDatatype))))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(OWLDataSomeValuesFrom(
+            property=weight,
+            filler=OWLDatatypeRestriction(IntegerOWLDatatype, OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 0))))))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(OWLDataSomeValuesFrom(
+            property=weight, filler=OWLDatatype(IRI.create('http://www.w3.org/2001/XMLSchema#string'))))))
+        self.assertEqual(doubles, frozenset(reasoner.instances(
+            OWLDataSomeValuesFrom(property=weight, filler=TopDatatype))))
+
+        reasoner.add_property_assertion(ind, weight, OWLLiteral(40))
+        reasoner.add_property_assertion(ind, weight, OWLLiteral(True))
+        # 40 and 40.0 are different values
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(40.0)))))
+        self.assertEqual(frozenset({ind}), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(40)))))
+        self.assertEqual(frozenset({ind}), frozenset(reasoner.instances(
+            OWLDataSomeValuesFrom(property=weight, filler=IntegerOWLDatatype))))
+        self.assertEqual(frozenset({ind}), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(True)))))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(1.0)))))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(False)))))
+
+    def test_sub_properties(self):
+        NS = "http://www.biopax.org/examples/glycolysis#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/Biopax/biopax.owl"))
+
+        participants = OWLObjectProperty(IRI(NS, 'PARTICIPANTS'))
+        sub_properties = [OWLObjectProperty(IRI(NS, _)) for _ in ('COFACTOR', 'CONTROLLED', 'CONTROLLER', 'LEFT',
+                                                                   'RIGHT')]
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+
+        self.assertEqual(set(sub_properties), set(reasoner.sub_object_properties(participants)))
+        inst = frozenset(reasoner.instances(OWLObjectSomeValuesFrom(property=participants, filler=OWLThing)))
+        target_inst = frozenset().union(*(reasoner.instances(OWLObjectSomeValuesFrom(property=p, filler=OWLThing))
+                                          for p in sub_properties))
+        self.assertTrue(target_inst)
+        self.assertEqual(inst, target_inst)
+
+        inst = frozenset(reasoner.instances(
+            OWLObjectSomeValuesFrom(property=OWLObjectInverseOf(participants), filler=OWLThing)))
+        target_inst = frozenset().union(*(reasoner.instances(
+            OWLObjectSomeValuesFrom(property=OWLObjectInverseOf(p), filler=OWLThing)) for p in sub_properties))
+        self.assertEqual(inst, target_inst)
+
+    def test_transitive_closure(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+        with onto._onto:
+            onto._world[NS + 'hasChild'].is_a.append(owlready2.TransitiveProperty)
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        heinz = OWLNamedIndividual(IRI(NS, 'heinz'))
+        stefan = OWLNamedIndividual(IRI(NS, 'stefan'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        asserted = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+        closed = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, transitive_closure=True)
+        on_demand = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, transitive_closure=True,
+                                                    transitive_closure_max_bytes=0)
+
+        self.assertEqual(frozenset({OWLNamedIndividual(IRI(NS, 'anna')), OWLNamedIndividual(IRI(NS, 'martin'))}),
+                         frozenset(asserted.instances(OWLObjectHasValue(property=has_child, individual=heinz))))
+
+        target_inst = frozenset(map(OWLNamedIndividual, map(lambda _: IRI(NS, _), ('anna', 'martin', 'markus',
+                                                                                   'stefan'))))
+        for reasoner in (closed, on_demand):
+            inst = frozenset(reasoner.instances(OWLObjectHasValue(property=has_child, individual=heinz)))
+            self.assertEqual(inst, target_inst)
+            inst = frozenset(reasoner.instances(OWLObjectSomeValuesFrom(property=has_child, filler=male)))
+            self.assertEqual(inst, target_inst)
+            inst = frozenset(reasoner.object_property_values(stefan, has_child))
+            self.assertEqual(inst, frozenset(map(OWLNamedIndividual, map(lambda _: IRI(NS, _), ('markus', 'anna',
+                                                                                                'heinz')))))
+            inst = frozenset(reasoner.object_property_values(heinz, OWLObjectInverseOf(has_child)))
+            self.assertEqual(inst, target_inst)
+            # cardinalities count the fillers along the closure as well
+            inst = frozenset(reasoner.instances(OWLObjectMinCardinality(1, property=has_child, filler=male)))
+            self.assertEqual(inst, target_inst)
+            inst = frozenset(reasoner.instances(OWLObjectMinCardinality(3, property=has_child, filler=OWLThing)))
+            self.assertEqual(inst, frozenset({stefan}))
+            inst = frozenset(reasoner.instances(OWLObjectExactCardinality(
+                2, property=OWLObjectInverseOf(has_child), filler=OWLThing)))
+            self.assertEqual(inst, frozenset({OWLNamedIndividual(IRI(NS, 'anna'))}))
+        self.assertIn(has_child, on_demand._obj_prop_on_demand)
+        self.assertNotIn(has_child, closed._obj_prop_on_demand)
+
+    def test_abox_updates(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        lisa = OWLNamedIndividual(IRI(NS, 'lisa'))
+        heinz = OWLNamedIndividual(IRI(NS, 'heinz'))
+        markus = OWLNamedIndividual(IRI(NS, 'markus'))
+        anna = OWLNamedIndividual(IRI(NS, 'anna'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, negation_default=True)
+
+        has_daughter = OWLObjectSomeValuesFrom(property=has_child, filler=female)
+        persons = OWLObjectUnionOf((male, female))
+        self.assertEqual(frozenset({markus}), frozenset(reasoner.instances(has_daughter)))
+
+        reasoner.add_class_assertion(lisa, female)
+        self.assertIn(lisa, frozenset(reasoner.instances(female)))
+        self.assertIn(lisa, frozenset(reasoner.instances(OWLThing)))
+        self.assertIn(lisa, frozenset(reasoner.instances(OWLObjectComplementOf(male))))
+        self.assertIn(lisa, frozenset(reasoner.instances(persons)))
+
+        reasoner.add_property_assertion(heinz, has_child, lisa)
+        self.assertEqual(frozenset({markus, heinz}), frozenset(reasoner.instances(has_daughter)))
+        self.assertEqual(frozenset({lisa}), frozenset(reasoner.object_property_values(heinz, has_child)))
+        # not mentioning changed entities, still cached
+        self.assertIn(persons, reasoner._ce_cache)
+
+        reasoner.remove_property_assertion(markus, has_child, anna)
+        self.assertEqual(frozenset({heinz}), frozenset(reasoner.instances(has_daughter)))
+        self.assertEqual(frozenset({heinz}), frozenset(reasoner.instances(
+            OWLObjectHasValue(property=has_child, individual=lisa))))
+
+        reasoner.remove_class_assertion(lisa, female)
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(has_daughter)))
+
+        NS = "http://www.biopax.org/examples/glycolysis#"
+        onto = mgr.load_ontology(IRI.create("file://KGs/Biopax/biopax.owl"))
+        weight = OWLDataProperty(IRI(NS, 'MOLECULAR-WEIGHT'))
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=OWLReasoner_Owlready2(onto))
+        ind = next(iter(reasoner.instances(OWLDataHasValue(property=weight, value=OWLLiteral(40.08)))))
+
+        reasoner.remove_property_assertion(ind, weight, OWLLiteral(40.08))
+        reasoner.add_property_assertion(ind, weight, OWLLiteral(1234.5))
+        self.assertEqual(frozenset(), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(40.08)))))
+        self.assertEqual(frozenset({ind}), frozenset(reasoner.instances(
+            OWLDataHasValue(property=weight, value=OWLLiteral(1234.5)))))
+
+    def test_types(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        person = OWLClass(IRI.create(NS, 'person'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        lisa = OWLNamedIndividual(IRI(NS, 'lisa'))
+        markus = OWLNamedIndividual(IRI(NS, 'markus'))
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        reasoner = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner)
+        for ind in onto.individuals_in_signature():
+            self.assertEqual(frozenset(base_reasoner.types(ind)), frozenset(reasoner.types(ind)))
+        self.assertEqual(frozenset({OWLThing, person, male}), frozenset(reasoner.types(markus)))
+
+        self.assertTrue(reasoner.is_instance(markus, male))
+        self.assertFalse(reasoner.is_instance(markus, female))
+        self.assertTrue(reasoner.is_instance(markus, OWLObjectSomeValuesFrom(property=has_child, filler=female)))
+        self.assertFalse(reasoner.is_instance(lisa, OWLThing))
+
+        reasoner.add_class_assertion(lisa, female)
+        self.assertEqual(frozenset({OWLThing, person, female}), frozenset(reasoner.types(lisa)))
+        self.assertTrue(reasoner.is_instance(lisa, female))
+
+    def test_index_snapshot(self):
+        NS = "http://example.com/father#"
+        mgr = OWLOntologyManager_Owlready2()
+        onto = mgr.load_ontology(IRI.create("file://KGs/father.owl"))
+
+        male = OWLClass(IRI.create(NS, 'male'))
+        female = OWLClass(IRI.create(NS, 'female'))
+        has_child = OWLObjectProperty(IRI(NS, 'hasChild'))
+        expressions = [male, female,
+                       OWLObjectSomeValuesFrom(property=has_child, filler=female),
+                       OWLObjectSomeValuesFrom(property=OWLObjectInverseOf(has_child), filler=male),
+                       OWLObjectMinCardinality(property=has_child, cardinality=1, filler=OWLThing)]
+
+        base_reasoner = OWLReasoner_Owlready2(onto)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'father.idx')
+            writer = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, index_snapshot=path)
+            self.assertIsNone(writer._snapshot)
+            self.assertTrue(os.path.exists(path))
+
+            reader = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, index_snapshot=path)
+            self.assertIsNotNone(reader._snapshot)
+            for ce in expressions:
+                self.assertEqual(set(writer.instances(ce)), set(reader.instances(ce)))
+            self.assertEqual(set(writer.object_property_values(OWLNamedIndividual(IRI(NS, 'markus')), has_child)),
+                             set(reader.object_property_values(OWLNamedIndividual(IRI(NS, 'markus')), has_child)))
+
+            # other content
+            self.assertIsNone(_IndexSnapshot.open(path, 'other'))
+
+            # individuals added on top of the snapshot
+            reader = OWLReasoner_FastInstanceChecker(onto, base_reasoner=base_reasoner, index_snapshot=path,
+                                                     negation_default=True)
+            self.assertIsNotNone(reader._snapshot)
+            lisa = OWLNamedIndividual(IRI(NS, 'lisa'))
+            reader.add_class_assertion(lisa, female)
+            self.assertIn(lisa, set(reader.instances(
+                OWLObjectMaxCardinality(property=has_child, cardinality=0, filler=OWLThing))))
+            self.assertIn(lisa, set(reader.instances(OWLObjectAllValuesFrom(property=has_child, filler=male))))
+            self.assertNotIn(lisa, set(reader.instances(OWLObjectSomeValuesFrom(property=has_child, filler=OWLThing))))
+
+            # the same file loaded again
+            onto2 = OWLOntologyManager_Owlready2().load_ontology(IRI.create("file://KGs/father.owl"))
+            reader = OWLReasoner_FastInstanceChecker(onto2, base_reasoner=OWLReasoner_Owlready2(onto2),
+                                                     index_snapshot=path)
+            self.assertIsNotNone(reader._snapshot)
+
+            # changed content
+            with onto2._onto:
+                onto2._world[NS + 'heinz'].is_a.append(onto2._world[NS + 'female'])
+            changed = OWLReasoner_FastInstanceChecker(onto2, base_reasoner=OWLReasoner_Owlready2(onto2),
+                                                      index_snapshot=path)
+            self.assertIsNone(changed._snapshot)
+            self.assertIn(OWLNamedIndividual(IRI(NS, 'heinz')), set(changed.instances(female)))
+
     @mark.xfail
     def test_complement2(self):
         NS = "http://example.com/father#"
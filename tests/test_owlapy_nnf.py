@@ -26,7 +26,10 @@ import unittest
 
 from owlapy.model import OWLClass, OWLObjectProperty, OWLNamedIndividual, OWLObjectComplementOf, \
     OWLObjectAllValuesFrom, OWLObjectSomeValuesFrom, OWLObjectIntersectionOf, OWLObjectUnionOf, \
-    OWLObjectMinCardinality, OWLObjectMaxCardinality, OWLObjectHasValue, OWLObjectOneOf, OWLClassExpression, IRI
+    OWLObjectMinCardinality, OWLObjectMaxCardinality, OWLObjectHasValue, OWLObjectOneOf, OWLClassExpression, IRI, \
+    OWLDataProperty, OWLDataSomeValuesFrom, OWLDataAllValuesFrom, OWLDataComplementOf, OWLDatatypeRestriction, \
+    OWLFacetRestriction, IntegerOWLDatatype
+from owlapy.vocab import OWLFacet
 from owlapy.util import NNF
 
 
@@ -85,6 +88,25 @@ class Owlapy_NNF_Test(unittest.TestCase):
         nnf = OWLObjectAllValuesFrom(property, OWLObjectComplementOf(filler))
         self.assertEqual(cls.get_nnf(), nnf)
 
+    def testNegDataSomeValuesFrom(self):
+        property = OWLDataProperty(iri("d"))
+        filler = OWLDatatypeRestriction(IntegerOWLDatatype, OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 18))
+        cls = OWLObjectComplementOf(OWLDataSomeValuesFrom(property, filler))
+        nnf = OWLDataAllValuesFrom(property, OWLDataComplementOf(filler))
+        self.assertEqual(cls.get_nnf(), nnf)
+        # the complement of the filler is removed again
+        self.assertEqual(OWLObjectComplementOf(nnf).get_nnf(), OWLDataSomeValuesFrom(property, filler))
+
+    def testNegDataAllValuesFrom(self):
+        property = OWLDataProperty(iri("d"))
+        filler = IntegerOWLDatatype
+        all_values_from = OWLDataAllValuesFrom(property, filler)
+        self.assertEqual(all_values_from.get_nnf(), all_values_from)
+        cls = all_values_from.get_object_complement_of()
+        nnf = OWLDataSomeValuesFrom(property, OWLDataComplementOf(filler))
+        self.assertEqual(cls.get_nnf(), nnf)
+        self.assertEqual(self.get_nnf(OWLObjectComplementOf(OWLObjectComplementOf(all_values_from))), all_values_from)
+
     def testPosObjectIntersectionOf(self):
         """ generated source for method testPosObjectIntersectionOf """
         cls = OWLObjectIntersectionOf((OWLClass(iri("A")), OWLClass(iri("B")), OWLClass(iri("C"))))
@@ -2,8 +2,10 @@ import unittest
 
 from owlapy.model import OWLClass, OWLObjectProperty, OWLObjectIntersectionOf, OWLObjectSomeValuesFrom, \
     OWLThing, OWLObjectComplementOf, OWLObjectUnionOf, OWLNamedIndividual, OWLObjectOneOf, OWLObjectHasValue, \
-    OWLObjectMinCardinality, IRI
+    OWLObjectMinCardinality, IRI, OWLDataProperty, OWLDataSomeValuesFrom, OWLDatatypeRestriction, OWLFacetRestriction, \
+    OWLDataHasValue, OWLLiteral, DoubleOWLDatatype, OWLDataAllValuesFrom, OWLDataComplementOf
 from owlapy.render import DLSyntaxObjectRenderer, ManchesterOWLSyntaxOWLObjectRenderer
+from owlapy.vocab import OWLFacet
 
 
 class Owlapy_DLRenderer_Test(unittest.TestCase):
@@ -50,6 +52,24 @@ class Owlapy_DLRenderer_Test(unittest.TestCase):
         print(r)
         self.assertEqual(r, "≥ 2 hasChild.⊤")
 
+        charge = OWLDataProperty(IRI.create(NS, 'charge'))
+        datasome = OWLDataSomeValuesFrom(property=charge, filler=OWLDatatypeRestriction(
+            DoubleOWLDatatype, (OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 0.1),
+                                OWLFacetRestriction(OWLFacet.MAX_EXCLUSIVE, 0.5))))
+        r = renderer.render(datasome)
+        print(r)
+        self.assertEqual(r, "∃ charge.xsd:double[≥ 0.1 , < 0.5]")
+
+        datavalue = OWLDataHasValue(property=charge, value=OWLLiteral(1))
+        r = renderer.render(datavalue)
+        print(r)
+        self.assertEqual(r, "∃ charge.{1}")
+
+        dataall = OWLDataAllValuesFrom(property=charge, filler=OWLDataComplementOf(DoubleOWLDatatype))
+        r = renderer.render(dataall)
+        print(r)
+        self.assertEqual(r, "∀ charge.¬xsd:double")
+
 
 class Owlapy_ManchesterRenderer_Test(unittest.TestCase):
     def test_ce_render(self):
@@ -95,6 +115,24 @@ class Owlapy_ManchesterRenderer_Test(unittest.TestCase):
         print(r)
         self.assertEqual(r, "hasChild min 2 Thing")
 
+        charge = OWLDataProperty(IRI.create(NS, 'charge'))
+        datasome = OWLDataSomeValuesFrom(property=charge, filler=OWLDatatypeRestriction(
+            DoubleOWLDatatype, (OWLFacetRestriction(OWLFacet.MIN_INCLUSIVE, 0.1),
+                                OWLFacetRestriction(OWLFacet.MAX_EXCLUSIVE, 0.5))))
+        r = renderer.render(datasome)
+        print(r)
+        self.assertEqual(r, "charge some xsd:double[>= 0.1 , < 0.5]")
+
+        datavalue = OWLDataHasValue(property=charge, value=OWLLiteral(1))
+        r = renderer.render(datavalue)
+        print(r)
+        self.assertEqual(r, "charge value 1")
+
+        dataall = OWLDataAllValuesFrom(property=charge, filler=OWLDataComplementOf(DoubleOWLDatatype))
+        r = renderer.render(dataall)
+        print(r)
+        self.assertEqual(r, "charge only not xsd:double")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -9,6 +9,7 @@ from owlapy.render import DLSyntaxObjectRenderer
 from ontolearn.refinement_operators import CustomRefinementOperator, ModifiedCELOERefinement, LengthBasedRefinement, \
     ExpressRefinement
 from ontolearn.search import Node
+from owlapy.model import OWLClass, OWLObjectProperty, IRI
 
 setup_logging("logging_test.conf")
 
@@ -26,6 +27,25 @@ def test_celoe_refinement_operator():
         pass
 
 
+def test_celoe_refinement_delta():
+    rho = ModifiedCELOERefinement(kb)
+    NS = 'http://www.benchmark.org/family#'
+    person = OWLClass(IRI.create(NS, 'Person'))
+    has_child = OWLObjectProperty(IRI.create(NS, 'hasChild'))
+    ce = kb.intersection((person, kb.existential_restriction(kb.thing, has_child)))
+    refinements = list(rho.refine(ce, max_length=5, current_domain=kb.thing))
+    with_delta = list(rho.refine_with_delta(ce, max_length=5, current_domain=kb.thing))
+    assert refinements == [ref for ref, _ in with_delta]
+    # refinements of an operand are not necessarily subsumed by it, e.g. ∃ hasChild.⊤ => ∀ hasChild.⊤
+    assert kb.intersection((person, kb.universal_restriction(kb.thing, has_child))) in refinements
+    # compare to the extensions of a knowledge base whose cache is not filled by intersection_individuals_set
+    fresh_kb = KnowledgeBase(path=settings['data_path'][3:])
+    for ref, operands in with_delta:
+        assert operands is not None
+        assert kb.intersection_individuals_set(ref, operands) == fresh_kb.individuals_set(ref)
+        assert kb.individuals_set(ref) == fresh_kb.individuals_set(ref)
+
+
 def test_length_refinement_operator():
     r = DLSyntaxObjectRenderer()
     rho = LengthBasedRefinement(kb)